@@ -0,0 +1,129 @@
+"""
+Mide cuánto de la latencia de cada petición es abrir la conexión a la base de
+datos. Simula el ciclo de Django (``close_old_connections`` al empezar y al
+terminar la petición, con una consulta en medio) en varios hilos con:
+
+- una conexión por petición (``CONN_MAX_AGE = 0``, como antes);
+- conexiones persistentes por hilo (``CONN_MAX_AGE`` y ``CONN_HEALTH_CHECKS``);
+- el pool compartido (templatesApp/pool.py, ``CONN_MAX_AGE = 0``).
+
+Usa la base configurada con las variables DB_* (templatesApp/basedatos.py) o,
+con ``--sqlite``, un archivo SQLite temporal:
+
+    python benchmarks/conexiones_bd.py --peticiones 2000 --hilos 8
+    python benchmarks/conexiones_bd.py --sqlite
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projectoFrontEnd.settings')
+
+import django
+from django.conf import settings
+
+CONSULTA = 'SELECT 1'
+
+
+def variantes(base, hilos):
+    from templatesApp.basedatos import con_pool
+
+    return {
+        'una conexión por petición': {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+        'persistentes por hilo': {**base, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+        # Menos conexiones que hilos: las peticiones se las reparten
+        'pool compartido': {
+            **con_pool(base, tamano=max(1, hilos // 2), desborde=0),
+            'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True,
+        },
+    }
+
+
+def simular(config, peticiones, hilos):
+    """Latencias (ms) de las peticiones y cantidad de conexiones distintas que se abrieron"""
+    from django.db.backends.signals import connection_created
+    from django.db.utils import ConnectionHandler
+
+    conexiones = ConnectionHandler({'default': config})
+    # connection_created se envía también al tomar una conexión del pool
+    abiertas = set()
+    latencias = []
+    lock = threading.Lock()
+
+    def contar(sender, connection, **kwargs):
+        abiertas.add(connection.connection)
+    connection_created.connect(contar)
+
+    def cerrar_obsoletas():
+        for conexion in conexiones.all(initialized_only=True):
+            conexion.close_if_unusable_or_obsolete()
+
+    def trabajar(cantidad):
+        propias = []
+        for _ in range(cantidad):
+            inicio = time.perf_counter()
+            cerrar_obsoletas()
+            with conexiones['default'].cursor() as cursor:
+                cursor.execute(CONSULTA)
+                cursor.fetchone()
+            cerrar_obsoletas()
+            propias.append((time.perf_counter() - inicio) * 1000)
+        conexiones['default'].close()
+        with lock:
+            latencias.extend(propias)
+
+    trabajadores = [
+        threading.Thread(target=trabajar, args=(peticiones // hilos,)) for _ in range(hilos)
+    ]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+    connection_created.disconnect(contar)
+    return latencias, len(abiertas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--sqlite', action='store_true', help='Usa un archivo SQLite temporal')
+    args = parser.parse_args()
+
+    django.setup()
+    from templatesApp.basedatos import MOTOR_POOL
+    from templatesApp.pool import vaciar_pools
+
+    with tempfile.TemporaryDirectory() as directorio:
+        if args.sqlite:
+            base = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directorio, 'bd.sqlite3')}
+        else:
+            # Sin el pool de settings: la variante con pool lo agrega
+            base = dict(settings.DATABASES['default'])
+            motores = {pool: motor for motor, pool in MOTOR_POOL.items()}
+            base['ENGINE'] = motores.get(base['ENGINE'], base['ENGINE'])
+            base['OPTIONS'] = {
+                clave: valor for clave, valor in base.get('OPTIONS', {}).items() if clave != 'pool'
+            }
+        print(f"{base['ENGINE']}: {args.peticiones} peticiones en {args.hilos} hilos")
+
+        for nombre, config in variantes(base, args.hilos).items():
+            latencias, abiertas = simular(config, args.peticiones, args.hilos)
+            vaciar_pools()
+            latencias.sort()
+            p95 = latencias[int(len(latencias) * 0.95)]
+            print(
+                f'== {nombre:<26} p50 {statistics.median(latencias):7.3f} ms  p95 {p95:7.3f} ms  '
+                f'{abiertas:5d} conexiones abiertas'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Compara los planes de ejecución y tiempos de las consultas de los listados
+antes y después de la migración de índices (0002_indices_consultas).
+
+Usa una base SQLite temporal, nunca la base configurada en settings:
+
+    python benchmarks/planes_indices.py --trabajadores 20000 --asignaciones 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projectoFrontEnd.settings')
+
+import django
+from django.conf import settings
+
+ANTES = ('templatesApp', '0001_initial')
+DESPUES = ('templatesApp', '0002_indices_consultas')
+
+
+def configurar(ruta_db):
+    settings.DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ruta_db},
+    }
+    django.setup()
+
+
+def migrar(destino):
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    executor.migrate([destino])
+    executor.loader.build_graph()
+    return executor.loader.project_state(destino).apps
+
+
+def poblar(apps, n_trabajadores, n_buses, n_roles, n_asignaciones, semilla):
+    """Inserta un dataset determinista usando los modelos históricos"""
+    rnd = random.Random(semilla)
+    Trabajador = apps.get_model('templatesApp', 'Trabajador')
+    Rol = apps.get_model('templatesApp', 'Rol')
+    Bus = apps.get_model('templatesApp', 'Bus')
+    EstadoBus = apps.get_model('templatesApp', 'EstadoBus')
+    AsignacionRol = apps.get_model('templatesApp', 'AsignacionRol')
+    AsignacionBus = apps.get_model('templatesApp', 'AsignacionBus')
+
+    nombres = ['Ana', 'Luis', 'Pedro', 'Camila', 'Sofia', 'Jorge', 'Marta', 'Diego']
+    apellidos = ['Soto', 'Rojas', 'Munoz', 'Perez', 'Diaz', 'Silva', 'Vargas', 'Reyes']
+    Trabajador.objects.bulk_create([
+        Trabajador(
+            nombre=rnd.choice(nombres), apellido=f'{rnd.choice(apellidos)} {i}',
+            direccion='Calle 123', contacto='+56912345678', edad=rnd.randint(18, 70),
+            activo=rnd.random() < 0.9,
+        )
+        for i in range(n_trabajadores)
+    ], batch_size=2000)
+    Rol.objects.bulk_create([
+        Rol(nombre=f'Rol {i}', nivel_acceso=rnd.randint(1, 5), activo=rnd.random() < 0.9)
+        for i in range(n_roles)
+    ], batch_size=2000)
+    Bus.objects.bulk_create([
+        Bus(patente=f'BUS-{i:05d}', modelo='O500', año=rnd.randint(2000, 2024),
+            capacidad=rnd.randint(20, 80), activo=rnd.random() < 0.9)
+        for i in range(n_buses)
+    ], batch_size=2000)
+
+    estados = ['OPERATIVO'] * 7 + ['MANTENIMIENTO', 'REPARACION', 'FUERA_SERVICIO']
+    EstadoBus.objects.bulk_create([
+        EstadoBus(bus_id=bus_id, estado=rnd.choice(estados), kilometraje=rnd.randint(0, 900000))
+        for bus_id in Bus.objects.values_list('id', flat=True)
+    ], batch_size=2000)
+
+    trabajadores = list(Trabajador.objects.values_list('id', flat=True))
+    roles = list(Rol.objects.values_list('id', flat=True))
+    buses = list(Bus.objects.values_list('id', flat=True))
+    hoy = date.today()
+    turnos = ['MAÑANA', 'TARDE', 'NOCHE']
+
+    # Las activas usan pares distintos para respetar las restricciones únicas parciales
+    n_activas = n_asignaciones // 10
+    AsignacionRol.objects.bulk_create([
+        AsignacionRol(trabajador_id=rnd.choice(trabajadores), rol_id=rnd.choice(roles), activo=False)
+        for _ in range(n_asignaciones - n_activas)
+    ] + [
+        AsignacionRol(trabajador_id=trabajadores[i % len(trabajadores)],
+                      rol_id=roles[(i // len(trabajadores)) % len(roles)])
+        for i in range(n_activas)
+    ], batch_size=2000)
+    AsignacionBus.objects.bulk_create([
+        AsignacionBus(trabajador_id=rnd.choice(trabajadores), bus_id=rnd.choice(buses),
+                      turno=rnd.choice(turnos), activo=False)
+        for _ in range(n_asignaciones - n_activas)
+    ] + [
+        AsignacionBus(trabajador_id=trabajadores[i % len(trabajadores)],
+                      bus_id=buses[(i // len(trabajadores)) % len(buses)], turno=turnos[i % 3])
+        for i in range(n_activas)
+    ], batch_size=2000)
+
+    # auto_now_add ignora valores explícitos: se reparten las fechas después
+    for modelo in (AsignacionRol, AsignacionBus):
+        for dias in range(0, 365, 7):
+            modelo.objects.filter(id__gt=dias * n_asignaciones // 365).update(
+                fecha_asignacion=hoy - timedelta(days=365 - dias)
+            )
+
+
+def consultas(apps):
+    """Consultas equivalentes a las de los listados (primera página)"""
+    Trabajador = apps.get_model('templatesApp', 'Trabajador')
+    Rol = apps.get_model('templatesApp', 'Rol')
+    Bus = apps.get_model('templatesApp', 'Bus')
+    EstadoBus = apps.get_model('templatesApp', 'EstadoBus')
+    AsignacionRol = apps.get_model('templatesApp', 'AsignacionRol')
+    AsignacionBus = apps.get_model('templatesApp', 'AsignacionBus')
+    return {
+        'trabajadores activos': Trabajador.objects.filter(activo=True).order_by('apellido', 'nombre', 'id')[:10],
+        'roles activos': Rol.objects.filter(activo=True).order_by('nombre', 'id')[:10],
+        'buses activos': Bus.objects.filter(activo=True).order_by('patente')[:10],
+        'estados en REPARACION': EstadoBus.objects.filter(estado='REPARACION').order_by('-fecha_cambio', 'id')[:10],
+        'asignaciones rol activas': AsignacionRol.objects.filter(activo=True).order_by('-fecha_asignacion', 'id')[:10],
+        'asignaciones bus NOCHE activas': AsignacionBus.objects.filter(
+            activo=True, turno='NOCHE').order_by('-fecha_asignacion', 'id')[:10],
+    }
+
+
+def medir(apps, repeticiones):
+    resultados = {}
+    for nombre, queryset in consultas(apps).items():
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            list(queryset.all())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = (queryset.explain(), statistics.median(tiempos))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trabajadores', type=int, default=20000)
+    parser.add_argument('--buses', type=int, default=2000)
+    parser.add_argument('--roles', type=int, default=200)
+    parser.add_argument('--asignaciones', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        configurar(os.path.join(directorio, 'benchmark.sqlite3'))
+
+        apps = migrar(ANTES)
+        poblar(apps, args.trabajadores, args.buses, args.roles, args.asignaciones, args.semilla)
+        antes = medir(apps, args.repeticiones)
+
+        apps = migrar(DESPUES)
+        despues = medir(apps, args.repeticiones)
+
+        for nombre in antes:
+            plan_antes, ms_antes = antes[nombre]
+            plan_despues, ms_despues = despues[nombre]
+            print(f'== {nombre}')
+            print(f'   antes   ({ms_antes:8.3f} ms): {plan_antes}')
+            print(f'   después ({ms_despues:8.3f} ms): {plan_despues}')
+
+
+if __name__ == '__main__':
+    main()
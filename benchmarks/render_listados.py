@@ -0,0 +1,182 @@
+"""
+Mide el tiempo de render de los listados con 100 filas:
+
+- por fila: insignias de estado, turno y activo y enlaces Ver/Editar/Eliminar
+  con la cadena ``{% if %}...{% elif %}`` y ``{% url %}`` que usaban las
+  plantillas (antes) y con los filtros precalculados de ``{% load insignias %}``
+  (después);
+- por página: los fragmentos ``*_resultados.html`` obtenidos en cada petición
+  con el loader con caché de settings y con los loaders sin caché, que vuelven
+  a leer y compilar la plantilla cada vez.
+
+No consulta la base de datos (las filas se arman en memoria):
+
+    python benchmarks/render_listados.py --filas 100 --repeticiones 200
+"""
+import argparse
+import copy
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projectoFrontEnd.settings')
+
+import django
+from django.conf import settings
+
+FILA_ANTES = """{% for fila in filas %}
+{% if fila.estado == 'OPERATIVO' %}
+    <span class="badge bg-success"><i class="fas fa-check-circle"></i> Operativo</span>
+{% elif fila.estado == 'MANTENIMIENTO' %}
+    <span class="badge bg-warning"><i class="fas fa-wrench"></i> Mantenimiento</span>
+{% elif fila.estado == 'REPARACION' %}
+    <span class="badge bg-danger"><i class="fas fa-tools"></i> Reparación</span>
+{% elif fila.estado == 'FUERA_SERVICIO' %}
+    <span class="badge bg-danger"><i class="fas fa-times-circle"></i> Fuera de Servicio</span>
+{% elif fila.estado == 'RESERVADO' %}
+    <span class="badge bg-info"><i class="fas fa-lock"></i> Reservado</span>
+{% endif %}
+{% if fila.turno == 'MAÑANA' %}
+    <span class="badge bg-warning"><i class="fas fa-sun"></i> Mañana</span>
+{% elif fila.turno == 'TARDE' %}
+    <span class="badge bg-info"><i class="fas fa-cloud"></i> Tarde</span>
+{% elif fila.turno == 'NOCHE' %}
+    <span class="badge bg-dark"><i class="fas fa-moon"></i> Noche</span>
+{% endif %}
+{% if fila.activo %}
+    <span class="badge badge-activo">Activo</span>
+{% else %}
+    <span class="badge badge-inactivo">Inactivo</span>
+{% endif %}
+<a href="{% url 'bus_detalle' fila.id %}">Ver</a>
+<a href="{% url 'bus_editar' fila.id %}">Editar</a>
+<a href="{% url 'bus_eliminar' fila.id %}">Eliminar</a>
+{% endfor %}"""
+
+FILA_DESPUES = """{% load insignias %}{% for fila in filas %}
+{{ fila.estado|insignia_estado }}
+{{ fila.turno|insignia_turno }}
+{{ fila.activo|insignia_activo }}
+<a href="{{ fila.id|url_fila:'bus_detalle' }}">Ver</a>
+<a href="{{ fila.id|url_fila:'bus_editar' }}">Editar</a>
+<a href="{{ fila.id|url_fila:'bus_eliminar' }}">Eliminar</a>
+{% endfor %}"""
+
+ESTADOS = ['OPERATIVO', 'MANTENIMIENTO', 'REPARACION', 'FUERA_SERVICIO', 'RESERVADO']
+TURNOS = ['MAÑANA', 'TARDE', 'NOCHE']
+
+
+def configurar():
+    # Nunca la base configurada en settings: el render no la consulta
+    settings.DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    }
+    django.setup()
+
+
+def filas(n, semilla):
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    estados = [
+        SimpleNamespace(
+            id=i, bus_patente=f'BUS-{i:05d}', bus_modelo='O500', estado=rnd.choice(ESTADOS),
+            kilometraje=rnd.randint(0, 900000), fecha_cambio=datetime.now() - timedelta(hours=i),
+        )
+        for i in range(1, n + 1)
+    ]
+    asignaciones = [
+        SimpleNamespace(
+            id=i, trabajador_id=i, trabajador_nombre='Ana', trabajador_apellido=f'Soto {i}',
+            bus_patente=f'BUS-{i:05d}', bus_modelo='O500', turno=rnd.choice(TURNOS),
+            fecha_asignacion=hoy - timedelta(days=i), fecha_finalizacion=None, activo=rnd.random() < 0.9,
+        )
+        for i in range(1, n + 1)
+    ]
+    combinadas = [
+        SimpleNamespace(id=i, estado=rnd.choice(ESTADOS), turno=rnd.choice(TURNOS), activo=rnd.random() < 0.9)
+        for i in range(1, n + 1)
+    ]
+    return estados, asignaciones, combinadas
+
+
+def motor_sin_cache():
+    from django.template.backends.django import DjangoTemplates
+
+    config = copy.deepcopy(settings.TEMPLATES[0])
+    config.pop('BACKEND')
+    config['NAME'] = 'sin_cache'
+    config['APP_DIRS'] = False
+    config['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    return DjangoTemplates(config)
+
+
+def medir(variantes, repeticiones):
+    """Mediana en ms de cada variante; se alternan para repartir el ruido de la máquina"""
+    tiempos = {nombre: [] for nombre in variantes}
+    for funcion in variantes.values():
+        funcion()
+    for _ in range(repeticiones):
+        for nombre, funcion in variantes.items():
+            inicio = time.perf_counter()
+            funcion()
+            tiempos[nombre].append((time.perf_counter() - inicio) * 1000)
+    return {nombre: statistics.median(valores) for nombre, valores in tiempos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    configurar()
+    from django.core.paginator import Paginator
+    from django.template import engines
+    from django.test import RequestFactory
+
+    estados, asignaciones, combinadas = filas(args.filas, args.semilla)
+    motor = engines['django']
+
+    antes = motor.from_string(FILA_ANTES)
+    despues = motor.from_string(FILA_DESPUES)
+    contexto = {'filas': combinadas}
+    ms = medir({
+        'antes': lambda: antes.render(contexto),
+        'despues': lambda: despues.render(contexto),
+    }, args.repeticiones)
+    assert antes.render(contexto).split() == despues.render(contexto).split()
+    print(f'== insignias y enlaces de fila ({args.filas} filas)')
+    print(f"   antes   (if/elif):  {ms['antes']:8.3f} ms  ({ms['antes'] * 1000 / args.filas:6.1f} µs/fila)")
+    print(f"   después (filtros):  {ms['despues']:8.3f} ms  ({ms['despues'] * 1000 / args.filas:6.1f} µs/fila)")
+
+    request = RequestFactory().get('/')
+    sin_cache = motor_sin_cache()
+    paginas = {
+        'templatesApp/estados_bus_resultados.html': {'estados': Paginator(estados, args.filas).page(1)},
+        'templatesApp/asignaciones_bus_resultados.html': {
+            'asignaciones': Paginator(asignaciones, args.filas).page(1),
+        },
+    }
+    for plantilla, contexto in paginas.items():
+        ms = medir({
+            'sin_cache': lambda: sin_cache.get_template(plantilla).render(contexto, request),
+            'con_cache': lambda: motor.get_template(plantilla).render(contexto, request),
+        }, args.repeticiones)
+        print(f'== {plantilla} ({args.filas} filas)')
+        print(f"   loaders sin caché:  {ms['sin_cache']:8.3f} ms")
+        print(f"   loader con caché:   {ms['con_cache']:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,8 +12,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-import pymysql
-pymysql.install_as_MySQLdb()
+
+from decouple import config
+
+from templatesApp.basedatos import base_de_datos, cache_de_entorno, cargar_driver, replicas_de_lectura
+
+# mysqlclient si está instalado; si no, PyMySQL
+DRIVER_MYSQL = cargar_driver()
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +56,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'templatesApp.consultas.ConsultasMiddleware',
+    'templatesApp.replicas.ReplicasMiddleware',
 ]
 
 ROOT_URLCONF = 'projectoFrontEnd.urls'
@@ -58,13 +66,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Cada plantilla se compila una sola vez por proceso y se reutiliza
+            # (en desarrollo, runserver vacía la caché al modificar una plantilla)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -75,16 +90,48 @@ WSGI_APPLICATION = 'projectoFrontEnd.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexión, conexiones persistentes y pool según las variables DB_* del
+# entorno o de .env (templatesApp/basedatos.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'projectoFrontEnd', 
-        'USER': 'root',
-        'PASSWORD': '1234',
-        'HOST': 'localhost',
-        'PORT': '3306',
-    }
+    'default': base_de_datos(),
+}
+
+# Réplicas de lectura (DB_REPLICAS) y su peso en la rotación: las vistas con
+# @lectura_replica leen de ellas (templatesApp/replicas.py)
+_replicas, REPLICAS_LECTURA = replicas_de_lectura(DATABASES['default'])
+DATABASES.update(_replicas)
+DATABASE_ROUTERS = ['templatesApp.replicas.RouterReplicas'] if REPLICAS_LECTURA else []
+
+# Segundos que, tras escribir, una sesión lee de la primaria (retraso máximo
+# esperado de la replicación)
+REPLICAS_RETRASO = config('DB_REPLICAS_RETRASO', default=10, cast=int)
+
+# Caché compartida por los procesos (CACHE_MOTOR: redis, memcached o bd): las
+# versiones de los detalles, el dashboard y las facetas se invalidan en ella al
+# escribir. Con 'local' (LocMemCache, un solo proceso) esas entradas vencen a
+# los CACHE_LOCAL_TIMEOUT segundos, porque otros procesos no ven la invalidación.
+CACHES = {
+    'default': cache_de_entorno(),
 }
+CACHE_LOCAL_TIMEOUT = config('CACHE_LOCAL_TIMEOUT', default=30, cast=int)
+
+# Búsqueda de los listados: 'auto' usa FULLTEXT en MySQL y el índice de
+# n-gramas (tabla TerminoBusqueda) en otros motores. Ver templatesApp/search.py
+SEARCH_BACKEND = 'auto'
+
+# Instrumentación de consultas por petición (templatesApp/consultas.py): una
+# consulta repetida este número de veces se informa como N+1, y en modo
+# estricto (tests) exceder el presupuesto de una vista lanza una excepción.
+CONSULTAS_UMBRAL_N_MAS_1 = 5
+CONSULTAS_ESTRICTO = False
+
+# Segundos que se guardan en caché los conteos por faceta de cada búsqueda en
+# los listados (templatesApp/facetas.py)
+FACETAS_TIMEOUT = 60
+
+# Segundos que se guarda en caché cada página de detalle renderizada; se
+# invalida antes al modificar el objeto o sus relacionados (templatesApp/cache_detalle.py)
+DETALLE_TIMEOUT = 300
 
 
 # Password validation
@@ -123,6 +170,18 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Destino de collectstatic (python manage.py construir_estaticos)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Nombres con hash, CSS minificado y variantes .gz/.br/WebP (templatesApp/estaticos.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'templatesApp.estaticos.AlmacenEstaticos'},
+}
+
+# Sin nginx/Apache delante, Django sirve STATIC_ROOT con caché de un año para
+# los nombres con hash y la variante comprimida que acepte el navegador
+SERVIR_ESTATICOS = False
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
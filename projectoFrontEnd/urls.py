@@ -1,8 +1,12 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from templatesApp import estaticos
+
 urlpatterns = [
     # Panel de administración
     path('admin/', admin.site.urls),
@@ -11,6 +15,10 @@ urlpatterns = [
     path('', include('templatesApp.urls')),
 ]
 
+# Archivos de collectstatic en producción, cuando no hay un servidor web delante
+if settings.SERVIR_ESTATICOS and not settings.DEBUG:
+    urlpatterns.insert(0, re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<ruta>.+)$', estaticos.servir))
+
 # Servir archivos estáticos y media en desarrollo
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
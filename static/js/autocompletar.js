@@ -0,0 +1,96 @@
+// Convierte los <select data-autocomplete-url> en un buscador con resultados
+// paginados desde los endpoints JSON de autocompletado.
+(function () {
+    'use strict';
+
+    function iniciar(select) {
+        var url = select.dataset.autocompleteUrl;
+        var contenedor = document.createElement('div');
+        contenedor.className = 'position-relative mb-1';
+
+        var entrada = document.createElement('input');
+        entrada.type = 'search';
+        entrada.className = 'form-control';
+        entrada.placeholder = 'Escriba para buscar...';
+        entrada.autocomplete = 'off';
+
+        var lista = document.createElement('div');
+        lista.className = 'list-group position-absolute w-100 shadow-sm';
+        lista.style.zIndex = 1000;
+        lista.style.maxHeight = '260px';
+        lista.style.overflowY = 'auto';
+
+        contenedor.appendChild(entrada);
+        contenedor.appendChild(lista);
+        select.parentNode.insertBefore(contenedor, select);
+
+        var siguiente = null;
+        var temporizador = null;
+
+        function elegir(id, texto) {
+            var opcion = select.querySelector('option[value="' + id + '"]');
+            if (!opcion) {
+                opcion = new Option(texto, id);
+                select.appendChild(opcion);
+            }
+            select.value = id;
+            select.dispatchEvent(new Event('change'));
+            entrada.value = '';
+            lista.innerHTML = '';
+        }
+
+        function cargar(reiniciar) {
+            var params = new URLSearchParams({ q: entrada.value.trim() });
+            if (!reiniciar && siguiente) {
+                params.set('cursor', siguiente);
+            }
+            fetch(url + (url.indexOf('?') === -1 ? '?' : '&') + params.toString(), { credentials: 'same-origin' })
+                .then(function (respuesta) { return respuesta.json(); })
+                .then(function (datos) {
+                    if (reiniciar) {
+                        lista.innerHTML = '';
+                    }
+                    var mas = lista.querySelector('.autocompletar-mas');
+                    if (mas) {
+                        mas.remove();
+                    }
+                    datos.results.forEach(function (item) {
+                        var boton = document.createElement('button');
+                        boton.type = 'button';
+                        boton.className = 'list-group-item list-group-item-action';
+                        boton.textContent = item.text;
+                        boton.addEventListener('click', function () { elegir(item.id, item.text); });
+                        lista.appendChild(boton);
+                    });
+                    siguiente = datos.next;
+                    if (siguiente) {
+                        var botonMas = document.createElement('button');
+                        botonMas.type = 'button';
+                        botonMas.className = 'list-group-item list-group-item-light text-center autocompletar-mas';
+                        botonMas.textContent = 'Ver más resultados';
+                        botonMas.addEventListener('click', function () { cargar(false); });
+                        lista.appendChild(botonMas);
+                    }
+                });
+        }
+
+        entrada.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () { cargar(true); }, 250);
+        });
+        entrada.addEventListener('focus', function () {
+            if (!lista.children.length) {
+                cargar(true);
+            }
+        });
+        document.addEventListener('click', function (evento) {
+            if (!contenedor.contains(evento.target)) {
+                lista.innerHTML = '';
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(iniciar);
+    });
+})();
@@ -0,0 +1,113 @@
+// Actualiza los resultados y las facetas de un listado sin recargar la página:
+// al buscar, filtrar o paginar pide la misma URL con la cabecera X-Fragmento y
+// reemplaza #resultados y #facetas con los de la respuesta parcial.
+(function () {
+    'use strict';
+
+    var formulario = document.querySelector('.search-box form');
+    if (!document.getElementById('resultados')) {
+        return;
+    }
+
+    var controlador = null;
+    var temporizador = null;
+
+    function reemplazar(html) {
+        var plantilla = document.createElement('template');
+        plantilla.innerHTML = html;
+        ['facetas', 'resultados'].forEach(function (id) {
+            var nuevo = plantilla.content.getElementById(id);
+            var actual = document.getElementById(id);
+            if (nuevo && actual) {
+                actual.replaceWith(nuevo);
+            }
+        });
+        document.dispatchEvent(new CustomEvent('listado:actualizado'));
+    }
+
+    function cargar(url, guardarHistorial) {
+        if (controlador) {
+            controlador.abort();
+        }
+        controlador = new AbortController();
+        fetch(url, {
+            credentials: 'same-origin',
+            headers: { 'X-Fragmento': '1' },
+            signal: controlador.signal
+        })
+            .then(function (respuesta) {
+                // Sesión vencida (redirige al login) o error: navegación normal
+                if (!respuesta.ok || respuesta.redirected) {
+                    throw new Error(respuesta.status);
+                }
+                return respuesta.text();
+            })
+            .then(function (html) {
+                if (guardarHistorial) {
+                    history.pushState(null, '', url);
+                }
+                reemplazar(html);
+            })
+            .catch(function (error) {
+                if (error.name !== 'AbortError') {
+                    window.location.href = url;
+                }
+            });
+    }
+
+    function urlFormulario() {
+        var params = new URLSearchParams();
+        new FormData(formulario).forEach(function (valor, campo) {
+            if (valor) {
+                params.append(campo, valor);
+            }
+        });
+        var query = params.toString();
+        return window.location.pathname + (query ? '?' + query : '');
+    }
+
+    if (formulario) {
+        formulario.addEventListener('submit', function (evento) {
+            evento.preventDefault();
+            cargar(urlFormulario(), true);
+        });
+        formulario.addEventListener('change', function (evento) {
+            if (evento.target.tagName === 'SELECT') {
+                cargar(urlFormulario(), true);
+            }
+        });
+        formulario.addEventListener('input', function (evento) {
+            if (evento.target.name !== 'search') {
+                return;
+            }
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () {
+                cargar(urlFormulario(), true);
+            }, 300);
+        });
+    }
+
+    // Enlaces de paginación y facetas (?page=..., ?cursor=..., ?estado=...);
+    // las exportaciones descargan un archivo y se dejan pasar
+    document.addEventListener('click', function (evento) {
+        var enlace = evento.target.closest('#resultados a[href^="?"], #facetas a[href^="?"]');
+        if (!enlace || enlace.href.indexOf('exportar=') !== -1 || evento.ctrlKey || evento.metaKey) {
+            return;
+        }
+        evento.preventDefault();
+        cargar(enlace.href, true);
+    });
+
+    // Atrás/adelante: los filtros del formulario vuelven a los de la URL
+    window.addEventListener('popstate', function () {
+        if (formulario) {
+            var params = new URLSearchParams(window.location.search);
+            Array.prototype.forEach.call(formulario.elements, function (campo) {
+                if (campo.name) {
+                    campo.value = params.get(campo.name) || '';
+                }
+            });
+        }
+        cargar(window.location.href, false);
+    });
+})();
@@ -1,11 +1,38 @@
 from django.contrib import admin
+from django.db.models import F
 from django.utils.html import format_html
-from .models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus
+from .cache_detalle import invalidar_asignaciones, renovar
+from .insignias import INSIGNIAS_ADMIN_ACTIVO, INSIGNIAS_ADMIN_ASIGNACION, insignia_admin_estado
+from .models import Trabajador, Rol, Bus, EstadoBus, HistorialEstadoBus, AsignacionRol, AsignacionBus
+from .stats import invalidar_dashboard_stats
+
+
+def _cambiar_activo(queryset, activo):
+    """
+    Activa o desactiva con un UPDATE las filas del queryset. Como no hay
+    post_save, recalcula los contadores (asignaciones) e invalida los detalles.
+    """
+    ids = list(queryset.values_list('pk', flat=True))
+    updated = queryset.model._default_manager.filter(pk__in=ids).update(activo=activo)
+    if queryset.model in (AsignacionRol, AsignacionBus):
+        queryset.model.recalcular_contadores(ids=ids)
+        invalidar_asignaciones(queryset.model, ids)
+    else:
+        renovar([(queryset.model, pk) for pk in ids])
+    invalidar_dashboard_stats()
+    return updated
+
+
+def _contador_badge(total):
+    return format_html(
+        '<span style="background-color: #007bff; color: white; padding: 3px 8px; border-radius: 50%;">{}</span>',
+        total
+    )
 
 
 @admin.register(Trabajador)
 class TrabajadorAdmin(admin.ModelAdmin):
-    list_display = ('nombre_completo', 'edad', 'contacto', 'estado_badge', 'fecha_registro')
+    list_display = ('nombre_completo', 'edad', 'contacto', 'estado_badge', 'asignaciones_activas', 'fecha_registro')
     list_filter = ('activo', 'edad', 'fecha_registro')
     search_fields = ('nombre', 'apellido', 'contacto', 'direccion')
     ordering = ('apellido', 'nombre')
@@ -41,22 +68,21 @@ class TrabajadorAdmin(admin.ModelAdmin):
     nombre_completo.admin_order_field = 'apellido'
     
     def estado_badge(self, obj):
-        if obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; border-radius: 3px;">Activo</span>'
-            )
-        return format_html(
-            '<span style="background-color: #dc3545; color: white; padding: 3px 10px; border-radius: 3px;">Inactivo</span>'
-        )
+        return INSIGNIAS_ADMIN_ACTIVO[obj.activo]
     estado_badge.short_description = 'Estado'
     
+    def asignaciones_activas(self, obj):
+        return _contador_badge(obj.cantidad_asignaciones_activas())
+    asignaciones_activas.short_description = 'Asignaciones Activas'
+    asignaciones_activas.admin_order_field = F('roles_activos') + F('buses_activos')
+    
     def activar_trabajadores(self, request, queryset):
-        updated = queryset.update(activo=True)
+        updated = _cambiar_activo(queryset, True)
         self.message_user(request, f'{updated} trabajadores activados exitosamente.')
     activar_trabajadores.short_description = 'Activar trabajadores seleccionados'
     
     def desactivar_trabajadores(self, request, queryset):
-        updated = queryset.update(activo=False)
+        updated = _cambiar_activo(queryset, False)
         self.message_user(request, f'{updated} trabajadores desactivados exitosamente.')
     desactivar_trabajadores.short_description = 'Desactivar trabajadores seleccionados'
 
@@ -89,38 +115,32 @@ class RolAdmin(admin.ModelAdmin):
     actions = ['activar_roles', 'desactivar_roles']
     
     def estado_badge(self, obj):
-        if obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; border-radius: 3px;">Activo</span>'
-            )
-        return format_html(
-            '<span style="background-color: #dc3545; color: white; padding: 3px 10px; border-radius: 3px;">Inactivo</span>'
-        )
+        return INSIGNIAS_ADMIN_ACTIVO[obj.activo]
     estado_badge.short_description = 'Estado'
     
     def cantidad_asignaciones(self, obj):
-        count = obj.cantidad_asignaciones_activas()
-        return format_html(
-            '<span style="background-color: #007bff; color: white; padding: 3px 8px; border-radius: 50%;">{}</span>',
-            count
-        )
+        return _contador_badge(obj.asignaciones_activas)
     cantidad_asignaciones.short_description = 'Asignaciones Activas'
+    cantidad_asignaciones.admin_order_field = 'asignaciones_activas'
     
     def activar_roles(self, request, queryset):
-        updated = queryset.update(activo=True)
+        updated = _cambiar_activo(queryset, True)
         self.message_user(request, f'{updated} roles activados exitosamente.')
     activar_roles.short_description = 'Activar roles seleccionados'
     
     def desactivar_roles(self, request, queryset):
-        updated = queryset.update(activo=False)
+        updated = _cambiar_activo(queryset, False)
         self.message_user(request, f'{updated} roles desactivados exitosamente.')
     desactivar_roles.short_description = 'Desactivar roles seleccionados'
 
 
 @admin.register(Bus)
 class BusAdmin(admin.ModelAdmin):
-    list_display = ('patente', 'marca', 'modelo', 'año', 'capacidad', 'estado_badge', 'fecha_registro')
-    list_filter = ('activo', 'año', 'marca', 'fecha_registro')
+    list_display = (
+        'patente', 'marca', 'modelo', 'año', 'capacidad', 'estado_badge', 'estado_actual',
+        'asignaciones_activas', 'fecha_registro'
+    )
+    list_filter = ('activo', 'estado_actual', 'año', 'marca', 'fecha_registro')
     search_fields = ('patente', 'modelo', 'marca')
     ordering = ('patente',)
     date_hierarchy = 'fecha_registro'
@@ -149,22 +169,21 @@ class BusAdmin(admin.ModelAdmin):
     actions = ['activar_buses', 'desactivar_buses']
     
     def estado_badge(self, obj):
-        if obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; border-radius: 3px;">Activo</span>'
-            )
-        return format_html(
-            '<span style="background-color: #dc3545; color: white; padding: 3px 10px; border-radius: 3px;">Inactivo</span>'
-        )
+        return INSIGNIAS_ADMIN_ACTIVO[obj.activo]
     estado_badge.short_description = 'Estado'
     
+    def asignaciones_activas(self, obj):
+        return _contador_badge(obj.conductores_activos)
+    asignaciones_activas.short_description = 'Asignaciones Activas'
+    asignaciones_activas.admin_order_field = 'conductores_activos'
+    
     def activar_buses(self, request, queryset):
-        updated = queryset.update(activo=True)
+        updated = _cambiar_activo(queryset, True)
         self.message_user(request, f'{updated} buses activados exitosamente.')
     activar_buses.short_description = 'Activar buses seleccionados'
     
     def desactivar_buses(self, request, queryset):
-        updated = queryset.update(activo=False)
+        updated = _cambiar_activo(queryset, False)
         self.message_user(request, f'{updated} buses desactivados exitosamente.')
     desactivar_buses.short_description = 'Desactivar buses seleccionados'
 
@@ -173,6 +192,7 @@ class BusAdmin(admin.ModelAdmin):
 class EstadoBusAdmin(admin.ModelAdmin):
     list_display = ('bus', 'estado_badge', 'kilometraje', 'fecha_cambio')
     list_filter = ('estado', 'fecha_cambio')
+    list_select_related = ('bus',)
     search_fields = ('bus__patente', 'bus__modelo', 'observaciones')
     ordering = ('-fecha_cambio',)
     date_hierarchy = 'fecha_cambio'
@@ -198,26 +218,39 @@ class EstadoBusAdmin(admin.ModelAdmin):
     readonly_fields = ('fecha_cambio',)
     
     def estado_badge(self, obj):
-        colores = {
-            'OPERATIVO': '#28a745',
-            'MANTENIMIENTO': '#ffc107',
-            'REPARACION': '#fd7e14',
-            'FUERA_SERVICIO': '#dc3545',
-            'RESERVADO': '#17a2b8',
-        }
-        color = colores.get(obj.estado, '#6c757d')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
-            color,
-            obj.get_estado_display()
-        )
+        return insignia_admin_estado(obj)
     estado_badge.short_description = 'Estado'
 
 
+@admin.register(HistorialEstadoBus)
+class HistorialEstadoBusAdmin(admin.ModelAdmin):
+    list_display = ('bus', 'estado', 'kilometraje', 'vigente_desde', 'vigente_hasta')
+    list_filter = ('estado', 'vigente_desde')
+    list_select_related = ('bus',)
+    search_fields = ('bus__patente',)
+    ordering = ('-vigente_desde', '-id')
+    date_hierarchy = 'vigente_desde'
+    list_per_page = 20
+    # Sin "eliminar seleccionados": el historial es de solo agregar
+    actions = None
+
+    # El historial solo se escribe desde EstadoBus; borrar un evento dejaría
+    # intervalos sin cubrir en estado_en()/vigentes_entre()
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(AsignacionRol)
 class AsignacionRolAdmin(admin.ModelAdmin):
     list_display = ('trabajador', 'rol', 'fecha_asignacion', 'fecha_finalizacion', 'estado_badge')
     list_filter = ('activo', 'fecha_asignacion', 'fecha_finalizacion')
+    list_select_related = ('trabajador', 'rol')
     search_fields = ('trabajador__nombre', 'trabajador__apellido', 'rol__nombre')
     ordering = ('-fecha_asignacion',)
     date_hierarchy = 'fecha_asignacion'
@@ -244,32 +277,22 @@ class AsignacionRolAdmin(admin.ModelAdmin):
     actions = ['activar_asignaciones', 'desactivar_asignaciones', 'finalizar_asignaciones']
     
     def estado_badge(self, obj):
-        if obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; border-radius: 3px;">Activa</span>'
-            )
-        return format_html(
-            '<span style="background-color: #6c757d; color: white; padding: 3px 10px; border-radius: 3px;">Finalizada</span>'
-        )
+        return INSIGNIAS_ADMIN_ASIGNACION[obj.activo]
     estado_badge.short_description = 'Estado'
     
     def activar_asignaciones(self, request, queryset):
-        updated = queryset.update(activo=True)
+        updated = _cambiar_activo(queryset, True)
         self.message_user(request, f'{updated} asignaciones activadas exitosamente.')
     activar_asignaciones.short_description = 'Activar asignaciones seleccionadas'
     
     def desactivar_asignaciones(self, request, queryset):
-        updated = queryset.update(activo=False)
+        updated = _cambiar_activo(queryset, False)
         self.message_user(request, f'{updated} asignaciones desactivadas exitosamente.')
     desactivar_asignaciones.short_description = 'Desactivar asignaciones seleccionadas'
     
     def finalizar_asignaciones(self, request, queryset):
-        from django.utils import timezone
-        count = 0
-        for obj in queryset.filter(activo=True):
-            obj.finalizar_asignacion()
-            count += 1
-        self.message_user(request, f'{count} asignaciones finalizadas exitosamente.')
+        ids = queryset.finalizar(usuario=request.user)
+        self.message_user(request, f'{len(ids)} asignaciones finalizadas exitosamente.')
     finalizar_asignaciones.short_description = 'Finalizar asignaciones seleccionadas'
 
 
@@ -277,6 +300,7 @@ class AsignacionRolAdmin(admin.ModelAdmin):
 class AsignacionBusAdmin(admin.ModelAdmin):
     list_display = ('trabajador', 'bus', 'turno', 'fecha_asignacion', 'fecha_finalizacion', 'estado_badge')
     list_filter = ('activo', 'turno', 'fecha_asignacion', 'fecha_finalizacion')
+    list_select_related = ('trabajador', 'bus')
     search_fields = ('trabajador__nombre', 'trabajador__apellido', 'bus__patente')
     ordering = ('-fecha_asignacion',)
     date_hierarchy = 'fecha_asignacion'
@@ -303,32 +327,22 @@ class AsignacionBusAdmin(admin.ModelAdmin):
     actions = ['activar_asignaciones', 'desactivar_asignaciones', 'finalizar_asignaciones']
     
     def estado_badge(self, obj):
-        if obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; border-radius: 3px;">Activa</span>'
-            )
-        return format_html(
-            '<span style="background-color: #6c757d; color: white; padding: 3px 10px; border-radius: 3px;">Finalizada</span>'
-        )
+        return INSIGNIAS_ADMIN_ASIGNACION[obj.activo]
     estado_badge.short_description = 'Estado'
     
     def activar_asignaciones(self, request, queryset):
-        updated = queryset.update(activo=True)
+        updated = _cambiar_activo(queryset, True)
         self.message_user(request, f'{updated} asignaciones activadas exitosamente.')
     activar_asignaciones.short_description = 'Activar asignaciones seleccionadas'
     
     def desactivar_asignaciones(self, request, queryset):
-        updated = queryset.update(activo=False)
+        updated = _cambiar_activo(queryset, False)
         self.message_user(request, f'{updated} asignaciones desactivadas exitosamente.')
     desactivar_asignaciones.short_description = 'Desactivar asignaciones seleccionadas'
     
     def finalizar_asignaciones(self, request, queryset):
-        from django.utils import timezone
-        count = 0
-        for obj in queryset.filter(activo=True):
-            obj.finalizar_asignacion()
-            count += 1
-        self.message_user(request, f'{count} asignaciones finalizadas exitosamente.')
+        ids = queryset.finalizar(usuario=request.user)
+        self.message_user(request, f'{len(ids)} asignaciones finalizadas exitosamente.')
     finalizar_asignaciones.short_description = 'Finalizar asignaciones seleccionadas'
 
 
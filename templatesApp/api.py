@@ -0,0 +1,243 @@
+"""
+API JSON de solo lectura para los listados (consumida por las herramientas de despacho).
+
+Cada recurso declara sus campos, el orden total usado para paginar por cursor y
+los objetos relacionados que se pueden incluir. Las filas se leen con ``values()``
+y se serializan tal cual, sin instanciar modelos:
+
+- ``?campos=id,nombre``: solo esos campos (el ``id`` siempre se incluye).
+- ``?incluir=trabajador,rol``: objetos relacionados. Las claves foráneas se leen
+  con JOIN en la misma consulta; las colecciones (p.ej. las asignaciones activas
+  de un trabajador) con una consulta por colección para toda la página.
+- ``?ids=1,2,3``: esas filas, en una sola consulta y sin paginar.
+- ``?cursor=``/``?limite=``: paginación por clave (``siguiente``/``anterior``);
+  ``?total=1`` agrega el total.
+
+Los filtros son los mismos de los listados HTML (``search``, ``estado``, ...) y
+los aplica la vista antes de llamar a ``responder``.
+"""
+from dataclasses import dataclass
+
+from django.http import JsonResponse
+
+from .models import AsignacionRol, AsignacionBus
+from .pagination import CursorInvalido, KeysetPaginator
+
+
+POR_PAGINA = 50
+LIMITE_MAXIMO = 200
+
+
+class ParametroInvalido(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Coleccion:
+    """Filas de ``modelo`` que apuntan al objeto por ``clave`` (relación inversa)"""
+    modelo: type
+    clave: str
+    # (lookup para values, nombre en la respuesta)
+    campos: tuple
+    filtro: tuple = ()
+
+
+@dataclass(frozen=True)
+class Recurso:
+    campos: tuple
+    # Orden total para la paginación por cursor (como en paginar())
+    orden: tuple
+    # (nombre de la clave foránea, campos del objeto relacionado)
+    incluidos: tuple = ()
+    # (nombre, Coleccion)
+    colecciones: tuple = ()
+
+    def relaciones(self):
+        return [nombre for nombre, _ in self.incluidos + self.colecciones]
+
+
+_ASIGNACION_ACTIVA = (('activo', True),)
+
+TRABAJADORES = Recurso(
+    campos=(
+        'id', 'nombre', 'apellido', 'direccion', 'contacto', 'edad', 'activo',
+        'roles_activos', 'buses_activos', 'fecha_registro',
+    ),
+    orden=('apellido', 'nombre', 'id'),
+    colecciones=(
+        ('roles', Coleccion(AsignacionRol, 'trabajador_id', (
+            ('id', 'id'), ('rol_id', 'rol_id'), ('rol__nombre', 'rol'),
+            ('fecha_asignacion', 'fecha_asignacion'),
+        ), _ASIGNACION_ACTIVA)),
+        ('buses', Coleccion(AsignacionBus, 'trabajador_id', (
+            ('id', 'id'), ('bus_id', 'bus_id'), ('bus__patente', 'patente'), ('turno', 'turno'),
+            ('fecha_asignacion', 'fecha_asignacion'),
+        ), _ASIGNACION_ACTIVA)),
+    ),
+)
+
+ROLES = Recurso(
+    campos=(
+        'id', 'nombre', 'descripcion', 'nivel_acceso', 'activo', 'asignaciones_activas',
+        'fecha_creacion',
+    ),
+    orden=('nombre', 'id'),
+    colecciones=(
+        ('trabajadores', Coleccion(AsignacionRol, 'rol_id', (
+            ('id', 'id'), ('trabajador_id', 'trabajador_id'),
+            ('trabajador__nombre', 'nombre'), ('trabajador__apellido', 'apellido'),
+        ), _ASIGNACION_ACTIVA)),
+    ),
+)
+
+BUSES = Recurso(
+    campos=(
+        'id', 'patente', 'modelo', 'año', 'capacidad', 'marca', 'activo', 'estado_actual',
+        'kilometraje_actual', 'conductores_activos', 'fecha_registro',
+    ),
+    orden=('patente',),
+    colecciones=(
+        ('conductores', Coleccion(AsignacionBus, 'bus_id', (
+            ('id', 'id'), ('trabajador_id', 'trabajador_id'),
+            ('trabajador__nombre', 'nombre'), ('trabajador__apellido', 'apellido'), ('turno', 'turno'),
+        ), _ASIGNACION_ACTIVA)),
+    ),
+)
+
+ESTADOS_BUS = Recurso(
+    campos=('id', 'bus_id', 'estado', 'kilometraje', 'observaciones', 'fecha_cambio'),
+    orden=('-fecha_cambio', 'id'),
+    incluidos=(('bus', ('patente', 'modelo', 'marca')),),
+)
+
+ASIGNACIONES_ROL = Recurso(
+    campos=(
+        'id', 'trabajador_id', 'rol_id', 'fecha_asignacion', 'fecha_finalizacion', 'activo', 'notas',
+    ),
+    orden=('-fecha_asignacion', 'id'),
+    incluidos=(('trabajador', ('nombre', 'apellido')), ('rol', ('nombre', 'nivel_acceso'))),
+)
+
+ASIGNACIONES_BUS = Recurso(
+    campos=(
+        'id', 'trabajador_id', 'bus_id', 'turno', 'fecha_asignacion', 'fecha_finalizacion',
+        'activo', 'notas',
+    ),
+    orden=('-fecha_asignacion', 'id'),
+    incluidos=(('trabajador', ('nombre', 'apellido')), ('bus', ('patente', 'modelo'))),
+)
+
+
+def _lista(request, parametro):
+    valor = request.GET.get(parametro, '')
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+
+def _elegidos(request, parametro, disponibles):
+    """Valores de ?parametro=a,b validados contra los disponibles (todos si no viene)"""
+    elegidos = _lista(request, parametro)
+    desconocidos = [valor for valor in elegidos if valor not in disponibles]
+    if desconocidos:
+        raise ParametroInvalido(
+            f'{parametro}: {", ".join(desconocidos)} no existe; opciones: {", ".join(disponibles)}'
+        )
+    return list(dict.fromkeys(elegidos))
+
+
+def _ids(request):
+    try:
+        ids = [int(pk) for pk in _lista(request, 'ids')]
+    except ValueError:
+        raise ParametroInvalido('ids: deben ser números separados por comas')
+    if len(ids) > LIMITE_MAXIMO:
+        raise ParametroInvalido(f'ids: máximo {LIMITE_MAXIMO} por petición')
+    return ids
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limite', POR_PAGINA))
+    except ValueError:
+        raise ParametroInvalido('limite: debe ser un número')
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _agregar_colecciones(filas, recurso, incluir, using):
+    """Una consulta por colección incluida para todas las filas de la página"""
+    ids = [fila['id'] for fila in filas]
+    for nombre, coleccion in recurso.colecciones:
+        if nombre not in incluir:
+            continue
+        por_objeto = {pk: [] for pk in ids}
+        if ids:
+            relacionadas = (
+                coleccion.modelo._default_manager.using(using)
+                .filter(**{f'{coleccion.clave}__in': ids}, **dict(coleccion.filtro))
+                .order_by(coleccion.clave, 'pk')
+                .values_list(coleccion.clave, *(lookup for lookup, _ in coleccion.campos))
+            )
+            for clave, *valores in relacionadas:
+                por_objeto[clave].append(
+                    {salida: valor for (_, salida), valor in zip(coleccion.campos, valores)}
+                )
+        for fila in filas:
+            fila[nombre] = por_objeto[fila['id']]
+
+
+def responder(request, queryset, recurso):
+    """Respuesta JSON con las filas del queryset (ya filtrado) según los parámetros de la API"""
+    try:
+        campos = _elegidos(request, 'campos', recurso.campos) or list(recurso.campos)
+        incluir = _elegidos(request, 'incluir', recurso.relaciones())
+        ids = _ids(request)
+        limite = _limite(request)
+    except ParametroInvalido as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if 'id' not in campos:
+        campos.insert(0, 'id')
+    campos_orden = [o.lstrip('-') for o in recurso.orden]
+    lookups = campos + [campo for campo in campos_orden if campo not in campos]
+    incluidos = {
+        f'{nombre}__{campo}': (nombre, campo)
+        for nombre, campos_incluidos in recurso.incluidos if nombre in incluir
+        for campo in ('id',) + campos_incluidos
+    }
+    filas_qs = queryset.values(*lookups, *incluidos)
+
+    respuesta = {}
+    if ids:
+        filas = list(filas_qs.filter(pk__in=ids).order_by(*recurso.orden))
+    else:
+        paginator = KeysetPaginator(filas_qs, limite, recurso.orden, contar=request.GET.get('total') == '1')
+        try:
+            pagina = paginator.page(request.GET.get('cursor'))
+        except CursorInvalido:
+            return JsonResponse({'error': 'Cursor inválido'}, status=400)
+        filas = pagina.object_list
+        respuesta['siguiente'] = _enlace(request, pagina.next_cursor)
+        respuesta['anterior'] = _enlace(request, pagina.previous_cursor)
+        if paginator.contar:
+            respuesta['total'] = paginator.count
+
+    resultados = []
+    for fila in filas:
+        resultado = {campo: fila[campo] for campo in campos}
+        for nombre, _ in recurso.incluidos:
+            if nombre in incluir:
+                resultado[nombre] = {
+                    campo: fila[lookup] for lookup, (relacion, campo) in incluidos.items()
+                    if relacion == nombre
+                }
+        resultados.append(resultado)
+    _agregar_colecciones(resultados, recurso, incluir, queryset.db)
+
+    return JsonResponse({'resultados': resultados, **respuesta})
+
+
+def _enlace(request, cursor):
+    if not cursor:
+        return None
+    parametros = request.GET.copy()
+    parametros['cursor'] = cursor
+    return f'{request.path}?{parametros.urlencode()}'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TemplatesappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'templatesApp'
+
+    def ready(self):
+        from .signals import conectar_senales
+        conectar_senales()
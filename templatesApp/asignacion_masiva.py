@@ -0,0 +1,248 @@
+"""
+Carga masiva de asignaciones de buses (plan de turnos) en una sola petición.
+
+En vez de validar fila por fila como el formulario (una consulta por
+duplicado y otra por el estado del bus), las filas se validan por conjuntos:
+por cada lote, una consulta trae los trabajadores, otra los buses (activo y
+estado operativo, proyectado en Bus) y otras dos las asignaciones de esos
+trabajadores y buses que ya ocupan la combinación (trabajador, bus, turno) de
+``unique_active_bus_asignacion`` o el turno del trabajador o del bus
+(conflictos.py). Las válidas se insertan con bulk_create.
+
+Por defecto la carga es todo o nada: con cualquier error no se inserta ninguna
+fila. Con ``parcial=True`` se insertan las válidas y se informan los errores.
+"""
+from datetime import date
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+
+from .cache_detalle import renovar
+from .conflictos import ocupa, ocupan
+from .importacion import ResultadoImportacion
+from .models import Trabajador, Bus, AsignacionBus, ESTADOS_BUS
+from .stats import invalidar_dashboard_stats
+
+
+TAMANO_LOTE = 1000
+MAXIMO_FILAS = 10000
+
+TURNOS = dict(AsignacionBus.TURNO_CHOICES)
+ETIQUETAS_ESTADO = dict(ESTADOS_BUS)
+
+
+class ErrorCarga(Exception):
+    pass
+
+
+class ConflictoCarga(ErrorCarga):
+    """Una escritura concurrente violó la unicidad al insertar: se puede reintentar"""
+
+
+def _entero(valor):
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str):
+        valor = valor.strip()
+        # isdigit() también acepta '²' o dígitos no ASCII, que int() rechaza o no se esperan
+        if valor.isascii() and valor.isdigit():
+            return int(valor)
+    return None
+
+
+def _lotes(valores, tamano):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+class CargaAsignacionesBus:
+    def __init__(self, parcial=False, tamano_lote=TAMANO_LOTE, maximo_filas=MAXIMO_FILAS):
+        self.parcial = parcial
+        self.tamano_lote = tamano_lote
+        self.maximo_filas = maximo_filas
+
+    def cargar(self, filas):
+        """Valida e inserta las filas (diccionarios); retorna un ResultadoImportacion"""
+        if not isinstance(filas, list):
+            raise ErrorCarga('Se esperaba una lista de asignaciones')
+        if len(filas) > self.maximo_filas:
+            raise ErrorCarga(f'Máximo {self.maximo_filas} asignaciones por carga')
+
+        resultado = ResultadoImportacion(procesados=len(filas))
+        candidatas = []
+        for numero, fila in enumerate(filas):
+            datos, errores = self._normalizar(fila)
+            if errores:
+                resultado.agregar_error(numero, errores)
+            else:
+                candidatas.append((numero, datos))
+
+        using = router.db_for_write(AsignacionBus)
+        try:
+            with transaction.atomic(using=using):
+                validas = self._validar(candidatas, resultado, using)
+                if not validas or (resultado.errores and not self.parcial):
+                    return resultado
+                AsignacionBus.objects.using(using).bulk_create(
+                    [AsignacionBus(**datos) for _, datos in validas], batch_size=self.tamano_lote
+                )
+                claves = {
+                    'trabajador': {datos['trabajador_id'] for _, datos in validas},
+                    'bus': {datos['bus_id'] for _, datos in validas},
+                }
+                # bulk_create no pasa por save(): los contadores se recalculan aquí
+                AsignacionBus.recalcular_contadores(using=using, claves=claves)
+        except IntegrityError:
+            raise ConflictoCarga(
+                'Otra operación creó simultáneamente alguna de estas asignaciones; reintente la carga'
+            )
+
+        resultado.creados = len(validas)
+        renovar(
+            [(Trabajador, pk) for pk in claves['trabajador']] +
+            [(Bus, pk) for pk in claves['bus']] +
+            [(AsignacionBus, None)]
+        )
+        invalidar_dashboard_stats()
+        return resultado
+
+    def _normalizar(self, fila):
+        """(datos de la asignación, errores de formato de la fila)"""
+        if not isinstance(fila, dict):
+            return None, {'__all__': ['Cada asignación debe ser un objeto']}
+        errores = {}
+        trabajador_id = _entero(fila.get('trabajador'))
+        if trabajador_id is None:
+            errores['trabajador'] = ['Indique el id del trabajador']
+        bus_id = _entero(fila.get('bus'))
+        if bus_id is None:
+            errores['bus'] = ['Indique el id del bus']
+        turno = fila.get('turno', 'MAÑANA')
+        if not isinstance(turno, str) or turno not in TURNOS:
+            errores['turno'] = [f'Turno inválido; opciones: {", ".join(TURNOS)}']
+        notas = fila.get('notas') or None
+        if notas is not None and not isinstance(notas, str):
+            errores['notas'] = ['Las notas deben ser texto']
+        datos = {'trabajador_id': trabajador_id, 'bus_id': bus_id, 'turno': turno, 'notas': notas}
+        return datos, errores
+
+    def _validar(self, candidatas, resultado, using):
+        """Descarta las filas con trabajador/bus no asignable, duplicadas o en conflicto de turno"""
+        trabajadores = {}
+        buses = {}
+        existentes = set()
+        ids_trabajadores = {datos['trabajador_id'] for _, datos in candidatas}
+        ids_buses = {datos['bus_id'] for _, datos in candidatas}
+
+        for lote in _lotes(ids_trabajadores, self.tamano_lote):
+            trabajadores.update(
+                Trabajador.objects.using(using).filter(pk__in=lote).values_list('pk', 'activo')
+            )
+        for lote in _lotes(ids_buses, self.tamano_lote):
+            # Bloquea los buses hasta el INSERT: dos cargas simultáneas sobre los
+            # mismos buses no pueden validar ambas el mismo duplicado
+            buses.update(
+                (pk, (activo, estado, patente)) for pk, activo, estado, patente in
+                Bus.objects.using(using).select_for_update().filter(pk__in=lote)
+                .values_list('pk', 'activo', 'estado_actual', 'patente')
+            )
+        # Asignaciones que chocan: activas (unique_active_bus_asignacion) o que
+        # ocupan el turno del trabajador o del bus desde hoy (conflictos.py)
+        hoy = date.today()
+        campos = ('trabajador_id', 'bus_id', 'turno', 'activo', 'fecha_asignacion', 'fecha_finalizacion')
+        ocupadas = []
+        for lote in _lotes(ids_trabajadores, self.tamano_lote):
+            ocupadas += AsignacionBus.objects.using(using).filter(
+                Q(activo=True) | ocupan(hoy), trabajador_id__in=lote
+            ).values_list(*campos)
+        for lote in _lotes(ids_buses, self.tamano_lote):
+            ocupadas += AsignacionBus.objects.using(using).filter(
+                ocupan(hoy), bus_id__in=lote
+            ).values_list(*campos)
+        turnos_trabajador = {}
+        turnos_bus = {}
+        for trabajador_id, bus_id, turno, activo, inicio, fin in ocupadas:
+            if activo:
+                existentes.add((trabajador_id, bus_id, turno))
+            if ocupa(activo, inicio, fin, hoy):
+                turnos_trabajador[(trabajador_id, turno)] = bus_id
+                turnos_bus[(bus_id, turno)] = trabajador_id
+
+        validas = []
+        vistas = {}
+        vistas_trabajador = {}
+        vistas_bus = {}
+        for numero, datos in candidatas:
+            errores = {}
+            activo = trabajadores.get(datos['trabajador_id'])
+            if activo is None:
+                errores['trabajador'] = [f'No existe el trabajador {datos["trabajador_id"]}']
+            elif not activo:
+                errores['trabajador'] = ['No se puede asignar un bus a un trabajador inactivo']
+
+            bus = buses.get(datos['bus_id'])
+            if bus is None:
+                errores['bus'] = [f'No existe el bus {datos["bus_id"]}']
+            elif not bus[0]:
+                errores['bus'] = ['No se puede asignar un bus inactivo']
+            elif bus[1] not in (None, 'OPERATIVO'):
+                errores['bus'] = [
+                    f'No se puede asignar el bus {bus[2]} porque está en estado: '
+                    f'{ETIQUETAS_ESTADO.get(bus[1], bus[1])}'
+                ]
+
+            clave = (datos['trabajador_id'], datos['bus_id'], datos['turno'])
+            if not errores:
+                if clave in existentes:
+                    errores['__all__'] = [
+                        f'Ya existe una asignación activa del bus "{bus[2]}" para el trabajador '
+                        f'{datos["trabajador_id"]} en el turno {datos["turno"]}'
+                    ]
+                elif clave in vistas:
+                    errores['__all__'] = [f'Asignación repetida en la carga (fila {vistas[clave]})']
+                else:
+                    errores['__all__'] = self._conflictos(
+                        datos, turnos_trabajador, turnos_bus, vistas_trabajador, vistas_bus
+                    )
+                    if not errores['__all__']:
+                        del errores['__all__']
+
+            if errores:
+                resultado.agregar_error(numero, errores)
+            else:
+                vistas[clave] = numero
+                vistas_trabajador[(datos['trabajador_id'], datos['turno'])] = (numero, datos['bus_id'])
+                vistas_bus[(datos['bus_id'], datos['turno'])] = (numero, datos['trabajador_id'])
+                validas.append((numero, datos))
+        resultado.errores.sort(key=lambda error: error['fila'])
+        return validas
+
+    def _conflictos(self, datos, turnos_trabajador, turnos_bus, vistas_trabajador, vistas_bus):
+        """Mensajes si el trabajador o el bus ya tienen el turno ocupado (en la BD o en la carga)"""
+        trabajador_id, bus_id, turno = datos['trabajador_id'], datos['bus_id'], datos['turno']
+        mensajes = []
+        otro_bus = turnos_trabajador.get((trabajador_id, turno))
+        if otro_bus is not None and otro_bus != bus_id:
+            mensajes.append(
+                f'El trabajador {trabajador_id} ya maneja el bus {otro_bus} en el turno {turno}'
+            )
+        otro_trabajador = turnos_bus.get((bus_id, turno))
+        if otro_trabajador is not None and otro_trabajador != trabajador_id:
+            mensajes.append(
+                f'El bus {bus_id} ya está asignado al trabajador {otro_trabajador} en el turno {turno}'
+            )
+        if (trabajador_id, turno) in vistas_trabajador:
+            fila, otro_bus = vistas_trabajador[(trabajador_id, turno)]
+            mensajes.append(
+                f'El trabajador {trabajador_id} ya recibe el bus {otro_bus} en el turno {turno} (fila {fila})'
+            )
+        if (bus_id, turno) in vistas_bus:
+            fila, otro_trabajador = vistas_bus[(bus_id, turno)]
+            mensajes.append(
+                f'El bus {bus_id} ya se asigna al trabajador {otro_trabajador} en el turno {turno} '
+                f'(fila {fila})'
+            )
+        return mensajes
@@ -0,0 +1,7 @@
+from django.db.backends.mysql import base
+
+from templatesApp.pool import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, base.DatabaseWrapper):
+    """Backend MySQL de Django con pool de conexiones opcional (OPTIONS['pool'])"""
@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3 import base
+
+from templatesApp.pool import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, base.DatabaseWrapper):
+    """
+    Backend SQLite de Django con pool de conexiones opcional (OPTIONS['pool']),
+    para probar el pool sin un servidor MySQL. Las bases en memoria no usan pool.
+    """
+
+    @property
+    def pool(self):
+        if self.is_in_memory_db():
+            return None
+        return super().pool
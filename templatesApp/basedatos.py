@@ -0,0 +1,189 @@
+"""
+Configuración de la base de datos desde el entorno con python-decouple: cada
+variable se lee del entorno o de un archivo ``.env`` junto a manage.py.
+
+    DB_NAME=projectoFrontEnd
+    DB_USER=root
+    DB_PASSWORD=1234
+    DB_HOST=localhost
+    DB_PORT=3306
+    DB_CONN_MAX_AGE=60          # segundos que cada hilo reutiliza su conexión (0: una por petición)
+    DB_CONN_HEALTH_CHECKS=True  # ping antes de reutilizar una conexión en una petición nueva
+    DB_POOL=False               # pool de conexiones compartido por los hilos (templatesApp/pool.py)
+    DB_POOL_TAMANO=5
+    DB_POOL_DESBORDE=10
+    DB_POOL_ESPERA=30
+    DB_REPLICAS=                # réplicas de lectura (templatesApp/replicas.py)
+    DB_REPLICAS_RETRASO=10      # segundos que una sesión lee de la primaria tras escribir
+    CACHE_MOTOR=local           # local, redis, memcached o bd
+    CACHE_UBICACION=            # URL de Redis, host:puerto de Memcached o tabla (bd)
+
+Con el pool activo ``CONN_MAX_AGE`` es 0 por defecto: cada petición devuelve su
+conexión al pool al terminar, en vez de reservarla para su hilo.
+
+``DB_REPLICAS`` lista las réplicas separadas por comas como ``host[:puerto]``,
+con ``*peso`` opcional para repartir las lecturas (``db2*2,db3``); usan el
+resto de la configuración de la primaria y quedan como ``replica1``,
+``replica2``... Con ``DB_MOTOR=sqlite`` (pruebas locales, sin MySQL) ``DB_NAME``
+y cada réplica son archivos, p.ej. ``DB_NAME=primaria.sqlite3`` y
+``DB_REPLICAS=replica.sqlite3`` (ver el comando ``sincronizar_replicas``).
+
+La caché guarda las versiones de los detalles, las estadísticas del dashboard
+y las facetas, que se invalidan al escribir. Con varios procesos (gunicorn,
+uWSGI) debe ser compartida: con ``CACHE_MOTOR=local`` cada proceso tiene la
+suya y no ve las invalidaciones de los demás, así que esas entradas duran como
+mucho ``CACHE_LOCAL_TIMEOUT`` segundos (ver ``timeout_cache``). ``bd`` requiere
+``python manage.py createcachetable``.
+"""
+from pathlib import Path
+
+from decouple import Csv, config
+
+from .pool import DESBORDE, ESPERA, TAMANO
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MOTORES = {
+    'mysql': 'django.db.backends.mysql',
+    'sqlite': 'django.db.backends.sqlite3',
+}
+
+MOTORES_CACHE = {
+    'local': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'bd': 'django.core.cache.backends.db.DatabaseCache',
+}
+
+UBICACIONES_CACHE = {
+    'local': 'templatesApp',
+    'redis': 'redis://127.0.0.1:6379/1',
+    'memcached': '127.0.0.1:11211',
+    'bd': 'templatesapp_cache',
+}
+
+# Backends cuyo contenido no comparten los procesos
+CACHES_LOCALES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+CACHE_LOCAL_TIMEOUT = 30
+
+MOTOR_POOL = {
+    'django.db.backends.mysql': 'templatesApp.backends.mysql',
+    'django.db.backends.sqlite3': 'templatesApp.backends.sqlite3',
+}
+
+
+def cargar_driver():
+    """mysqlclient (en C) si está instalado; si no, PyMySQL instalado como MySQLdb"""
+    try:
+        import MySQLdb  # noqa: F401
+    except ImportError:
+        import pymysql
+        pymysql.install_as_MySQLdb()
+        return 'pymysql'
+    return 'mysqlclient'
+
+
+def con_pool(base, tamano=TAMANO, desborde=DESBORDE, espera=ESPERA):
+    """Copia de la configuración ``base`` con el backend y las opciones del pool"""
+    return {
+        **base,
+        'ENGINE': MOTOR_POOL[base['ENGINE']],
+        'OPTIONS': {
+            **base.get('OPTIONS', {}),
+            'pool': {'tamano': tamano, 'desborde': desborde, 'espera': espera},
+        },
+    }
+
+
+def _archivo(nombre):
+    return str(BASE_DIR / nombre)
+
+
+def base_de_datos():
+    """Entrada de ``DATABASES`` según las variables DB_*"""
+    motor = config('DB_MOTOR', default='mysql')
+    if motor not in MOTORES:
+        raise ValueError(f'DB_MOTOR debe ser uno de: {", ".join(MOTORES)}')
+    pool = config('DB_POOL', default=False, cast=bool)
+    base = {
+        'ENGINE': MOTORES[motor],
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0 if pool else 60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+    }
+    if motor == 'sqlite':
+        base['NAME'] = _archivo(config('DB_NAME', default='db.sqlite3'))
+    else:
+        base.update({
+            'NAME': config('DB_NAME', default='projectoFrontEnd'),
+            'USER': config('DB_USER', default='root'),
+            'PASSWORD': config('DB_PASSWORD', default='1234'),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='3306'),
+        })
+    if not pool:
+        return base
+    return con_pool(
+        base,
+        tamano=config('DB_POOL_TAMANO', default=TAMANO, cast=int),
+        desborde=config('DB_POOL_DESBORDE', default=DESBORDE, cast=int),
+        espera=config('DB_POOL_ESPERA', default=ESPERA, cast=float),
+    )
+
+
+def replicas_de_lectura(primaria):
+    """
+    Configuración de cada réplica de ``DB_REPLICAS`` (copia de la primaria con
+    otro host o archivo) y su peso: ``({alias: config}, {alias: peso})``
+    """
+    configuraciones = {}
+    pesos = {}
+    for numero, entrada in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+        destino, _, peso = entrada.partition('*')
+        alias = f'replica{numero}'
+        replica = {**primaria, 'TEST': {'MIRROR': 'default'}}
+        if primaria['ENGINE'].endswith('sqlite3'):
+            replica['NAME'] = _archivo(destino)
+        else:
+            host, _, puerto = destino.partition(':')
+            replica['HOST'] = host
+            replica['PORT'] = puerto or primaria['PORT']
+        configuraciones[alias] = replica
+        pesos[alias] = int(peso) if peso else 1
+    return configuraciones, pesos
+
+
+def cache_de_entorno():
+    """Entrada ``default`` de ``CACHES`` según CACHE_MOTOR y CACHE_UBICACION"""
+    motor = config('CACHE_MOTOR', default='local')
+    if motor not in MOTORES_CACHE:
+        raise ValueError(f'CACHE_MOTOR debe ser uno de: {", ".join(MOTORES_CACHE)}')
+    return {
+        'BACKEND': MOTORES_CACHE[motor],
+        'LOCATION': config('CACHE_UBICACION', default=UBICACIONES_CACHE[motor]),
+    }
+
+
+def cache_compartida():
+    """False si cada proceso tiene su propia caché (LocMemCache)"""
+    from django.conf import settings
+
+    return settings.CACHES['default']['BACKEND'] not in CACHES_LOCALES
+
+
+def timeout_cache(timeout):
+    """
+    Duración de una entrada que otro proceso puede invalidar: ``timeout`` con
+    una caché compartida; con una local, acotada a ``CACHE_LOCAL_TIMEOUT``
+    (``None``, sin vencimiento, también se acota)
+    """
+    if cache_compartida():
+        return timeout
+    from django.conf import settings
+
+    limite = getattr(settings, 'CACHE_LOCAL_TIMEOUT', CACHE_LOCAL_TIMEOUT)
+    return limite if timeout is None else min(timeout, limite)
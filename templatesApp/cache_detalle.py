@@ -0,0 +1,177 @@
+"""
+Caché de respuestas de las vistas de detalle, con ETag y Last-Modified.
+
+Cada objeto tiene en caché una *versión*: el instante (``time.time()``) de su
+último cambio. Las señales ``post_save``/``post_delete`` la renuevan para el
+objeto y para los objetos a los que apunta (el trabajador y el rol de una
+asignación, el bus de un estado...), y además renuevan la versión del *tipo*
+(``bus:*``), de la que dependen los detalles que muestran datos de varios
+objetos de ese modelo (p.ej. las patentes en el detalle de un trabajador).
+
+La respuesta se guarda bajo una clave con esas versiones y el conjunto de
+permisos del usuario, así que nunca hay que borrarla: al cambiar una versión
+la clave deja de usarse. El ETag se deriva de la misma clave y Last-Modified
+es la versión más reciente, por lo que una petición condicional que coincide
+se responde con 304 sin consultar el objeto ni renderizar la plantilla.
+
+Las versiones son instantes de cambio y no ``fecha_registro``/``fecha_cambio``
+porque editar un trabajador, un rol o un bus no modifica esas columnas.
+
+Las versiones no vencen si la caché es compartida por los procesos; con una
+caché local (LocMemCache) vencen a los ``CACHE_LOCAL_TIMEOUT`` segundos, lo que
+acota cuánto tarda un proceso en notar un cambio hecho en otro.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .basedatos import timeout_cache
+from .replicas import cacheable
+
+
+DETALLE_TIMEOUT = getattr(settings, 'DETALLE_TIMEOUT', 300)
+
+PREFIJO = 'templatesApp:detalle'
+
+# Versión de la que dependen todos los detalles (cargas masivas, vaciado de tablas)
+CLAVE_GLOBAL = f'{PREFIJO}:version:*'
+
+# Versión de los permisos de usuarios y grupos (ver _permisos)
+CLAVE_PERMISOS = f'{PREFIJO}:version:permisos'
+
+# Claves foráneas a cuyos objetos afecta el cambio (aparece en su detalle)
+RELACIONADOS = {
+    'estadobus': ('bus',),
+    'historialestadobus': ('bus',),
+    'asignacionrol': ('trabajador', 'rol'),
+    'asignacionbus': ('trabajador', 'bus'),
+}
+
+# Ids por consulta al invalidar asignaciones finalizadas en bloque
+LOTE_INVALIDACION = 2000
+
+
+def _clave_version(modelo, pk='*'):
+    return f'{PREFIJO}:version:{modelo._meta.model_name}:{pk}'
+
+
+def versiones(claves):
+    """Versión de cada clave; las que faltan (caché vacía) empiezan ahora"""
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            ahora = time.time()
+            cache.add(clave, ahora, timeout_cache(None))
+            encontradas[clave] = cache.get(clave, ahora)
+    return [encontradas[clave] for clave in claves]
+
+
+def renovar(objetos):
+    """Marca como modificados los objetos dados: pares (modelo, pk)"""
+    ahora = time.time()
+    claves = {_clave_version(modelo, pk): ahora for modelo, pk in objetos if pk is not None}
+    claves.update({_clave_version(modelo): ahora for modelo, _ in objetos})
+    cache.set_many(claves, timeout_cache(None))
+
+
+def invalidar(instance):
+    """Renueva el objeto y los objetos relacionados, incluidos los que tenía antes de editarse"""
+    objetos = [(type(instance), instance.pk)]
+    anteriores = getattr(instance, '_relacionados_anteriores', {})
+    for campo in RELACIONADOS.get(instance._meta.model_name, ()):
+        modelo = instance._meta.get_field(campo).related_model
+        objetos.append((modelo, getattr(instance, f'{campo}_id')))
+        if anteriores.get(campo):
+            objetos.append((modelo, anteriores[campo]))
+    renovar(objetos)
+
+
+def invalidar_asignaciones(modelo, ids, using=None):
+    """Renueva asignaciones modificadas con UPDATE (sin post_save) y sus objetos relacionados"""
+    campos = RELACIONADOS[modelo._meta.model_name]
+    relacionados = [modelo._meta.get_field(campo).related_model for campo in campos]
+    for inicio in range(0, len(ids), LOTE_INVALIDACION):
+        lote = ids[inicio:inicio + LOTE_INVALIDACION]
+        objetos = [(modelo, pk) for pk in lote]
+        filas = (
+            modelo._default_manager.using(using).filter(pk__in=lote)
+            .values_list(*(f'{campo}_id' for campo in campos)).distinct()
+        )
+        for fila in filas:
+            objetos.extend(zip(relacionados, fila))
+        renovar(objetos)
+
+
+def invalidar_todo():
+    """Invalida todos los detalles (tras cargas con bulk_create o vaciar tablas)"""
+    cache.set(CLAVE_GLOBAL, time.time(), timeout_cache(None))
+
+
+def invalidar_permisos():
+    """Descarta las firmas de permisos guardadas (al cambiar permisos o grupos)"""
+    cache.set(CLAVE_PERMISOS, time.time(), timeout_cache(None))
+
+
+def _permisos(user):
+    """
+    Firma del conjunto de permisos del usuario. Se guarda en caché para no
+    repetir en cada petición las dos consultas de get_all_permissions().
+    """
+    if user.is_superuser:
+        # Un superusuario tiene todos los permisos: no hace falta consultarlos
+        return 'superusuario'
+    version, = versiones([CLAVE_PERMISOS])
+    clave = f'{PREFIJO}:permisos:{user.pk}:{version}'
+    firma = cache.get(clave)
+    if firma is None:
+        permisos = sorted(user.get_all_permissions())
+        firma = hashlib.md5(f'{user.is_staff}:{",".join(permisos)}'.encode()).hexdigest()
+        cache.set(clave, firma, timeout_cache(DETALLE_TIMEOUT))
+    return firma
+
+
+def cache_detalle(modelo, tipos=()):
+    """
+    Cachea la vista de detalle de ``modelo`` (recibe ``pk``). ``tipos`` son los
+    modelos de los que muestra varios objetos y cuyo cambio debe invalidarla.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, pk, *args, **kwargs):
+            # Con mensajes pendientes la página no es reutilizable ni cacheable
+            if request.method != 'GET' or len(messages.get_messages(request)):
+                return vista(request, pk, *args, **kwargs)
+
+            valores = versiones(
+                [CLAVE_GLOBAL, _clave_version(modelo, pk)] + [_clave_version(tipo) for tipo in tipos]
+            )
+            firma = hashlib.md5(
+                f'{modelo._meta.label}:{pk}:{valores}:{_permisos(request.user)}'.encode()
+            ).hexdigest()
+            etag = quote_etag(firma)
+            modificado = int(max(valores))
+
+            response = get_conditional_response(request, etag=etag, last_modified=modificado)
+            if response is None:
+                clave = f'{PREFIJO}:respuesta:{firma}'
+                response = cache.get(clave)
+                if response is None:
+                    response = vista(request, pk, *args, **kwargs)
+                    # Leída de una réplica justo después del cambio, podría estar desactualizada
+                    if response.status_code == 200 and cacheable(max(valores)):
+                        cache.set(clave, response, timeout_cache(DETALLE_TIMEOUT))
+
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(modificado)
+                # El navegador guarda la página pero la revalida en cada visita
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,147 @@
+"""
+Conflictos de turnos en las asignaciones de buses.
+
+Un trabajador no puede manejar dos buses distintos en el mismo turno, ni un
+bus tener dos conductores en el mismo turno, en días que se superpongan.
+
+Cada asignación ocupa el turno en el rango ``[fecha_asignacion,
+fecha_finalizacion)``: sin fecha de finalización, la activa lo ocupa sin
+fin y la inactiva no ocupa nada (se desactivó sin finalizarla). El fin es
+exclusivo, de modo que al finalizar hoy una asignación el turno queda libre
+para otra que empiece hoy.
+
+Las consultas puntuales ("¿está libre este turno?") usan los índices
+``(trabajador, turno, fecha_asignacion)`` y ``(bus, turno, fecha_asignacion)``
+de AsignacionBus. La auditoría de toda la flota lee una vez las asignaciones
+que ocupan algún día del rango y las recorre ordenadas por trabajador/bus,
+turno y fecha, manteniendo en un heap las que siguen abiertas.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date
+from itertools import groupby
+
+from django.db.models import Q
+
+from .models import AsignacionBus
+
+
+def ocupan(desde, hasta=None):
+    """Q de las asignaciones que ocupan algún día de [desde, hasta); hasta None es sin fin"""
+    condicion = Q(activo=True, fecha_finalizacion__isnull=True) | Q(fecha_finalizacion__gt=desde)
+    if hasta is not None:
+        condicion &= Q(fecha_asignacion__lt=hasta)
+    return condicion
+
+
+def ocupa(activo, inicio, fin, desde, hasta=None):
+    """Equivalente en Python de ocupan() para una fila ya leída"""
+    if fin is None and not activo:
+        return False
+    if fin is not None and fin <= desde:
+        return False
+    return hasta is None or inicio is None or inicio < hasta
+
+
+def conflictos_asignacion(trabajador_id, bus_id, turno, desde=None, hasta=None, excluir=None):
+    """
+    Asignaciones que ocupan el turno del trabajador (en otro bus) o del bus
+    (con otro trabajador) en [desde, hasta). ``desde`` por defecto es hoy.
+    """
+    asignaciones = AsignacionBus.objects.filter(
+        (Q(trabajador_id=trabajador_id) & ~Q(bus_id=bus_id)) |
+        (Q(bus_id=bus_id) & ~Q(trabajador_id=trabajador_id)),
+        ocupan(desde or date.today(), hasta),
+        turno=turno,
+    )
+    if excluir is not None:
+        asignaciones = asignaciones.exclude(pk=excluir)
+    return asignaciones
+
+
+def turno_libre(campo, pk, turno, desde=None, hasta=None, excluir=None):
+    """Indica si el trabajador o bus (``campo``) no tiene el turno ocupado en [desde, hasta)"""
+    asignaciones = AsignacionBus.objects.filter(
+        ocupan(desde or date.today(), hasta), **{campo: pk}, turno=turno
+    )
+    if excluir is not None:
+        asignaciones = asignaciones.exclude(pk=excluir)
+    return not asignaciones.exists()
+
+
+def mensaje_conflicto(trabajador_id, asignacion):
+    """Mensaje para una asignación en conflicto (diccionario con los campos de CAMPOS_MENSAJE)"""
+    if asignacion['trabajador_id'] == trabajador_id:
+        return (
+            f'{asignacion["trabajador__nombre"]} {asignacion["trabajador__apellido"]} ya maneja '
+            f'el bus "{asignacion["bus__patente"]}" en el turno {asignacion["turno"]}'
+        )
+    return (
+        f'El bus "{asignacion["bus__patente"]}" ya está asignado a '
+        f'{asignacion["trabajador__nombre"]} {asignacion["trabajador__apellido"]} '
+        f'en el turno {asignacion["turno"]}'
+    )
+
+
+CAMPOS_MENSAJE = (
+    'trabajador_id', 'trabajador__nombre', 'trabajador__apellido', 'bus__patente', 'turno',
+)
+
+
+@dataclass(frozen=True)
+class Conflicto:
+    # 'trabajador' (dos buses en el mismo turno) o 'bus' (dos conductores)
+    tipo: str
+    clave: int
+    turno: str
+    asignaciones: tuple
+    # Días superpuestos [desde, hasta); hasta None es sin fin
+    desde: date
+    hasta: date = None
+
+
+def _barrer(filas, indice, tipo, omitir=None):
+    """
+    Conflictos entre filas (id, trabajador, bus, turno, inicio, fin) con la
+    misma clave ``filas[indice]`` y turno cuyos rangos se superponen.
+    """
+    conflictos = []
+    filas = sorted(filas, key=lambda fila: (fila[indice], fila[3], fila[4], fila[0]))
+    for (clave, turno), grupo in groupby(filas, key=lambda fila: (fila[indice], fila[3])):
+        abiertas = []  # heap de (fin, id, fila)
+        for fila in grupo:
+            inicio = fila[4]
+            while abiertas and abiertas[0][0] <= inicio:
+                heapq.heappop(abiertas)
+            for fin, _, otra in abiertas:
+                if omitir and omitir(fila, otra):
+                    continue
+                hasta = min(fin, fila[5] or date.max)
+                conflictos.append(Conflicto(
+                    tipo, clave, turno, tuple(sorted((otra[0], fila[0]))), inicio,
+                    None if hasta == date.max else hasta,
+                ))
+            heapq.heappush(abiertas, (fila[5] or date.max, fila[0], fila))
+    return conflictos
+
+
+def detectar_conflictos(desde, hasta=None, using=None):
+    """
+    Todos los conflictos de la flota en [desde, hasta), con una sola consulta.
+    Un par con el mismo trabajador y el mismo bus (asignación duplicada) se
+    informa una vez, como conflicto del trabajador.
+    """
+    filas = [
+        (pk, trabajador_id, bus_id, turno, max(inicio, desde), fin)
+        for pk, trabajador_id, bus_id, turno, inicio, fin in
+        AsignacionBus.objects.using(using).filter(ocupan(desde, hasta)).values_list(
+            'pk', 'trabajador_id', 'bus_id', 'turno', 'fecha_asignacion', 'fecha_finalizacion'
+        )
+        # Finalizadas el mismo día en que empezaron: no ocupan ningún día
+        if fin is None or fin > inicio
+    ]
+    if hasta is not None:
+        filas = [fila[:5] + (min(fila[5] or hasta, hasta),) for fila in filas]
+    conflictos = _barrer(filas, 1, 'trabajador')
+    conflictos += _barrer(filas, 2, 'bus', omitir=lambda fila, otra: fila[1] == otra[1])
+    return conflictos
@@ -0,0 +1,149 @@
+"""
+Instrumentación de consultas SQL por petición.
+
+``ConsultasMiddleware`` registra, con ``connection.execute_wrapper`` (no depende
+de DEBUG), la cantidad de consultas, el tiempo total en la base de datos y las
+consultas repetidas de cada petición. Los resultados se exponen como cabeceras
+``X-DB-*`` y en el logger ``templatesApp.consultas``.
+
+Una consulta se considera N+1 cuando la misma huella (el SQL sin parámetros)
+se ejecuta ``CONSULTAS_UMBRAL_N_MAS_1`` veces o más en una misma petición.
+
+Las vistas declaran su presupuesto con ``@presupuesto_consultas(n)``. Con
+``CONSULTAS_ESTRICTO = True`` (pensado para los tests) exceder el presupuesto o
+detectar un N+1 lanza ``PresupuestoConsultasExcedido`` en vez de solo registrarlo.
+Para los tests también está ``limitar_consultas``, un context manager que
+falla con el detalle de las consultas ejecutadas.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('templatesApp.consultas')
+
+UMBRAL_N_MAS_1 = 5
+
+_LISTA_PARAMETROS = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    pass
+
+
+def huella(sql):
+    """SQL normalizado: sin literales numéricos y con las listas IN colapsadas"""
+    sql = _LISTA_PARAMETROS.sub('(...)', sql)
+    sql = _NUMEROS.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+class RegistroConsultas:
+    """Acumula las consultas ejecutadas mientras está instalado como execute_wrapper"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.cantidad += 1
+            self.huellas[huella(sql)] += 1
+
+    def repetidas(self, umbral=None):
+        """Huellas ejecutadas al menos ``umbral`` veces, de la más repetida a la menos"""
+        if umbral is None:
+            umbral = getattr(settings, 'CONSULTAS_UMBRAL_N_MAS_1', UMBRAL_N_MAS_1)
+        return [(sql, veces) for sql, veces in self.huellas.most_common() if veces >= umbral]
+
+    def problemas(self, maximo=None, umbral=None):
+        """Lista de descripciones de presupuesto excedido y patrones N+1"""
+        problemas = []
+        if maximo is not None and self.cantidad > maximo:
+            problemas.append(f'{self.cantidad} consultas (presupuesto: {maximo})')
+        for sql, veces in self.repetidas(umbral):
+            problemas.append(f'N+1: {veces} veces {sql}')
+        return problemas
+
+    @contextmanager
+    def instalado(self, using=None):
+        """Registra las consultas de las conexiones indicadas (todas por defecto)"""
+        alias = [using] if using else list(connections)
+        with ExitStack() as stack:
+            for nombre in alias:
+                stack.enter_context(connections[nombre].execute_wrapper(self))
+            yield self
+
+
+def presupuesto_consultas(maximo):
+    """Declara la cantidad máxima de consultas SQL esperadas de una vista"""
+    def decorador(vista):
+        vista.presupuesto_consultas = maximo
+        return vista
+    return decorador
+
+
+@contextmanager
+def limitar_consultas(maximo=None, detectar_n_mas_1=True, umbral=None, using=None):
+    """
+    Helper de tests: falla si el bloque ejecuta más de ``maximo`` consultas o
+    repite una misma consulta ``umbral`` veces o más::
+
+        with limitar_consultas(4):
+            self.client.get(reverse('bus_detalle', args=[bus.pk]))
+    """
+    registro = RegistroConsultas()
+    with registro.instalado(using):
+        yield registro
+    problemas = registro.problemas(maximo, umbral if detectar_n_mas_1 else float('inf'))
+    if problemas:
+        raise PresupuestoConsultasExcedido('\n'.join(problemas))
+
+
+class ConsultasMiddleware:
+    """Mide las consultas SQL de cada petición y las informa en cabeceras y logs"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        request.consultas = registro
+        with registro.instalado():
+            response = self.get_response(request)
+
+        maximo = getattr(request, 'presupuesto_consultas', None)
+        problemas = registro.problemas(maximo)
+
+        # En respuestas en streaming las consultas del cuerpo aún no se ejecutan
+        response['X-DB-Queries'] = str(registro.cantidad)
+        response['X-DB-Time-ms'] = f'{registro.tiempo * 1000:.1f}'
+        response['X-DB-Repeated'] = str(len(registro.repetidas()))
+        if maximo is not None:
+            response['X-DB-Budget'] = str(maximo)
+
+        mensaje = '%s %s: %d consultas en %.1f ms'
+        argumentos = [request.method, request.path, registro.cantidad, registro.tiempo * 1000]
+        if problemas:
+            logger.warning(mensaje + '\n  %s', *argumentos, '\n  '.join(problemas))
+            if getattr(settings, 'CONSULTAS_ESTRICTO', False):
+                raise PresupuestoConsultasExcedido(
+                    f'{request.method} {request.path}:\n' + '\n'.join(problemas)
+                )
+        else:
+            logger.debug(mensaje, *argumentos)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.presupuesto_consultas = getattr(view_func, 'presupuesto_consultas', None)
@@ -0,0 +1,357 @@
+"""
+Generador determinista de una flota sintética para pruebas de rendimiento.
+
+Con la misma semilla y los mismos tamaños produce siempre los mismos datos
+(nombres, estados, pares de asignación y fechas), de modo que los benchmarks
+son comparables entre commits. Todo se inserta con bulk_create por lotes; las
+fechas con auto_now/auto_now_add se reparten después con UPDATE por rangos de id.
+
+Los datos respetan las validaciones de los modelos: nombres solo con letras,
+patentes y nombres de rol únicos, a lo sumo una asignación activa por par, y
+asignaciones activas solo con trabajadores, roles y buses activos (buses
+además operativos).
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import (
+    Trabajador, Rol, Bus, EstadoBus, HistorialEstadoBus, AsignacionRol, AsignacionBus,
+    TerminoBusqueda,
+)
+from .search import CAMPOS_BUSQUEDA, reconstruir_indice
+from .cache_detalle import invalidar_todo
+from .stats import invalidar_dashboard_stats
+
+
+NOMBRES = [
+    'Ana', 'Luis', 'Pedro', 'Camila', 'Sofía', 'Jorge', 'Marta', 'Diego', 'Valentina', 'Matías',
+    'Javiera', 'Tomás', 'Catalina', 'Benjamín', 'Francisca', 'Vicente', 'Antonia', 'Joaquín',
+    'Isidora', 'Martín', 'Fernanda', 'Cristóbal', 'Constanza', 'Sebastián', 'Daniela', 'Nicolás',
+]
+APELLIDOS = [
+    'González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez',
+    'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya',
+    'Flores', 'Espinoza', 'Valenzuela', 'Castillo', 'Tapia', 'Reyes', 'Gutiérrez', 'Castro',
+    'Pizarro', 'Álvarez', 'Vásquez', 'Sánchez', 'Fernández', 'Ramírez', 'Carrasco', 'Gómez',
+]
+CALLES = ['Av. Matta', 'Los Aromos', 'Gran Avenida', 'San Pablo', 'Vicuña Mackenna', 'Pajaritos']
+ROLES_BASE = [
+    'Conductor', 'Mecánico', 'Inspector', 'Supervisor', 'Despachador', 'Planificador',
+    'Administrativo', 'Electricista', 'Aseo', 'Guardia',
+]
+MARCAS = {
+    'Mercedes-Benz': ['O500', 'OF1721', 'Sprinter'],
+    'Volvo': ['B8R', 'B9 Salf', '7900'],
+    'Scania': ['K310', 'K250'],
+    'King Long': ['XMQ6127', 'XMQ6130'],
+    'Yutong': ['ZK6128', 'E12'],
+}
+
+# Distribución de estados actuales (pesos relativos)
+DISTRIBUCION_ESTADOS = (
+    ('OPERATIVO', 80),
+    ('MANTENIMIENTO', 8),
+    ('REPARACION', 5),
+    ('FUERA_SERVICIO', 4),
+    ('RESERVADO', 3),
+)
+OBSERVACIONES = {
+    'MANTENIMIENTO': 'Mantención preventiva programada por kilometraje',
+    'REPARACION': 'Reparación de sistema de frenos en taller',
+    'FUERA_SERVICIO': 'Fuera de servicio por falla de motor',
+}
+TURNOS = [turno for turno, _ in AsignacionBus.TURNO_CHOICES]
+
+# Fracción de buses recién ingresados, aún sin estado registrado
+BUSES_SIN_ESTADO = 0.02
+
+# Particiones usadas para repartir fechas con UPDATE por rangos de id
+TRAMOS_FECHAS = 200
+
+MODELOS_FLOTA = (
+    TerminoBusqueda, HistorialEstadoBus, AsignacionBus, AsignacionRol, EstadoBus, Bus, Rol, Trabajador,
+)
+
+
+def _letras(numero, ancho=1):
+    """Codifica un entero en letras mayúsculas (A, B, ..., Z, BA, ...)"""
+    letras = ''
+    while True:
+        numero, resto = divmod(numero, 26)
+        letras = chr(ord('A') + resto) + letras
+        if not numero:
+            break
+    return letras.rjust(ancho, 'A')
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+@dataclass
+class ConfiguracionFlota:
+    trabajadores: int = 50000
+    buses: int = 5000
+    roles: int = 500
+    asignaciones_rol: int = 500000
+    asignaciones_bus: int = 2000000
+    semilla: int = 42
+    # Fecha de referencia de la flota: las asignaciones se reparten en los
+    # ``dias`` anteriores. Es fija para que los datos no dependan del día.
+    fecha: date = date(2025, 6, 30)
+    dias: int = 730
+    lote: int = 10000
+
+
+class GeneradorFlota:
+    def __init__(self, config, informar=None):
+        self.config = config
+        self.rnd = random.Random(config.semilla)
+        self.informar = informar or (lambda mensaje: None)
+
+    def existen_datos(self):
+        return any(modelo.objects.exists() for modelo in MODELOS_FLOTA)
+
+    def limpiar(self):
+        """Vacía las tablas de la flota (TRUNCATE o equivalente) y reinicia sus secuencias"""
+        connection = connections[router.db_for_write(Trabajador)]
+        tablas = [modelo._meta.db_table for modelo in MODELOS_FLOTA]
+        sql = connection.ops.sql_flush(no_style(), tablas, reset_sequences=True, allow_cascade=True)
+        connection.ops.execute_sql_flush(sql)
+
+    def generar(self):
+        """Inserta la flota completa; retorna la cantidad de filas por modelo"""
+        trabajadores = self._trabajadores()
+        roles = self._roles()
+        buses = self._buses()
+        operativos = self._estados(buses)
+        self._asignaciones_rol(trabajadores, roles)
+        self._asignaciones_bus(trabajadores, buses, operativos)
+
+        self.informar('Calculando contadores y estado actual de los buses...')
+        for modelo in (AsignacionRol, AsignacionBus):
+            modelo.recalcular_contadores()
+        Bus.sincronizar_estados()
+
+        self.informar('Reconstruyendo índice de búsqueda...')
+        for modelo in CAMPOS_BUSQUEDA:
+            reconstruir_indice(modelo)
+        invalidar_dashboard_stats()
+        invalidar_todo()
+
+        return {
+            modelo._meta.model_name: modelo.objects.count()
+            for modelo in MODELOS_FLOTA if modelo is not TerminoBusqueda
+        }
+
+    def _insertar(self, modelo, objetos):
+        """bulk_create por lotes, una transacción por lote"""
+        total = 0
+        for lote in _lotes(objetos, self.config.lote):
+            with transaction.atomic(using=router.db_for_write(modelo)):
+                modelo.objects.bulk_create(lote)
+            total += len(lote)
+        self.informar(f'{modelo._meta.verbose_name_plural}: {total}')
+        return total
+
+    def _ids(self, modelo, *campos):
+        """(id, campos...) de las filas insertadas, en orden de inserción"""
+        return list(modelo.objects.order_by('id').values_list('id', *campos))
+
+    def _trabajadores(self):
+        rnd = self.rnd
+
+        def filas():
+            for _ in range(self.config.trabajadores):
+                yield Trabajador(
+                    nombre=rnd.choice(NOMBRES),
+                    apellido=f'{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}',
+                    direccion=f'{rnd.choice(CALLES)} {rnd.randint(1, 9999)}',
+                    contacto=f'+569{rnd.randint(10000000, 99999999)}',
+                    edad=rnd.randint(18, 70),
+                    activo=rnd.random() < 0.92,
+                )
+
+        self._insertar(Trabajador, filas())
+        return self._ids(Trabajador, 'activo')
+
+    def _roles(self):
+        rnd = self.rnd
+        base = len(ROLES_BASE)
+        self._insertar(Rol, (
+            Rol(
+                nombre=f'{ROLES_BASE[i % base]} {_letras(i // base)}',
+                descripcion=f'Rol sintético {i}',
+                nivel_acceso=rnd.randint(1, 5),
+                activo=rnd.random() < 0.95,
+            )
+            for i in range(self.config.roles)
+        ))
+        return self._ids(Rol, 'activo')
+
+    def _buses(self):
+        rnd = self.rnd
+        marcas = sorted(MARCAS)
+
+        def filas():
+            for i in range(self.config.buses):
+                marca = rnd.choice(marcas)
+                yield Bus(
+                    patente=f'{_letras(i // 100, 4)}-{i % 100:02d}',
+                    modelo=rnd.choice(MARCAS[marca]),
+                    año=rnd.randint(2005, 2025),
+                    capacidad=rnd.choice([30, 40, 45, 50, 60, 80]),
+                    marca=marca,
+                    activo=rnd.random() < 0.95,
+                )
+
+        self._insertar(Bus, filas())
+        return self._ids(Bus, 'activo')
+
+    def _momento(self, fraccion):
+        """Instante entre el inicio del período (0.0) y la fecha de referencia (1.0)"""
+        fin = timezone.make_aware(datetime.combine(self.config.fecha, time(23, 0)))
+        return fin - timedelta(days=self.config.dias * (1 - fraccion))
+
+    def _estados(self, buses):
+        """Estado actual e historial de cada bus; retorna los ids de buses operativos activos"""
+        if not buses:
+            return []
+        rnd = self.rnd
+        estados = [estado for estado, _ in DISTRIBUCION_ESTADOS]
+        pesos = [peso for _, peso in DISTRIBUCION_ESTADOS]
+
+        actuales = []
+        historial = []
+        operativos = []
+        minimo, maximo = buses[0][0], buses[-1][0]
+        for bus_id, activo in buses:
+            if rnd.random() < BUSES_SIN_ESTADO:
+                continue
+            # Eventos previos (cerrados) y el vigente, con kilometraje creciente
+            kilometraje = rnd.randint(0, 20000)
+            eventos = rnd.randint(1, 5)
+            cambio = self._momento(self._fraccion(bus_id, minimo, maximo))
+            desde = cambio - timedelta(days=30 * eventos)
+            for _ in range(eventos - 1):
+                hasta = desde + timedelta(days=rnd.randint(5, 30))
+                estado = rnd.choices(estados, pesos)[0]
+                historial.append(HistorialEstadoBus(
+                    bus_id=bus_id, estado=estado, kilometraje=kilometraje,
+                    observaciones=OBSERVACIONES.get(estado), vigente_desde=desde, vigente_hasta=hasta,
+                ))
+                kilometraje += rnd.randint(1000, 15000)
+                desde = hasta
+
+            estado = rnd.choices(estados, pesos)[0]
+            actuales.append(EstadoBus(
+                bus_id=bus_id, estado=estado, kilometraje=kilometraje,
+                observaciones=OBSERVACIONES.get(estado),
+            ))
+            historial.append(HistorialEstadoBus(
+                bus_id=bus_id, estado=estado, kilometraje=kilometraje,
+                observaciones=OBSERVACIONES.get(estado), vigente_desde=cambio,
+            ))
+            if activo and estado == 'OPERATIVO':
+                operativos.append(bus_id)
+
+        self._insertar(EstadoBus, actuales)
+        self._insertar(HistorialEstadoBus, historial)
+
+        # fecha_cambio es auto_now: se alinea con el evento vigente por tramos de buses
+        for inicio, fin, fraccion in self._tramos(minimo, maximo):
+            EstadoBus.objects.filter(bus_id__gte=inicio, bus_id__lte=fin).update(
+                fecha_cambio=self._momento(fraccion)
+            )
+        return operativos
+
+    def _fraccion(self, id_, minimo, maximo):
+        """Fracción del período que corresponde al tramo del id dado"""
+        tramo = (id_ - minimo) * TRAMOS_FECHAS // (maximo - minimo + 1)
+        return tramo / TRAMOS_FECHAS
+
+    def _tramos(self, minimo, maximo):
+        """(primer id, último id, fracción del período) de cada tramo del rango de ids"""
+        total = maximo - minimo + 1
+        for tramo in range(TRAMOS_FECHAS):
+            inicio = minimo + -(-tramo * total // TRAMOS_FECHAS)
+            fin = minimo + -(-(tramo + 1) * total // TRAMOS_FECHAS) - 1
+            if fin >= inicio:
+                yield inicio, fin, tramo / TRAMOS_FECHAS
+
+    def _pares_activos(self, trabajadores, destinos, cantidad):
+        """
+        Una asignación activa por trabajador activo, hacia destinos al azar. Al
+        menos un 10% de los trabajadores activos queda sin asignación vigente.
+        """
+        rnd = self.rnd
+        activos = [trabajador_id for trabajador_id, activo in trabajadores if activo]
+        if not destinos:
+            return []
+        elegidos = rnd.sample(activos, min(cantidad, len(activos) * 9 // 10))
+        return [(trabajador_id, rnd.choice(destinos)) for trabajador_id in elegidos]
+
+    def _asignaciones_rol(self, trabajadores, roles):
+        rnd = self.rnd
+        ids_trabajadores = [trabajador_id for trabajador_id, _ in trabajadores]
+        ids_roles = [rol_id for rol_id, _ in roles]
+        activas = self._pares_activos(
+            trabajadores, [rol_id for rol_id, activo in roles if activo],
+            self.config.asignaciones_rol // 10,
+        )
+
+        def filas():
+            # Historial (inactivas) primero y las vigentes al final: el orden de
+            # inserción es cronológico y las fechas se asignan por rango de id.
+            for _ in range(self.config.asignaciones_rol - len(activas)):
+                yield AsignacionRol(
+                    trabajador_id=rnd.choice(ids_trabajadores), rol_id=rnd.choice(ids_roles), activo=False,
+                )
+            for trabajador_id, rol_id in activas:
+                yield AsignacionRol(trabajador_id=trabajador_id, rol_id=rol_id)
+
+        self._insertar(AsignacionRol, filas())
+        self._repartir_fechas(AsignacionRol)
+
+    def _asignaciones_bus(self, trabajadores, buses, operativos):
+        rnd = self.rnd
+        ids_trabajadores = [trabajador_id for trabajador_id, _ in trabajadores]
+        ids_buses = [bus_id for bus_id, _ in buses]
+        activas = self._pares_activos(trabajadores, operativos, self.config.asignaciones_bus // 20)
+
+        def filas():
+            for _ in range(self.config.asignaciones_bus - len(activas)):
+                yield AsignacionBus(
+                    trabajador_id=rnd.choice(ids_trabajadores), bus_id=rnd.choice(ids_buses),
+                    turno=rnd.choice(TURNOS), activo=False,
+                )
+            for trabajador_id, bus_id in activas:
+                yield AsignacionBus(trabajador_id=trabajador_id, bus_id=bus_id, turno=rnd.choice(TURNOS))
+
+        self._insertar(AsignacionBus, filas())
+        self._repartir_fechas(AsignacionBus)
+
+    def _repartir_fechas(self, modelo):
+        """Distribuye fecha_asignacion (y la finalización de las inactivas) por tramos de id"""
+        rango = modelo.objects.aggregate(minimo=Min('id'), maximo=Max('id'))
+        if rango['minimo'] is None:
+            return
+        for inicio, fin, fraccion in self._tramos(rango['minimo'], rango['maximo']):
+            fecha = self._momento(fraccion).date()
+            tramo = modelo.objects.filter(id__gte=inicio, id__lte=fin)
+            tramo.update(fecha_asignacion=fecha)
+            tramo.filter(activo=False).update(
+                fecha_finalizacion=min(fecha + timedelta(days=60), self.config.fecha)
+            )
@@ -0,0 +1,245 @@
+"""
+Archivos estáticos para producción: propios (sin CDN), con hash en el nombre,
+comprimidos de antemano y con caché de larga duración.
+
+- ``vendorizar()`` descarga Bootstrap y Font Awesome a ``static/vendor/`` (sin
+  los comentarios ``sourceMappingURL``, cuyos .map no se publican). Mientras no
+  estén descargados, ``{% vendor %}`` usa la URL del CDN.
+- ``AlmacenEstaticos`` (``STORAGES['staticfiles']``) es el almacenamiento con
+  manifiesto de Django: ``collectstatic`` copia cada archivo con el hash de su
+  contenido en el nombre (``css/base.3f2a1c.css``) y reescribe las referencias
+  ``url()`` de las hojas de estilo. Además minifica el CSS propio y escribe
+  junto a cada archivo de texto sus variantes ``.gz`` y ``.br`` (con el paquete
+  ``brotli``), y junto a cada imagen una versión WebP y copias reducidas (con
+  Pillow). Las variantes de imagen quedan en el manifiesto:
+  ``{% static 'img/bus1.480.webp' %}``.
+- ``servir`` entrega los archivos de ``STATIC_ROOT`` cuando no hay un servidor
+  web delante (``SERVIR_ESTATICOS``): la variante comprimida que acepte el
+  cliente y, para los nombres con hash, ``Cache-Control: immutable`` por un año.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+from io import BytesIO
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.templatetags.static import static
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+CDN_BOOTSTRAP = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist'
+CDN_FONTAWESOME = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0'
+
+FUENTES_FONTAWESOME = [
+    f'{fuente}.{extension}'
+    for fuente in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+    for extension in ('woff2', 'ttf')
+]
+
+# Ruta dentro de static/ -> URL de origen
+VENDOR = {
+    'vendor/bootstrap/css/bootstrap.min.css': f'{CDN_BOOTSTRAP}/css/bootstrap.min.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js': f'{CDN_BOOTSTRAP}/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css': f'{CDN_FONTAWESOME}/css/all.min.css',
+    **{
+        f'vendor/fontawesome/webfonts/{fuente}': f'{CDN_FONTAWESOME}/webfonts/{fuente}'
+        for fuente in FUENTES_FONTAWESOME
+    },
+}
+
+# Extensiones que se comprimen (las imágenes y woff2 ya vienen comprimidas)
+COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.ttf', '.eot', '.xml')
+IMAGENES = ('.png', '.jpg', '.jpeg')
+# Anchos de las copias reducidas de cada imagen (solo si es más ancha)
+ANCHOS_IMAGEN = (480, 960)
+
+# Un año: los nombres con hash nunca cambian de contenido
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_SIN_HASH = 'public, max-age=300'
+
+_SOURCE_MAP = re.compile(rb'\n?/[/*]# sourceMappingURL=\S+?( \*/)?\s*$')
+
+
+class ErrorEstaticos(Exception):
+    pass
+
+
+def cargar_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def cargar_pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def vendorizar(forzar=False, timeout=30):
+    """Descarga a static/ los archivos de VENDOR que falten; retorna las rutas descargadas"""
+    destino = settings.STATICFILES_DIRS[0]
+    descargados = []
+    for ruta, url in VENDOR.items():
+        archivo = os.path.join(destino, *ruta.split('/'))
+        if os.path.exists(archivo) and not forzar:
+            continue
+        try:
+            with urlopen(url, timeout=timeout) as respuesta:
+                contenido = respuesta.read()
+        except (URLError, OSError) as e:
+            raise ErrorEstaticos(f'No se pudo descargar {url}: {e}')
+        if ruta.endswith(('.css', '.js')):
+            contenido = _SOURCE_MAP.sub(b'', contenido)
+        os.makedirs(os.path.dirname(archivo), exist_ok=True)
+        with open(archivo, 'wb') as salida:
+            salida.write(contenido)
+        descargados.append(ruta)
+    url_vendor.cache_clear()
+    return descargados
+
+
+@lru_cache(maxsize=None)
+def url_vendor(ruta):
+    """URL del archivo vendorizado si ya se descargó; si no, la del CDN"""
+    if finders.find(ruta):
+        return static(ruta)
+    return VENDOR[ruta]
+
+
+def minificar_css(texto):
+    """Quita comentarios (salvo ``/*! licencias */``) y espacios sobrantes"""
+    texto = re.sub(r'/\*(?!!).*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    texto = re.sub(r':\s+', ':', texto)
+    return texto.replace(';}', '}').strip()
+
+
+class AlmacenEstaticos(ManifestStaticFilesStorage):
+    def _save(self, name, content):
+        # Se minifica al copiar, antes de calcular el hash del contenido (los
+        # nombres con hash, p.ej. all.min.3f2a1c.css, conservan el ".min.")
+        if name.endswith('.css') and '.min.' not in posixpath.basename(name):
+            content.seek(0)
+            content = ContentFile(minificar_css(content.read().decode('utf-8')).encode('utf-8'))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        variantes = {}
+        for original, nombre in list(self.hashed_files.items()):
+            if nombre.endswith(COMPRIMIBLES):
+                for comprimido in self._comprimir(nombre):
+                    yield original, comprimido, True
+            elif nombre.lower().endswith(IMAGENES):
+                for variante, generado in self._variantes_imagen(original, nombre):
+                    variantes[variante] = generado
+                    yield original, generado, True
+        if variantes:
+            self.hashed_files.update(variantes)
+            self.save_manifest()
+
+    def _comprimir(self, nombre):
+        """Escribe nombre.gz y nombre.br si reducen el tamaño; retorna los escritos"""
+        with self.open(nombre) as archivo:
+            contenido = archivo.read()
+        variantes = [('.gz', gzip.compress(contenido, compresslevel=9, mtime=0))]
+        brotli = cargar_brotli()
+        if brotli:
+            variantes.append(('.br', brotli.compress(contenido, quality=11)))
+        escritos = []
+        for extension, comprimido in variantes:
+            if len(comprimido) < len(contenido):
+                self._reemplazar(nombre + extension, comprimido)
+                escritos.append(nombre + extension)
+        return escritos
+
+    def _variantes_imagen(self, original, nombre):
+        """Pares (nombre lógico, nombre con hash) de la versión WebP y las reducidas"""
+        Image = cargar_pillow()
+        if not Image:
+            return []
+        with self.open(nombre) as archivo:
+            imagen = Image.open(BytesIO(archivo.read()))
+            imagen.load()
+        base_original, _ = posixpath.splitext(original)
+        base, _ = posixpath.splitext(nombre)
+        variantes = []
+        for ancho in (None,) + ANCHOS_IMAGEN:
+            if ancho is not None and imagen.width <= ancho:
+                continue
+            copia = imagen if ancho is None else imagen.resize(
+                (ancho, round(imagen.height * ancho / imagen.width)), Image.LANCZOS
+            )
+            sufijo = '' if ancho is None else f'.{ancho}'
+            salida = BytesIO()
+            copia.save(salida, 'WEBP', quality=80, method=6)
+            self._reemplazar(f'{base}{sufijo}.webp', salida.getvalue())
+            variantes.append((f'{base_original}{sufijo}.webp', f'{base}{sufijo}.webp'))
+        return variantes
+
+    def _reemplazar(self, nombre, contenido):
+        if self.exists(nombre):
+            self.delete(nombre)
+        # Sin pasar por _save: las variantes no se minifican
+        super()._save(nombre, ContentFile(contenido))
+
+
+@lru_cache(maxsize=1)
+def _nombres_con_hash():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def servir(request, ruta):
+    """Archivo de STATIC_ROOT en la variante comprimida que acepte el cliente"""
+    nombre = posixpath.normpath(ruta).lstrip('/')
+    try:
+        completo = safe_join(settings.STATIC_ROOT, nombre)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(completo):
+        raise Http404
+
+    estado = os.stat(completo)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), estado.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    aceptadas = request.headers.get('Accept-Encoding', '')
+    codificacion = None
+    for candidata, extension in (('br', '.br'), ('gzip', '.gz')):
+        if candidata in aceptadas and os.path.isfile(completo + extension):
+            codificacion = candidata
+            completo += extension
+            break
+
+    response = FileResponse(
+        open(completo, 'rb'), content_type=content_type, filename=posixpath.basename(nombre)
+    )
+    if codificacion:
+        response['Content-Encoding'] = codificacion
+    if nombre.endswith(COMPRIMIBLES):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response['Last-Modified'] = http_date(estado.st_mtime)
+    response['Cache-Control'] = CACHE_INMUTABLE if nombre in _nombres_con_hash() else CACHE_SIN_HASH
+    return response
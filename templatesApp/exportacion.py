@@ -0,0 +1,160 @@
+"""
+Exportación en CSV o JSON de los listados, con los mismos filtros de la vista.
+
+Las filas se leen con ``values_list`` en lotes por clave primaria (``pk > último``)
+y se envían con ``StreamingHttpResponse`` a medida que se generan: no se crean
+instancias de modelo ni se acumula el resultado, por lo que la memoria usada no
+depende de la cantidad de filas exportadas.
+"""
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+TAMANO_LOTE = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+
+# Columnas exportadas por listado: (lookup para values_list, encabezado).
+# La primera columna debe ser la clave primaria, que se usa para avanzar por lotes.
+COLUMNAS_TRABAJADORES = (
+    ('id', 'id'),
+    ('nombre', 'nombre'),
+    ('apellido', 'apellido'),
+    ('direccion', 'direccion'),
+    ('contacto', 'contacto'),
+    ('edad', 'edad'),
+    ('activo', 'activo'),
+    ('fecha_registro', 'fecha_registro'),
+)
+
+COLUMNAS_ROLES = (
+    ('id', 'id'),
+    ('nombre', 'nombre'),
+    ('descripcion', 'descripcion'),
+    ('nivel_acceso', 'nivel_acceso'),
+    ('activo', 'activo'),
+    ('asignaciones_activas', 'asignaciones_activas'),
+    ('fecha_creacion', 'fecha_creacion'),
+)
+
+COLUMNAS_BUSES = (
+    ('id', 'id'),
+    ('patente', 'patente'),
+    ('modelo', 'modelo'),
+    ('año', 'año'),
+    ('capacidad', 'capacidad'),
+    ('marca', 'marca'),
+    ('activo', 'activo'),
+    ('estado_actual', 'estado_actual'),
+    ('kilometraje_actual', 'kilometraje_actual'),
+    ('fecha_registro', 'fecha_registro'),
+)
+
+COLUMNAS_ESTADOS_BUS = (
+    ('id', 'id'),
+    ('bus__patente', 'patente'),
+    ('estado', 'estado'),
+    ('kilometraje', 'kilometraje'),
+    ('observaciones', 'observaciones'),
+    ('fecha_cambio', 'fecha_cambio'),
+)
+
+COLUMNAS_ASIGNACIONES_ROL = (
+    ('id', 'id'),
+    ('trabajador_id', 'trabajador_id'),
+    ('trabajador__nombre', 'trabajador_nombre'),
+    ('trabajador__apellido', 'trabajador_apellido'),
+    ('rol__nombre', 'rol'),
+    ('fecha_asignacion', 'fecha_asignacion'),
+    ('fecha_finalizacion', 'fecha_finalizacion'),
+    ('activo', 'activo'),
+    ('notas', 'notas'),
+)
+
+COLUMNAS_ASIGNACIONES_BUS = (
+    ('id', 'id'),
+    ('trabajador_id', 'trabajador_id'),
+    ('trabajador__nombre', 'trabajador_nombre'),
+    ('trabajador__apellido', 'trabajador_apellido'),
+    ('bus__patente', 'patente'),
+    ('turno', 'turno'),
+    ('fecha_asignacion', 'fecha_asignacion'),
+    ('fecha_finalizacion', 'fecha_finalizacion'),
+    ('activo', 'activo'),
+    ('notas', 'notas'),
+)
+
+
+def formato_exportacion(request):
+    """Formato solicitado con ?exportar=csv|json, o None si es un listado normal"""
+    formato = request.GET.get('exportar', '')
+    return formato if formato in FORMATOS else None
+
+
+def iterar_filas(queryset, lookups, tamano_lote=TAMANO_LOTE):
+    """
+    Genera tuplas de ``values_list`` recorriendo el queryset por lotes de pk.
+
+    Cada lote es una consulta ``WHERE pk > último ORDER BY pk LIMIT n`` que usa
+    el índice de la clave primaria, así que el costo por lote no crece con la
+    profundidad (a diferencia de OFFSET) y no depende de cursores del lado del
+    servidor, que pymysql no ofrece por defecto.
+    """
+    queryset = queryset.order_by('pk').values_list(*lookups)
+    ultimo = None
+    while True:
+        lote = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        filas = list(lote[:tamano_lote])
+        if not filas:
+            return
+        yield from filas
+        if len(filas) < tamano_lote:
+            return
+        ultimo = filas[-1][0]
+
+
+def _csv(encabezados, filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(encabezados)
+    for i, fila in enumerate(filas, start=1):
+        writer.writerow(fila)
+        if i % TAMANO_LOTE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json(encabezados, filas):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    partes = ['[']
+    separador = '\n'
+    for i, fila in enumerate(filas, start=1):
+        partes.append(separador + encoder.encode(dict(zip(encabezados, fila))))
+        separador = ',\n'
+        if i % TAMANO_LOTE == 0:
+            yield ''.join(partes)
+            partes = []
+    partes.append('\n]\n')
+    yield ''.join(partes)
+
+
+def exportar(queryset, columnas, nombre, formato):
+    """Respuesta en streaming con las filas del queryset en el formato pedido"""
+    lookups = [lookup for lookup, _ in columnas]
+    encabezados = [encabezado for _, encabezado in columnas]
+    filas = iterar_filas(queryset, lookups)
+    contenido = _csv(encabezados, filas) if formato == 'csv' else _json(encabezados, filas)
+
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    fecha = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}_{fecha}.{formato}"'
+    return response
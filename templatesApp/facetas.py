@@ -0,0 +1,139 @@
+"""
+Conteos por faceta de los filtros de los listados (activo, turno, estado...).
+
+Para cada búsqueda se ejecuta una sola consulta ``GROUP BY`` sobre todas las
+dimensiones del listado (el "cubo" de conteos), que se guarda en caché por
+``FACETAS_TIMEOUT`` segundos. A partir del cubo se obtiene, para cada opción de
+cada dimensión, cuántas filas quedarían al elegirla manteniendo los demás filtros
+seleccionados, sin volver a consultar la base de datos al cambiar de filtro.
+"""
+import hashlib
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .basedatos import timeout_cache
+
+
+FACETAS_TIMEOUT = getattr(settings, 'FACETAS_TIMEOUT', 60)
+
+# Parámetros que no se conservan en los enlaces de las facetas
+PARAMETROS_IGNORADOS = ('page', 'cursor', 'exportar')
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """Filtro de un listado: parámetro GET, campo del modelo y opciones"""
+    parametro: str
+    campo: str
+    # (valor del parámetro, valor del campo, etiqueta)
+    opciones: tuple
+    titulo: str = ''
+
+
+def dimension_activo(titulo='Estado'):
+    return Dimension('estado', 'activo', (('activo', True, 'Activos'), ('inactivo', False, 'Inactivos')), titulo)
+
+
+def dimension_opciones(parametro, campo, choices, titulo='', sin_valor=None):
+    """Dimensión a partir de los choices de un campo; ``sin_valor`` agrega la opción NULL"""
+    opciones = tuple((valor, valor, etiqueta) for valor, etiqueta in choices)
+    if sin_valor:
+        opciones += (sin_valor[0], None, sin_valor[1]),
+    return Dimension(parametro, campo, opciones, titulo)
+
+
+def seleccion(request, dimensiones):
+    """Valores del campo elegidos en ?parametro=, por dimensión (solo opciones válidas)"""
+    elegidos = {}
+    for dimension in dimensiones:
+        parametro = request.GET.get(dimension.parametro, '')
+        for valor_parametro, valor_campo, _ in dimension.opciones:
+            if valor_parametro == parametro:
+                elegidos[dimension.campo] = valor_campo
+    return elegidos
+
+
+def filtrar(queryset, dimensiones, elegidos):
+    """Aplica al queryset los valores elegidos de cada dimensión"""
+    for dimension in dimensiones:
+        if dimension.campo in elegidos:
+            valor = elegidos[dimension.campo]
+            if valor is None:
+                queryset = queryset.filter(**{f'{dimension.campo}__isnull': True})
+            else:
+                queryset = queryset.filter(**{dimension.campo: valor})
+    return queryset
+
+
+def cubo(queryset, dimensiones, nombre, termino=''):
+    """
+    Conteo por combinación de valores de las dimensiones, desde caché o con
+    un único ``SELECT campos, COUNT(*) ... GROUP BY campos``.
+    """
+    clave = 'templatesApp:facetas:{}:{}'.format(
+        nombre, hashlib.md5(termino.strip().lower().encode()).hexdigest()
+    )
+    filas = cache.get(clave)
+    if filas is None:
+        campos = [dimension.campo for dimension in dimensiones]
+        filas = list(queryset.order_by().values_list(*campos).annotate(total=Count('pk')))
+        cache.set(clave, filas, timeout_cache(FACETAS_TIMEOUT))
+    return filas
+
+
+def contar_facetas(request, queryset, dimensiones, nombre, termino=''):
+    """
+    Facetas para la plantilla ``facetas.html``. ``queryset`` debe tener aplicada
+    la búsqueda pero no los filtros de las dimensiones.
+
+    El total de cada opción respeta los filtros elegidos en las otras dimensiones
+    (no el de la propia, para poder ver las alternativas).
+    """
+    filas = cubo(queryset, dimensiones, nombre, termino)
+    elegidos = seleccion(request, dimensiones)
+
+    facetas = []
+    for i, dimension in enumerate(dimensiones):
+        totales = {}
+        for fila in filas:
+            if all(
+                fila[j] == elegidos[otra.campo]
+                for j, otra in enumerate(dimensiones) if j != i and otra.campo in elegidos
+            ):
+                totales[fila[i]] = totales.get(fila[i], 0) + fila[-1]
+
+        opciones = [
+            {
+                'valor': valor_parametro,
+                'etiqueta': etiqueta,
+                'total': totales.get(valor_campo, 0),
+                'seleccionada': dimension.campo in elegidos and elegidos[dimension.campo] == valor_campo,
+                'query': _query(request, dimension.parametro, valor_parametro),
+            }
+            for valor_parametro, valor_campo, etiqueta in dimension.opciones
+            # Las opciones NULL solo se muestran si hay filas sin valor
+            if valor_campo is not None or totales.get(None)
+        ]
+        facetas.append({
+            'parametro': dimension.parametro,
+            'titulo': dimension.titulo,
+            'total': sum(totales.values()),
+            'seleccionada': dimension.campo in elegidos,
+            'query': _query(request, dimension.parametro, None),
+            'opciones': opciones,
+        })
+    return facetas
+
+
+def _query(request, parametro, valor):
+    """Query string actual con ``parametro`` reemplazado (o quitado si valor es None)"""
+    query = request.GET.copy()
+    for ignorado in PARAMETROS_IGNORADOS:
+        query.pop(ignorado, None)
+    query.pop(parametro, None)
+    if valor is not None:
+        query[parametro] = valor
+    return query.urlencode()
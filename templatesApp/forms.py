@@ -1,12 +1,65 @@
 from django import forms
 from django.db import models 
 from django.db.models import Q
+from django.urls import reverse_lazy
+from django.utils.text import format_lazy
 from .models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus
+from .conflictos import CAMPOS_MENSAJE, conflictos_asignacion, mensaje_conflicto
 from django.core.exceptions import ValidationError
 import re
 from datetime import date
 
 
+class AutocompleteSelect(forms.Select):
+    """
+    Select que solo renderiza la opción seleccionada; el resto se obtiene bajo
+    demanda desde un endpoint JSON de autocompletado. La validación del valor
+    enviado sigue siendo la del ModelChoiceField (una consulta por pk).
+    """
+
+    class Media:
+        js = ('js/autocompletar.js',)
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = str(self.url)
+        return context
+
+    @staticmethod
+    def _validos(todas, valores):
+        """Valores enviados que el campo clave acepta; los demás los rechaza la validación del form"""
+        modelo = todas.queryset.model
+        campo = modelo._meta.get_field(todas.field.to_field_name) if todas.field.to_field_name else modelo._meta.pk
+        validos = []
+        for valor in valores:
+            try:
+                validos.append(campo.to_python(valor))
+            except (ValidationError, ValueError, TypeError):
+                continue
+        return validos
+
+    def optgroups(self, name, value, attrs=None):
+        todas = self.choices
+        if hasattr(todas, 'queryset'):
+            seleccionados = self._validos(todas, [v for v in value if v])
+            campo = todas.field.to_field_name or 'pk'
+            queryset = (
+                todas.queryset.filter(**{f'{campo}__in': seleccionados}) if seleccionados
+                else todas.queryset.none()
+            )
+            self.choices = [('', todas.field.empty_label or '')] + [
+                (obj.pk, todas.field.label_from_instance(obj)) for obj in queryset
+            ]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = todas
+
+
 class TrabajadorForm(forms.ModelForm):
     class Meta:
         model = Trabajador
@@ -260,7 +313,7 @@ class EstadoBusForm(forms.ModelForm):
         model = EstadoBus
         fields = ['bus', 'estado', 'observaciones', 'kilometraje']
         widgets = {
-            'bus': forms.Select(attrs={
+            'bus': AutocompleteSelect(reverse_lazy('autocompletar_buses'), attrs={
                 'class': 'form-control'
             }),
             'estado': forms.Select(attrs={
@@ -328,10 +381,10 @@ class AsignacionRolForm(forms.ModelForm):
         model = AsignacionRol
         fields = ['trabajador', 'rol', 'fecha_finalizacion', 'activo', 'notas']
         widgets = {
-            'trabajador': forms.Select(attrs={
+            'trabajador': AutocompleteSelect(reverse_lazy('autocompletar_trabajadores'), attrs={
                 'class': 'form-control'
             }),
-            'rol': forms.Select(attrs={
+            'rol': AutocompleteSelect(reverse_lazy('autocompletar_roles'), attrs={
                 'class': 'form-control'
             }),
             'fecha_finalizacion': forms.DateInput(attrs={
@@ -414,10 +467,10 @@ class AsignacionBusForm(forms.ModelForm):
         model = AsignacionBus
         fields = ['trabajador', 'bus', 'fecha_finalizacion', 'turno', 'activo', 'notas']
         widgets = {
-            'trabajador': forms.Select(attrs={
+            'trabajador': AutocompleteSelect(reverse_lazy('autocompletar_trabajadores'), attrs={
                 'class': 'form-control'
             }),
-            'bus': forms.Select(attrs={
+            'bus': AutocompleteSelect(format_lazy('{}?disponibles=1', reverse_lazy('autocompletar_buses')), attrs={
                 'class': 'form-control'
             }),
             'fecha_finalizacion': forms.DateInput(attrs={
@@ -453,9 +506,9 @@ class AsignacionBusForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filtrar solo trabajadores y buses activos
+        # Filtrar solo trabajadores activos y buses disponibles (activos y operativos)
         self.fields['trabajador'].queryset = Trabajador.objects.filter(activo=True)
-        self.fields['bus'].queryset = Bus.objects.filter(activo=True)
+        self.fields['bus'].queryset = Bus.disponibles()
         
         # Si estamos editando, permitir el trabajador/bus actual aunque estén inactivos
         if self.instance.pk:
@@ -464,9 +517,7 @@ class AsignacionBusForm(forms.ModelForm):
                     models.Q(activo=True) | models.Q(pk=self.instance.trabajador.pk)
                 )
             if self.instance.bus:
-                self.fields['bus'].queryset = Bus.objects.filter(
-                    models.Q(activo=True) | models.Q(pk=self.instance.bus.pk)
-                )
+                self.fields['bus'].queryset = Bus.disponibles() | Bus.objects.filter(pk=self.instance.bus.pk)
 
     def clean_fecha_finalizacion(self):
         fecha_fin = self.cleaned_data.get('fecha_finalizacion')
@@ -498,5 +549,44 @@ class AsignacionBusForm(forms.ModelForm):
                 raise ValidationError(
                     f'Ya existe una asignación activa del bus "{bus.patente}" para {trabajador} en el turno {turno}'
                 )
+            
+            # Validar que ni el trabajador ni el bus tengan ocupado el turno desde
+            # hoy, como la carga masiva: lo ya ocurrido no cambia al editar
+            desde = date.today()
+            if self.instance.fecha_asignacion:
+                desde = max(desde, self.instance.fecha_asignacion)
+            conflicto = conflictos_asignacion(
+                trabajador.pk, bus.pk, turno,
+                desde=desde,
+                hasta=cleaned_data.get('fecha_finalizacion'),
+                excluir=self.instance.pk,
+            ).values(*CAMPOS_MENSAJE).first()
+            if conflicto:
+                raise ValidationError(mensaje_conflicto(trabajador.pk, conflicto))
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class ImportacionForm(forms.Form):
+    ENTIDADES_CHOICES = [
+        ('trabajadores', 'Trabajadores'),
+        ('buses', 'Buses'),
+        ('roles', 'Roles'),
+    ]
+
+    entidad = forms.ChoiceField(
+        choices=ENTIDADES_CHOICES,
+        label='Tipo de datos',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    archivo = forms.FileField(
+        label='Archivo',
+        help_text='CSV o XLSX con una fila de encabezados con los nombres de los campos',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data.get('archivo')
+        if archivo and not archivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError('Formato no soportado: use archivos .csv o .xlsx')
+        return archivo
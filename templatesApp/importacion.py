@@ -0,0 +1,289 @@
+"""
+Importación masiva de trabajadores, buses y roles desde CSV o XLSX.
+
+Los archivos se leen en streaming y se procesan por lotes: cada fila pasa por
+la misma validación que el formulario de la entidad, la unicidad (patente,
+nombre de rol) se verifica con una sola consulta por lote y las filas válidas
+se insertan con bulk_create dentro de una transacción por lote.
+
+Los problemas de una fila (o del archivo a partir de una fila) quedan en el
+reporte de errores; las demás filas se importan igual.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from itertools import islice
+from zipfile import BadZipFile
+
+from django.db import IntegrityError, router, transaction
+from django.utils.text import capfirst
+
+from .forms import TrabajadorForm, RolForm, BusForm
+from .search import CAMPOS_BUSQUEDA, get_backend
+from .stats import invalidar_dashboard_stats
+
+
+TAMANO_LOTE = 1000
+
+VALORES_FALSOS = {'0', 'no', 'false', 'f', 'n', 'falso', 'inactivo'}
+
+# Alias de columnas aceptados en los encabezados
+ALIAS_COLUMNAS = {
+    'anio': 'año',
+    'ano': 'año',
+}
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+def _sin_validar_restricciones(exclude=None):
+    pass
+
+
+class _ImportacionMixin:
+    """Ajusta un ModelForm para validarse dentro de un lote"""
+
+    def _post_clean(self):
+        # Las restricciones CheckConstraint ya las cubren los clean_* del
+        # formulario; validarlas aquí costaría una consulta por fila.
+        self.instance.validate_constraints = _sin_validar_restricciones
+        super()._post_clean()
+
+    def validate_unique(self):
+        # La unicidad se verifica por lote en Importador._validar_unicos
+        pass
+
+
+def _form_importacion(form_class):
+    return type(f'Importacion{form_class.__name__}', (_ImportacionMixin, form_class), {})
+
+
+@dataclass
+class Entidad:
+    form_class: type
+    campos_unicos: tuple = ()
+
+    @property
+    def modelo(self):
+        return self.form_class._meta.model
+
+
+ENTIDADES = {
+    'trabajadores': Entidad(_form_importacion(TrabajadorForm)),
+    'buses': Entidad(_form_importacion(BusForm), campos_unicos=('patente',)),
+    'roles': Entidad(_form_importacion(RolForm), campos_unicos=('nombre',)),
+}
+
+
+@dataclass
+class ResultadoImportacion:
+    creados: int = 0
+    procesados: int = 0
+    errores: list = field(default_factory=list)
+    requiere_reindexar: bool = False
+
+    def agregar_error(self, fila, errores):
+        self.errores.append({'fila': fila, 'errores': errores})
+
+
+def _normalizar_fila(fila):
+    datos = {}
+    for columna, valor in fila.items():
+        if columna is None:
+            continue
+        columna = columna.strip().lower()
+        columna = ALIAS_COLUMNAS.get(columna, columna)
+        datos[columna] = '' if valor is None else str(valor).strip()
+
+    # En el formulario un checkbox ausente es False; al importar, el valor por
+    # defecto es activo.
+    activo = datos.get('activo', '')
+    datos['activo'] = 'false' if activo.lower() in VALORES_FALSOS else 'true'
+    return datos
+
+
+def leer_csv(archivo, encoding='utf-8-sig'):
+    """Itera las filas de un CSV (binario o texto) como diccionarios"""
+    if isinstance(archivo, io.TextIOBase):
+        texto = archivo
+    else:
+        texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    yield from csv.DictReader(texto, dialect=dialecto)
+
+
+def leer_xlsx(archivo):
+    """Itera las filas de la primera hoja de un XLSX como diccionarios"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion('Para importar archivos XLSX instale openpyxl (pip install openpyxl)')
+
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError):
+        raise ErrorImportacion('El archivo XLSX está dañado o no es un libro de Excel')
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezados = [str(c) if c is not None else None for c in next(filas, [])]
+        for valores in filas:
+            if any(v is not None for v in valores):
+                yield dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def leer_archivo(archivo, nombre):
+    """Elige el lector según la extensión del nombre de archivo"""
+    nombre = nombre.lower()
+    if nombre.endswith('.xlsx'):
+        return leer_xlsx(archivo)
+    if nombre.endswith(('.csv', '.txt')):
+        return leer_csv(archivo)
+    raise ErrorImportacion('Formato no soportado: use archivos .csv o .xlsx')
+
+
+class Importador:
+    def __init__(self, entidad, tamano_lote=TAMANO_LOTE):
+        if entidad not in ENTIDADES:
+            raise ErrorImportacion(f'Entidad desconocida: {entidad}')
+        self.entidad = ENTIDADES[entidad]
+        self.modelo = self.entidad.modelo
+        self.tamano_lote = tamano_lote
+        self.vistos = {campo: set() for campo in self.entidad.campos_unicos}
+        # Un solo formulario reutilizado: construir uno por fila copia (deepcopy)
+        # todos sus campos y widgets, lo que domina el costo en archivos grandes.
+        self.form = self.entidad.form_class(data={})
+
+    def importar(self, filas):
+        """Valida e inserta las filas por lotes; retorna un ResultadoImportacion"""
+        resultado = ResultadoImportacion()
+        numeradas = self._numerar(filas, resultado)
+        while True:
+            lote = list(islice(numeradas, self.tamano_lote))
+            if not lote:
+                break
+            self._procesar_lote(lote, resultado)
+        if resultado.creados:
+            invalidar_dashboard_stats()
+        return resultado
+
+    @staticmethod
+    def _numerar(filas, resultado):
+        """
+        Numera las filas (la 1 es el encabezado); si el archivo no se puede
+        seguir leyendo, el error queda en la fila donde ocurrió
+        """
+        numero = 0
+        try:
+            for numero, fila in enumerate(filas, start=2):
+                yield numero, fila
+        except (ErrorImportacion, csv.Error, UnicodeDecodeError) as e:
+            resultado.agregar_error(numero + 1, {'archivo': [f'No se pudo leer el archivo: {e}']})
+
+    def _procesar_lote(self, lote, resultado):
+        validos = []
+        for numero, fila in lote:
+            resultado.procesados += 1
+            try:
+                form = self._validar(_normalizar_fila(fila))
+                valido = form.is_valid()
+            except Exception as e:
+                resultado.agregar_error(numero, {'__all__': [f'Error al validar la fila: {e}']})
+                continue
+            if valido:
+                validos.append((numero, form.instance))
+            else:
+                resultado.agregar_error(numero, {
+                    campo: [str(e) for e in errores] for campo, errores in form.errors.items()
+                })
+
+        validos = self._validar_unicos(validos, resultado)
+        if not validos:
+            return
+
+        usando = router.db_for_write(self.modelo)
+        try:
+            with transaction.atomic(using=usando):
+                creados = self._insertar([instancia for _, instancia in validos], resultado)
+        except IntegrityError:
+            # Otra importación o un usuario insertó el mismo valor único entre la
+            # verificación y el insert: se reintenta fila por fila
+            for _, instancia in validos:
+                instancia.pk = None
+                instancia._state.adding = True
+            creados = []
+            for numero, instancia in validos:
+                try:
+                    with transaction.atomic(using=usando):
+                        creados += self._insertar([instancia], resultado)
+                except IntegrityError as e:
+                    resultado.agregar_error(numero, {'__all__': [f'No se pudo guardar: {e}']})
+        resultado.creados += len(creados)
+
+    def _insertar(self, instancias, resultado):
+        creados = self.modelo.objects.bulk_create(instancias)
+        self._indexar(creados, resultado)
+        return creados
+
+    def _validar(self, datos):
+        """Reinicia el formulario con los datos de una fila y una instancia nueva"""
+        form = self.form
+        form.data = datos
+        form.instance = self.modelo()
+        form._errors = None
+        return form
+
+    def _validar_unicos(self, validos, resultado):
+        """Descarta duplicados contra la BD (una consulta por campo) y el propio archivo"""
+        for campo in self.entidad.campos_unicos:
+            valores = {getattr(instancia, campo) for _, instancia in validos}
+            existentes = set(
+                self.modelo.objects.filter(**{f'{campo}__in': valores}).values_list(campo, flat=True)
+            )
+            etiqueta = self.modelo._meta.get_field(campo).verbose_name
+            restantes = []
+            for numero, instancia in validos:
+                valor = getattr(instancia, campo)
+                if valor in self.vistos[campo]:
+                    resultado.agregar_error(numero, {campo: [f'{capfirst(etiqueta)} "{valor}" repetido en el archivo']})
+                elif valor in existentes:
+                    resultado.agregar_error(numero, {campo: [f'Ya existe un registro con {etiqueta} "{valor}"']})
+                else:
+                    self.vistos[campo].add(valor)
+                    restantes.append((numero, instancia))
+            validos = restantes
+        return validos
+
+    def _indexar(self, creados, resultado):
+        """bulk_create no emite post_save: se indexa la búsqueda del lote aquí"""
+        backend = get_backend()
+        if not backend.mantiene_indice:
+            return
+        if any(obj.pk is None for obj in creados):
+            # El motor no retorna los ids de bulk_create (MySQL)
+            resultado.requiere_reindexar = True
+            return
+        campos = CAMPOS_BUSQUEDA[self.modelo]
+        backend.indexar_lote(
+            self.modelo, [(obj.pk, *(getattr(obj, c) for c in campos)) for obj in creados]
+        )
+
+
+def escribir_reporte(errores, destino):
+    """Escribe el reporte de errores por fila en formato CSV"""
+    writer = csv.writer(destino)
+    writer.writerow(['fila', 'campo', 'error'])
+    for error in errores:
+        for campo, mensajes in error['errores'].items():
+            for mensaje in mensajes:
+                writer.writerow([error['fila'], campo, mensaje])
@@ -0,0 +1,116 @@
+"""
+Insignias (badges) y URLs de fila precalculadas para los listados.
+
+Los listados armaban la insignia de cada fila con una cadena
+``{% if estado.estado == 'OPERATIVO' %}...{% elif %}`` que se evalúa completa
+por fila, y el admin la reconstruía con ``format_html`` en cada fila. Aquí cada
+insignia se arma una sola vez al importar el módulo; por fila solo queda una
+búsqueda en un dict. Las plantillas las usan con los filtros de
+``{% load insignias %}`` y el admin con ``insignia_admin_*``.
+
+Del mismo modo ``url_fila`` reemplaza a los ``{% url 'bus_detalle' bus.id %}``
+de cada fila: la URL se invierte una vez por nombre y por fila solo se inserta
+el id.
+"""
+from functools import lru_cache
+
+from django.urls import get_script_prefix, reverse
+from django.utils.html import format_html
+
+from .models import ESTADOS_BUS
+
+
+# Código -> (clase de Bootstrap, icono de Font Awesome, etiqueta)
+ESTILO_ESTADO = {
+    'OPERATIVO': ('bg-success', 'fa-check-circle', 'Operativo'),
+    'MANTENIMIENTO': ('bg-warning', 'fa-wrench', 'Mantenimiento'),
+    'REPARACION': ('bg-danger', 'fa-tools', 'Reparación'),
+    'FUERA_SERVICIO': ('bg-danger', 'fa-times-circle', 'Fuera de Servicio'),
+    'RESERVADO': ('bg-info', 'fa-lock', 'Reservado'),
+}
+
+ESTILO_TURNO = {
+    'MAÑANA': ('bg-warning', 'fa-sun', 'Mañana'),
+    'TARDE': ('bg-info', 'fa-cloud', 'Tarde'),
+    'NOCHE': ('bg-dark', 'fa-moon', 'Noche'),
+}
+
+# Colores de las insignias del admin (sin Bootstrap, con estilo en línea)
+COLOR_ESTADO_ADMIN = {
+    'OPERATIVO': '#28a745',
+    'MANTENIMIENTO': '#ffc107',
+    'REPARACION': '#fd7e14',
+    'FUERA_SERVICIO': '#dc3545',
+    'RESERVADO': '#17a2b8',
+}
+COLOR_ADMIN_DEFECTO = '#6c757d'
+
+
+def _insignia(clase, icono, etiqueta):
+    return format_html('<span class="badge {}"><i class="fas {}"></i> {}</span>', clase, icono, etiqueta)
+
+
+def _insignia_admin(color, etiqueta):
+    return format_html(
+        '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
+        color,
+        etiqueta
+    )
+
+
+INSIGNIAS_ESTADO = {codigo: _insignia(*estilo) for codigo, estilo in ESTILO_ESTADO.items()}
+INSIGNIAS_TURNO = {codigo: _insignia(*estilo) for codigo, estilo in ESTILO_TURNO.items()}
+
+INSIGNIAS_ACTIVO = {
+    True: format_html('<span class="badge badge-activo">{}</span>', 'Activo'),
+    False: format_html('<span class="badge badge-inactivo">{}</span>', 'Inactivo'),
+}
+INSIGNIAS_ACTIVA = {
+    True: format_html('<span class="badge badge-activo">{}</span>', 'Activa'),
+    False: format_html('<span class="badge badge-inactivo">{}</span>', 'Inactiva'),
+}
+
+INSIGNIAS_ADMIN_ESTADO = {
+    codigo: _insignia_admin(COLOR_ESTADO_ADMIN.get(codigo, COLOR_ADMIN_DEFECTO), etiqueta)
+    for codigo, etiqueta in ESTADOS_BUS
+}
+INSIGNIAS_ADMIN_ACTIVO = {
+    True: _insignia_admin('#28a745', 'Activo'),
+    False: _insignia_admin('#dc3545', 'Inactivo'),
+}
+INSIGNIAS_ADMIN_ASIGNACION = {
+    True: _insignia_admin('#28a745', 'Activa'),
+    False: _insignia_admin(COLOR_ADMIN_DEFECTO, 'Finalizada'),
+}
+
+
+def insignia_estado(codigo):
+    """Insignia del estado de un bus; vacía si no tiene estado"""
+    return INSIGNIAS_ESTADO.get(codigo, '')
+
+
+def insignia_turno(codigo):
+    return INSIGNIAS_TURNO.get(codigo, '')
+
+
+def insignia_admin_estado(obj):
+    insignia = INSIGNIAS_ADMIN_ESTADO.get(obj.estado)
+    if insignia is None:
+        return _insignia_admin(COLOR_ADMIN_DEFECTO, obj.get_estado_display())
+    return insignia
+
+
+# Id de relleno con el que se invierte la URL una sola vez por nombre
+_ID_MARCADOR = '2147483647'
+
+
+@lru_cache(maxsize=None)
+def _partes_url(nombre, prefijo):
+    # El prefijo (SCRIPT_NAME) es parte de la clave: reverse lo incluye
+    return tuple(reverse(nombre, args=[_ID_MARCADOR]).split(_ID_MARCADOR, 1))
+
+
+def url_fila(pk, nombre):
+    """Igual que ``reverse(nombre, args=[pk])`` para las rutas ``<int:pk>``"""
+    inicio, fin = _partes_url(nombre, get_script_prefix())
+    return f'{inicio}{int(pk)}{fin}'
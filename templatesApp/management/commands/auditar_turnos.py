@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.conflictos import detectar_conflictos
+
+
+class Command(BaseCommand):
+    help = (
+        'Informa los conflictos de turnos de la flota: trabajadores con dos buses en el mismo '
+        'turno y buses con dos conductores, en días superpuestos (pensado para ejecutarse cada noche)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde', type=date.fromisoformat, default=None,
+            help='Inicio del rango a revisar (AAAA-MM-DD); por defecto hoy'
+        )
+        parser.add_argument(
+            '--hasta', type=date.fromisoformat, default=None,
+            help='Fin (exclusivo) del rango a revisar; por defecto sin límite'
+        )
+        parser.add_argument(
+            '--mostrar', type=int, default=20,
+            help='Cantidad de conflictos a listar por tipo'
+        )
+
+    def handle(self, *args, **options):
+        desde = options['desde'] or date.today()
+        conflictos = detectar_conflictos(desde, options['hasta'])
+
+        for tipo, etiqueta in (('trabajador', 'Trabajadores con dos buses'), ('bus', 'Buses con dos conductores')):
+            del_tipo = [conflicto for conflicto in conflictos if conflicto.tipo == tipo]
+            if not del_tipo:
+                self.stdout.write(f'{etiqueta}: ninguno')
+                continue
+            self.stdout.write(self.style.WARNING(f'{etiqueta}: {len(del_tipo)} conflictos'))
+            for conflicto in del_tipo[:options['mostrar']]:
+                hasta = conflicto.hasta.isoformat() if conflicto.hasta else 'sin fin'
+                self.stdout.write(
+                    f'  {tipo} {conflicto.clave} turno {conflicto.turno}: asignaciones '
+                    f'{" y ".join(map(str, conflicto.asignaciones))} desde {conflicto.desde} hasta {hasta}'
+                )
+
+        if conflictos:
+            raise CommandError(f'{len(conflictos)} conflictos de turnos desde {desde}.')
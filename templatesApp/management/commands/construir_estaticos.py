@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.estaticos import ErrorEstaticos, cargar_brotli, cargar_pillow, vendorizar
+
+
+class Command(BaseCommand):
+    help = (
+        'Descarga Bootstrap y Font Awesome a static/vendor y ejecuta collectstatic: nombres con hash '
+        'y manifiesto, CSS minificado y variantes .gz/.br y WebP en STATIC_ROOT'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sin-descargar', action='store_true',
+            help='No descarga los archivos de terceros (usa los que ya estén en static/vendor)'
+        )
+        parser.add_argument('--forzar', action='store_true', help='Vuelve a descargar los de terceros')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if not options['sin_descargar']:
+            try:
+                descargados = vendorizar(forzar=options['forzar'])
+            except ErrorEstaticos as e:
+                raise CommandError(f'{e} (use --sin-descargar para omitir la descarga)')
+            self.stdout.write(f'{len(descargados)} archivos de terceros descargados')
+
+        if not cargar_brotli():
+            self.stdout.write(self.style.WARNING('Sin variantes .br: instale brotli (pip install brotli)'))
+        if not cargar_pillow():
+            self.stdout.write(self.style.WARNING('Sin variantes WebP: instale Pillow (pip install Pillow)'))
+
+        call_command('collectstatic', interactive=False, clear=True, verbosity=0)
+
+        tamanos = {'': 0, '.gz': 0, '.br': 0}
+        archivos = 0
+        for carpeta, _, nombres in os.walk(settings.STATIC_ROOT):
+            for nombre in nombres:
+                extension = os.path.splitext(nombre)[1]
+                clave = extension if extension in tamanos else ''
+                tamanos[clave] += os.path.getsize(os.path.join(carpeta, nombre))
+                archivos += clave == ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{archivos} archivos en {settings.STATIC_ROOT} ({tamanos[""] / 1024:.0f} KB; '
+            f'.gz {tamanos[".gz"] / 1024:.0f} KB, .br {tamanos[".br"] / 1024:.0f} KB) '
+            f'en {time.perf_counter() - inicio:.1f} s'
+        ))
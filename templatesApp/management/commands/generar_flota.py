@@ -0,0 +1,58 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.datos_sinteticos import ConfiguracionFlota, GeneradorFlota
+
+
+class Command(BaseCommand):
+    help = 'Genera una flota sintética determinista (trabajadores, buses, roles y asignaciones) para benchmarks'
+
+    def add_arguments(self, parser):
+        defecto = ConfiguracionFlota()
+        parser.add_argument('--trabajadores', type=int, default=defecto.trabajadores)
+        parser.add_argument('--buses', type=int, default=defecto.buses)
+        parser.add_argument('--roles', type=int, default=defecto.roles)
+        parser.add_argument('--asignaciones-rol', type=int, default=defecto.asignaciones_rol)
+        parser.add_argument('--asignaciones-bus', type=int, default=defecto.asignaciones_bus)
+        parser.add_argument('--semilla', type=int, default=defecto.semilla)
+        parser.add_argument(
+            '--fecha', type=date.fromisoformat, default=defecto.fecha,
+            help='Fecha de referencia (AAAA-MM-DD); las asignaciones cubren los días anteriores'
+        )
+        parser.add_argument('--dias', type=int, default=defecto.dias)
+        parser.add_argument('--lote', type=int, default=defecto.lote, help='Filas por bulk_create')
+        parser.add_argument(
+            '--limpiar', action='store_true',
+            help='Vacía antes las tablas de la aplicación (¡borra todos los datos!)'
+        )
+
+    def handle(self, *args, **options):
+        config = ConfiguracionFlota(
+            trabajadores=options['trabajadores'],
+            buses=options['buses'],
+            roles=options['roles'],
+            asignaciones_rol=options['asignaciones_rol'],
+            asignaciones_bus=options['asignaciones_bus'],
+            semilla=options['semilla'],
+            fecha=options['fecha'],
+            dias=options['dias'],
+            lote=options['lote'],
+        )
+        generador = GeneradorFlota(config, informar=self.stdout.write)
+
+        if options['limpiar']:
+            generador.limpiar()
+        elif generador.existen_datos():
+            raise CommandError(
+                'La base ya tiene datos: use --limpiar para vaciarla y generar una flota reproducible'
+            )
+
+        inicio = time.perf_counter()
+        conteos = generador.generar()
+        for modelo, cantidad in conteos.items():
+            self.stdout.write(f'  {modelo}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Flota generada en {time.perf_counter() - inicio:.1f} s (semilla {config.semilla})'
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.importacion import ENTIDADES, TAMANO_LOTE, ErrorImportacion, Importador, leer_archivo, escribir_reporte
+
+
+class Command(BaseCommand):
+    help = 'Importa trabajadores, buses o roles desde un archivo CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidad', choices=sorted(ENTIDADES))
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por transacción')
+        parser.add_argument('--reporte', help='Ruta del CSV con los errores por fila')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                filas = leer_archivo(archivo, options['archivo'])
+                resultado = Importador(options['entidad'], options['lote']).importar(filas)
+        except (OSError, ErrorImportacion) as e:
+            raise CommandError(str(e))
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', newline='', encoding='utf-8') as destino:
+                escribir_reporte(resultado.errores, destino)
+        else:
+            for error in resultado.errores[:50]:
+                self.stderr.write(f"Fila {error['fila']}: {error['errores']}")
+            if len(resultado.errores) > 50:
+                self.stderr.write(f'... y {len(resultado.errores) - 50} filas más con errores (use --reporte)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.creados} de {resultado.procesados} filas importadas "
+            f"({len(resultado.errores)} con errores) en {time.perf_counter() - inicio:.1f} s"
+        ))
+        if resultado.requiere_reindexar:
+            self.stdout.write(self.style.WARNING(
+                'El motor no retornó los ids insertados: ejecute reindexar_busqueda'
+            ))
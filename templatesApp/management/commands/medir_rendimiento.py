@@ -0,0 +1,327 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from templatesApp import urls as app_urls
+from templatesApp.consultas import RegistroConsultas
+from templatesApp.forms import (
+    TrabajadorForm, RolForm, BusForm, EstadoBusForm, AsignacionRolForm, AsignacionBusForm
+)
+from templatesApp.models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus
+
+
+USUARIO_BENCHMARK = 'benchmark'
+
+
+@dataclass
+class Caso:
+    nombre: str
+    url_name: str
+    url: str
+    metodo: str = 'GET'
+    datos: dict = field(default_factory=dict)
+    anonimo: bool = False
+
+
+def _muestra(queryset):
+    """Objeto determinista cercano a la mitad del rango de ids (sin OFFSET)"""
+    rango = queryset.aggregate(minimo=Min('pk'), maximo=Max('pk'))
+    if rango['minimo'] is None:
+        return None
+    medio = (rango['minimo'] + rango['maximo']) // 2
+    return queryset.filter(pk__gte=medio).order_by('pk').first()
+
+
+def _datos_formulario(form_class, instancia):
+    """Datos POST equivalentes a reenviar el formulario de edición sin cambios"""
+    form = form_class(instance=instancia)
+    datos = {}
+    for nombre in form.fields:
+        valor = form.initial.get(nombre)
+        if valor is None or valor is False:
+            continue
+        datos[nombre] = 'on' if valor is True else valor
+    return datos
+
+
+def _percentil(valores, percentil):
+    if len(valores) < 2:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[percentil - 1]
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95), consultas SQL y memoria pico de cada URL de la aplicación '
+        'sobre los datos de la base configurada (ver generar_flota) y guarda el resultado en JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salida', default='benchmark.json', help='Archivo JSON de resultados')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--calentamiento', type=int, default=2, help='Ejecuciones previas no medidas')
+        parser.add_argument('--filtro', default='', help='Solo los casos cuyo nombre contenga este texto')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior con el que comparar')
+        parser.add_argument(
+            '--umbral', type=float, default=20.0,
+            help='Porcentaje de aumento del p50 que se informa como regresión al comparar'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser al menos 1')
+
+        casos = [c for c in self._casos() if options['filtro'] in c.nombre]
+        if not casos:
+            raise CommandError('No hay casos que medir (¿base sin datos? use generar_flota)')
+        self._advertir_sin_cubrir(casos)
+
+        usuario, _ = User.objects.get_or_create(
+            username=USUARIO_BENCHMARK, defaults={'is_staff': True, 'is_superuser': True}
+        )
+        cliente = Client(raise_request_exception=False)
+        cliente.force_login(usuario)
+        anonimo = Client(raise_request_exception=False)
+
+        resultados = {}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for caso in casos:
+                resultado = self._medir(anonimo if caso.anonimo else cliente, caso, options)
+                resultados[caso.nombre] = resultado
+                self.stdout.write(
+                    f"{caso.nombre:<45} {resultado['status']:>4} "
+                    f"p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms  "
+                    f"{resultado['consultas']:>3} consultas  {resultado['memoria_pico_kb']:>7} KB"
+                )
+
+        informe = {'meta': self._meta(options), 'resultados': resultados}
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+            archivo.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            self._comparar(options['comparar'], resultados, options['umbral'])
+
+    # ---------------------------------------------------------------- medición
+
+    def _ejecutar(self, cliente, caso):
+        """Una petición; los POST se ejecutan en una transacción que se revierte"""
+        with ExitStack() as stack:
+            if caso.metodo == 'POST':
+                stack.enter_context(transaction.atomic(using=router.db_for_write(Trabajador)))
+                response = cliente.post(caso.url, caso.datos)
+                transaction.set_rollback(True, using=router.db_for_write(Trabajador))
+            else:
+                response = cliente.get(caso.url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        return response
+
+    def _medir(self, cliente, caso, options):
+        for _ in range(options['calentamiento']):
+            self._ejecutar(cliente, caso)
+
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            self._ejecutar(cliente, caso)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        # Consultas y memoria en ejecuciones aparte para no distorsionar los tiempos
+        registro = RegistroConsultas()
+        with registro.instalado():
+            response = self._ejecutar(cliente, caso)
+        tracemalloc.start()
+        try:
+            self._ejecutar(cliente, caso)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'url': caso.url,
+            'metodo': caso.metodo,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(tiempos), 3),
+            'p95_ms': round(_percentil(tiempos, 95), 3),
+            'min_ms': round(min(tiempos), 3),
+            'consultas': registro.cantidad,
+            'consultas_repetidas': len(registro.repetidas()),
+            'tiempo_db_ms': round(registro.tiempo * 1000, 3),
+            'memoria_pico_kb': pico // 1024,
+        }
+
+    def _meta(self, options):
+        connection = connections[router.db_for_read(Trabajador)]
+        return {
+            'commit': _commit_actual(),
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeticiones': options['repeticiones'],
+            'conteos': {
+                modelo._meta.model_name: modelo.objects.count()
+                for modelo in (Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus)
+            },
+        }
+
+    def _comparar(self, ruta, resultados, umbral):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anteriores = json.load(archivo)['resultados']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
+
+        self.stdout.write(f'\nComparación con {ruta}:')
+        regresiones = 0
+        for nombre, actual in resultados.items():
+            anterior = anteriores.get(nombre)
+            if not anterior:
+                continue
+            cambio = (actual['p50_ms'] - anterior['p50_ms']) / anterior['p50_ms'] * 100 if anterior['p50_ms'] else 0
+            linea = (
+                f"{nombre:<45} p50 {anterior['p50_ms']:8.2f} -> {actual['p50_ms']:8.2f} ms ({cambio:+6.1f}%)  "
+                f"consultas {anterior['consultas']} -> {actual['consultas']}"
+            )
+            if cambio > umbral or actual['consultas'] > anterior['consultas']:
+                regresiones += 1
+                self.stdout.write(self.style.WARNING(linea))
+            else:
+                self.stdout.write(linea)
+        if regresiones:
+            self.stdout.write(self.style.WARNING(f'{regresiones} casos con posibles regresiones'))
+
+    def _advertir_sin_cubrir(self, casos):
+        nombres = {
+            patron.name for patron in app_urls.urlpatterns
+            if isinstance(patron, URLPattern) and patron.name
+        }
+        sin_cubrir = sorted(nombres - {caso.url_name for caso in casos})
+        if sin_cubrir:
+            self.stdout.write(self.style.WARNING(f"URLs sin casos de benchmark: {', '.join(sin_cubrir)}"))
+
+    # ------------------------------------------------------------------ casos
+
+    def _casos(self):
+        trabajador = _muestra(Trabajador.objects.filter(activo=True))
+        rol = _muestra(Rol.objects.filter(activo=True))
+        bus = _muestra(Bus.objects.filter(activo=True, estado_actual='OPERATIVO'))
+        estado = _muestra(EstadoBus.objects.all())
+        asignacion_rol = _muestra(AsignacionRol.objects.filter(activo=True))
+        asignacion_bus = _muestra(AsignacionBus.objects.filter(activo=True))
+        if None in (trabajador, rol, bus, estado, asignacion_rol, asignacion_bus):
+            return []
+
+        casos = [
+            Caso('login', 'login', reverse('login'), anonimo=True),
+            Caso('index', 'index', reverse('index')),
+            Caso('importar', 'importar_datos', reverse('importar_datos')),
+            Caso('autocompletar_trabajadores', 'autocompletar_trabajadores',
+                 reverse('autocompletar_trabajadores') + '?' + urlencode({'q': trabajador.apellido[:3]})),
+            Caso('autocompletar_buses', 'autocompletar_buses',
+                 reverse('autocompletar_buses') + '?' + urlencode({'q': bus.patente[:2]})),
+            Caso('autocompletar_roles', 'autocompletar_roles',
+                 reverse('autocompletar_roles') + '?' + urlencode({'q': rol.nombre[:3]})),
+        ]
+
+        casos += self._casos_listado('trabajadores_list', Trabajador, trabajador.apellido.split()[0], 'estado=activo')
+        casos += self._casos_listado('roles_list', Rol, rol.nombre.split()[0], 'estado=activo')
+        casos += self._casos_listado('buses_list', Bus, bus.patente[:4], 'estado=activo&operativo=REPARACION')
+        casos += self._casos_listado('estados_bus_list', EstadoBus, bus.patente[:4], 'estado=REPARACION')
+        casos += self._casos_listado(
+            'asignaciones_rol_list', AsignacionRol, trabajador.apellido.split()[0], 'estado=activo'
+        )
+        casos += self._casos_listado(
+            'asignaciones_bus_list', AsignacionBus, bus.patente[:4], 'turno=NOCHE&estado=activo'
+        )
+
+        # Trabajador y bus sin asignaciones activas, para que los POST de creación sean válidos
+        libre = Trabajador.objects.filter(activo=True, roles_activos=0).first()
+        sin_bus = Trabajador.objects.filter(activo=True, buses_activos=0).first()
+        bus_sin_estado = Bus.objects.filter(activo=True, estado_actual__isnull=True).first()
+
+        crud = [
+            ('trabajador', trabajador, TrabajadorForm, {
+                'nombre': 'Benchmark', 'apellido': 'Rendimiento', 'direccion': 'Calle 1',
+                'contacto': '+56911111111', 'edad': 30, 'activo': 'on',
+            }),
+            ('rol', rol, RolForm, {
+                'nombre': 'Rol Benchmark', 'descripcion': 'Rol creado por el benchmark',
+                'nivel_acceso': 2, 'activo': 'on',
+            }),
+            ('bus', bus, BusForm, {
+                'patente': 'BNCH-01', 'modelo': 'O500', 'año': 2020, 'capacidad': 40,
+                'marca': 'Volvo', 'activo': 'on',
+            }),
+            ('estado_bus', estado, EstadoBusForm, bus_sin_estado and {
+                'bus': bus_sin_estado.pk, 'estado': 'OPERATIVO', 'kilometraje': 1000,
+            }),
+            ('asignacion_rol', asignacion_rol, AsignacionRolForm, libre and {
+                'trabajador': libre.pk, 'rol': rol.pk, 'activo': 'on',
+            }),
+            ('asignacion_bus', asignacion_bus, AsignacionBusForm, sin_bus and {
+                'trabajador': sin_bus.pk, 'bus': bus.pk, 'turno': 'MAÑANA', 'activo': 'on',
+            }),
+        ]
+        for prefijo, objeto, form_class, datos_crear in crud:
+            casos += [
+                Caso(f'{prefijo}_detalle', f'{prefijo}_detalle', reverse(f'{prefijo}_detalle', args=[objeto.pk])),
+                Caso(f'{prefijo}_crear', f'{prefijo}_crear', reverse(f'{prefijo}_crear')),
+                Caso(f'{prefijo}_editar', f'{prefijo}_editar', reverse(f'{prefijo}_editar', args=[objeto.pk])),
+                Caso(f'{prefijo}_editar_post', f'{prefijo}_editar', reverse(f'{prefijo}_editar', args=[objeto.pk]),
+                     'POST', _datos_formulario(form_class, objeto)),
+                Caso(f'{prefijo}_eliminar', f'{prefijo}_eliminar', reverse(f'{prefijo}_eliminar', args=[objeto.pk])),
+                Caso(f'{prefijo}_eliminar_post', f'{prefijo}_eliminar',
+                     reverse(f'{prefijo}_eliminar', args=[objeto.pk]), 'POST'),
+            ]
+            if datos_crear:
+                casos.append(Caso(f'{prefijo}_crear_post', f'{prefijo}_crear', reverse(f'{prefijo}_crear'),
+                                  'POST', datos_crear))
+        casos += [
+            Caso('asignaciones_rol_finalizar', 'asignaciones_rol_finalizar',
+                 reverse('asignaciones_rol_finalizar'), 'POST', {'search': rol.nombre.split()[0]}),
+            Caso('asignaciones_bus_finalizar', 'asignaciones_bus_finalizar',
+                 reverse('asignaciones_bus_finalizar'), 'POST', {'turno': 'NOCHE'}),
+        ]
+        return casos
+
+    def _casos_listado(self, url_name, modelo, termino, filtro):
+        url = reverse(url_name)
+        paginas = max(modelo.objects.count() // 10, 1)
+        nombre = url_name.removesuffix('_list')
+        return [
+            Caso(nombre, url_name, url),
+            Caso(f'{nombre}_busqueda', url_name, f"{url}?{urlencode({'search': termino})}"),
+            Caso(f'{nombre}_filtro', url_name, f'{url}?{filtro}'),
+            Caso(f'{nombre}_pagina_profunda', url_name, f'{url}?page={paginas // 2 or 1}'),
+            Caso(f'{nombre}_cursor', url_name, f'{url}?paginacion=cursor&{filtro}'),
+        ]
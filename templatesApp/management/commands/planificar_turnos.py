@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.asignacion_masiva import ErrorCarga
+from templatesApp.planificacion import MAX_TURNOS, TURNOS, aplicar_plan, generar_plan
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula un plan de turnos que cubre los turnos libres de los buses disponibles con los '
+        'trabajadores de menor carga; con --confirmar lo carga en bloque'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-turnos', type=int, default=MAX_TURNOS, choices=range(1, len(TURNOS) + 1),
+            help='Turnos máximos por trabajador, contando los que ya tiene'
+        )
+        parser.add_argument('--turnos', nargs='+', choices=TURNOS, help='Solo estos turnos')
+        parser.add_argument('--mostrar', type=int, default=20, help='Cantidad de propuestas a listar')
+        parser.add_argument('--confirmar', action='store_true', help='Crea las asignaciones del plan')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        plan = generar_plan(options['max_turnos'], options['turnos'])
+        self.stdout.write(
+            f'Plan calculado en {time.perf_counter() - inicio:.1f} s: '
+            f'{len(plan.propuestas)} de {plan.cupos} turnos libres cubiertos'
+        )
+        for turno, datos in plan.por_turno.items():
+            self.stdout.write(
+                f'  {turno}: {datos["cubiertos"]} de {datos["cupos"]} '
+                f'({datos["libres"]} trabajadores disponibles)'
+            )
+        self.stdout.write('Carga tras el plan: ' + ', '.join(
+            f'{cantidad} con {carga}' for carga, cantidad in plan.cargas.items()
+        ))
+        for propuesta in plan.detalle(options['mostrar']):
+            self.stdout.write(
+                f'  {propuesta["patente"]} {propuesta["turno"]}: {propuesta["trabajador"]} '
+                f'({propuesta["trabajador_id"]})'
+            )
+        if plan.sin_conductor:
+            self.stdout.write(self.style.WARNING(f'{len(plan.sin_conductor)} turnos quedan sin conductor'))
+
+        if not options['confirmar'] or not plan.propuestas:
+            return
+        inicio = time.perf_counter()
+        try:
+            resultado = aplicar_plan(plan)
+        except ErrorCarga as e:
+            raise CommandError(str(e))
+        if not resultado.creados:
+            for error in resultado.errores[:50]:
+                self.stderr.write(f"Fila {error['fila']}: {error['errores']}")
+            raise CommandError(f'El plan no se cargó: {len(resultado.errores)} asignaciones con errores')
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.creados} asignaciones creadas en {time.perf_counter() - inicio:.1f} s'
+        ))
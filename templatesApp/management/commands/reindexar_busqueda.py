@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from templatesApp.search import CAMPOS_BUSQUEDA, get_backend, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de n-gramas de búsqueda (backend ngram)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por transacción')
+
+    def handle(self, *args, **options):
+        if not get_backend().mantiene_indice:
+            self.stdout.write('El backend de búsqueda activo no usa índice de n-gramas.')
+            return
+
+        for modelo in CAMPOS_BUSQUEDA:
+            total = reconstruir_indice(modelo, tamano_lote=options['lote'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{modelo._meta.verbose_name_plural}: {total} registros indexados'
+            ))
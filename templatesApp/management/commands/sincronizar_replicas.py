@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.replicas import ErrorReplicas, sincronizar_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia la base SQLite primaria a los archivos de las réplicas de lectura '
+        '(DB_MOTOR=sqlite, para probar las réplicas sin MySQL)'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            copiadas = sincronizar_sqlite()
+        except ErrorReplicas as e:
+            raise CommandError(str(e))
+        if not copiadas:
+            self.stdout.write('No hay réplicas configuradas (DB_REPLICAS).')
+        for alias, archivo in copiadas:
+            self.stdout.write(self.style.SUCCESS(f'{alias}: {archivo}'))
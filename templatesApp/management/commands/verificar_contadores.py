@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from templatesApp.models import Bus, AsignacionRol, AsignacionBus
+from templatesApp.cache_detalle import invalidar_todo
+from templatesApp.stats import invalidar_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara los contadores de asignaciones activas y el estado actual de los buses '
+        '(columnas desnormalizadas) con sus tablas de origen y, con --reparar, los reconstruye'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reparar', action='store_true',
+            help='Recalcula todas las columnas desnormalizadas con UPDATE ... SET c = (SELECT ...)'
+        )
+        parser.add_argument(
+            '--mostrar', type=int, default=10,
+            help='Cantidad de diferencias a listar por contador'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for asignacion in (AsignacionRol, AsignacionBus):
+            for (modelo, contador), desfasados in asignacion.contadores_desfasados().items():
+                cantidad = desfasados.count()
+                total += cantidad
+                etiqueta = f'{modelo._meta.verbose_name_plural}.{contador}'
+                if not cantidad:
+                    self.stdout.write(f'{etiqueta}: correcto')
+                    continue
+                self.stdout.write(self.style.WARNING(f'{etiqueta}: {cantidad} con diferencias'))
+                for objeto in desfasados.order_by('pk')[:options['mostrar']]:
+                    self.stdout.write(
+                        f'  {objeto.pk} {objeto}: guardado {getattr(objeto, contador)}, real {objeto.real}'
+                    )
+
+        desfasados = Bus.estados_desfasados()
+        cantidad = desfasados.count()
+        total += cantidad
+        if cantidad:
+            self.stdout.write(self.style.WARNING(f'Buses.estado_actual: {cantidad} con diferencias'))
+            for bus in desfasados.order_by('pk')[:options['mostrar']]:
+                self.stdout.write(
+                    f'  {bus.pk} {bus.patente}: guardado {bus.estado_actual}/{bus.kilometraje_actual}, '
+                    f'real {bus.estado_real}/{bus.kilometraje_real}'
+                )
+        else:
+            self.stdout.write('Buses.estado_actual: correcto')
+
+        if options['reparar']:
+            for asignacion in (AsignacionRol, AsignacionBus):
+                asignacion.recalcular_contadores()
+            Bus.sincronizar_estados()
+            invalidar_dashboard_stats()
+            invalidar_todo()
+            self.stdout.write(self.style.SUCCESS('Columnas desnormalizadas reconstruidas.'))
+        elif total:
+            raise CommandError(
+                f'{total} filas con diferencias; ejecute con --reparar para reconstruirlas.'
+            )
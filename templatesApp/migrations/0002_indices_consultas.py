@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['activo', '-fecha_asignacion', 'id'], name='asigbus_activo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['turno', 'activo', '-fecha_asignacion', 'id'], name='asigbus_turno_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['-fecha_asignacion', 'id'], name='asigbus_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fecha_asignacion', 'id'], name='asigbus_activas_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['turno', '-fecha_asignacion', 'id'], name='asigbus_activas_turno_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['bus'], name='asigbus_bus_activas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionrol',
+            index=models.Index(fields=['activo', '-fecha_asignacion', 'id'], name='asigrol_activo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionrol',
+            index=models.Index(fields=['-fecha_asignacion', 'id'], name='asigrol_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionrol',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fecha_asignacion', 'id'], name='asigrol_activas_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionrol',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['rol'], name='asigrol_rol_activas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bus',
+            index=models.Index(fields=['activo', 'patente'], name='bus_activo_patente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estadobus',
+            index=models.Index(fields=['estado', '-fecha_cambio', 'id'], name='estbus_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estadobus',
+            index=models.Index(fields=['-fecha_cambio', 'id'], name='estbus_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rol',
+            index=models.Index(fields=['activo', 'nombre'], name='rol_activo_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['activo', 'apellido', 'nombre', 'id'], name='trab_activo_apellido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['apellido', 'nombre', 'id'], name='trab_apellido_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['apellido', 'nombre', 'id'], name='trab_activos_apellido_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:17
+
+from django.db import migrations, models
+
+
+# Índices FULLTEXT (parser ngram) usados por search.FullTextBackend en MySQL
+FULLTEXT_INDICES = [
+    ('templatesApp_trabajador', 'trab_busqueda_ft', ('nombre', 'apellido', 'contacto')),
+    ('templatesApp_rol', 'rol_busqueda_ft', ('nombre',)),
+    ('templatesApp_bus', 'bus_busqueda_ft', ('patente', 'modelo', 'marca')),
+]
+
+
+def crear_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for tabla, nombre, columnas in FULLTEXT_INDICES:
+        schema_editor.execute(
+            f"ALTER TABLE {quote(tabla)} ADD FULLTEXT INDEX {quote(nombre)} "
+            f"({', '.join(quote(c) for c in columnas)}) WITH PARSER ngram"
+        )
+
+
+def eliminar_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for tabla, nombre, _ in FULLTEXT_INDICES:
+        schema_editor.execute(f"ALTER TABLE {quote(tabla)} DROP INDEX {quote(nombre)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0002_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('ngrama', models.CharField(max_length=3)),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda',
+                'verbose_name_plural': 'Términos de Búsqueda',
+                'indexes': [models.Index(fields=['modelo', 'objeto_id'], name='termino_objeto_idx')],
+                'constraints': [models.UniqueConstraint(fields=('modelo', 'ngrama', 'objeto_id'), name='unique_termino_busqueda')],
+            },
+        ),
+        migrations.RunPython(crear_fulltext, eliminar_fulltext),
+    ]
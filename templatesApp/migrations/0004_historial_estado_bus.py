@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def registrar_estados_actuales(apps, schema_editor):
+    """Inicia el historial con el estado actual de cada bus"""
+    EstadoBus = apps.get_model('templatesApp', 'EstadoBus')
+    HistorialEstadoBus = apps.get_model('templatesApp', 'HistorialEstadoBus')
+    HistorialEstadoBus.objects.bulk_create(
+        (
+            HistorialEstadoBus(
+                bus_id=estado.bus_id,
+                estado=estado.estado,
+                kilometraje=estado.kilometraje,
+                observaciones=estado.observaciones,
+                vigente_desde=estado.fecha_cambio,
+            )
+            for estado in EstadoBus.objects.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0003_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialEstadoBus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('OPERATIVO', 'Operativo'), ('MANTENIMIENTO', 'En Mantenimiento'), ('REPARACION', 'En Reparación'), ('FUERA_SERVICIO', 'Fuera de Servicio'), ('RESERVADO', 'Reservado')], max_length=50)),
+                ('kilometraje', models.PositiveIntegerField(default=0)),
+                ('observaciones', models.TextField(blank=True, null=True)),
+                ('vigente_desde', models.DateTimeField()),
+                ('vigente_hasta', models.DateTimeField(blank=True, null=True)),
+                ('bus', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_estados', to='templatesApp.bus', verbose_name='Bus')),
+            ],
+            options={
+                'verbose_name': 'Historial de Estado de Bus',
+                'verbose_name_plural': 'Historial de Estados de Buses',
+                'ordering': ['-vigente_desde', '-id'],
+                'indexes': [models.Index(fields=['bus', '-vigente_desde', '-id'], name='histbus_bus_desde_idx'), models.Index(fields=['estado', 'vigente_desde', 'vigente_hasta'], name='histbus_estado_desde_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_estados_actuales, migrations.RunPython.noop),
+    ]
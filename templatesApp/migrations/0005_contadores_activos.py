@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+CONTADORES = [
+    ('AsignacionRol', 'trabajador', 'Trabajador', 'roles_activos'),
+    ('AsignacionRol', 'rol', 'Rol', 'asignaciones_activas'),
+    ('AsignacionBus', 'trabajador', 'Trabajador', 'buses_activos'),
+    ('AsignacionBus', 'bus', 'Bus', 'conductores_activos'),
+]
+
+
+def calcular_contadores(apps, schema_editor):
+    """Carga los contadores con un UPDATE por contador"""
+    for asignacion, campo, destino, contador in CONTADORES:
+        Asignacion = apps.get_model('templatesApp', asignacion)
+        Destino = apps.get_model('templatesApp', destino)
+        activas = (
+            Asignacion.objects.filter(**{campo: OuterRef('pk')}, activo=True)
+            .order_by().values(campo).annotate(total=Count('pk')).values('total')
+        )
+        Destino.objects.update(**{
+            contador: Coalesce(Subquery(activas, output_field=models.IntegerField()), Value(0))
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0004_historial_estado_bus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='conductores_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rol',
+            name='asignaciones_activas',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='trabajador',
+            name='buses_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='trabajador',
+            name='roles_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:47
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def proyectar_estados(apps, schema_editor):
+    """Copia a cada bus su estado y kilometraje actuales con un solo UPDATE"""
+    Bus = apps.get_model('templatesApp', 'Bus')
+    EstadoBus = apps.get_model('templatesApp', 'EstadoBus')
+    estado = EstadoBus.objects.filter(bus=OuterRef('pk'))
+    Bus.objects.update(
+        estado_actual=Subquery(estado.values('estado')[:1]),
+        kilometraje_actual=Subquery(estado.values('kilometraje')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0005_contadores_activos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='estado_actual',
+            field=models.CharField(blank=True, choices=[('OPERATIVO', 'Operativo'), ('MANTENIMIENTO', 'En Mantenimiento'), ('REPARACION', 'En Reparación'), ('FUERA_SERVICIO', 'Fuera de Servicio'), ('RESERVADO', 'Reservado')], editable=False, max_length=50, null=True, verbose_name='Estado operativo'),
+        ),
+        migrations.AddField(
+            model_name='bus',
+            name='kilometraje_actual',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Kilometraje'),
+        ),
+        migrations.AddIndex(
+            model_name='bus',
+            index=models.Index(fields=['activo', 'estado_actual', 'patente'], name='bus_activo_estado_idx'),
+        ),
+        migrations.RunPython(proyectar_estados, migrations.RunPython.noop),
+    ]
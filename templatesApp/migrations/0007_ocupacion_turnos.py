@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0006_estado_actual_bus'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['trabajador', 'turno', 'fecha_asignacion'], name='asigbus_trab_turno_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['bus', 'turno', 'fecha_asignacion'], name='asigbus_bus_turno_idx'),
+        ),
+    ]
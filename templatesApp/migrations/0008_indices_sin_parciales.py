@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templatesApp', '0007_ocupacion_turnos'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='asignacionbus',
+            name='asigbus_activas_fecha_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asignacionbus',
+            name='asigbus_activas_turno_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asignacionbus',
+            name='asigbus_bus_activas_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asignacionrol',
+            name='asigrol_activas_fecha_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asignacionrol',
+            name='asigrol_rol_activas_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trabajador',
+            name='trab_activos_apellido_idx',
+        ),
+        migrations.AddIndex(
+            model_name='asignacionbus',
+            index=models.Index(fields=['bus', 'activo'], name='asigbus_bus_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionrol',
+            index=models.Index(fields=['rol', 'activo'], name='asigrol_rol_activo_idx'),
+        ),
+    ]
@@ -1,10 +1,45 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import datetime, time, timedelta
 
 
-class Trabajador(models.Model):
+class DesnormalizadoMixin:
+    """
+    Modelo con columnas desnormalizadas (contadores de asignaciones activas,
+    estado actual del bus) que mantienen otros modelos.
+
+    Esas columnas solo se escriben con UPDATE desde el modelo de origen, así
+    que al editar el objeto save() no las incluye: de lo contrario un
+    formulario guardaría el valor leído al cargarlo y pisaría los cambios
+    hechos entretanto por otra transacción.
+    """
+    CAMPOS_DESNORMALIZADOS = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not args and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_DESNORMALIZADOS
+            ]
+        super().save(*args, **kwargs)
+
+
+ESTADOS_BUS = [
+    ('OPERATIVO', 'Operativo'),
+    ('MANTENIMIENTO', 'En Mantenimiento'),
+    ('REPARACION', 'En Reparación'),
+    ('FUERA_SERVICIO', 'Fuera de Servicio'),
+    ('RESERVADO', 'Reservado'),
+]
+
+
+class Trabajador(DesnormalizadoMixin, models.Model):
     nombre = models.CharField(
         max_length=100,
         validators=[RegexValidator(r'^[a-zA-ZáéíóúÁÉÍÓÚñÑ\s]+$', 'Solo se permiten letras')]
@@ -24,11 +59,20 @@ class Trabajador(models.Model):
     )
     activo = models.BooleanField(default=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    # Desnormalizados: los mantienen AsignacionRol y AsignacionBus
+    roles_activos = models.IntegerField(default=0, editable=False)
+    buses_activos = models.IntegerField(default=0, editable=False)
+
+    CAMPOS_DESNORMALIZADOS = ('roles_activos', 'buses_activos')
 
     class Meta:
         verbose_name = "Trabajador"
         verbose_name_plural = "Trabajadores"
         ordering = ['apellido', 'nombre']
+        indexes = [
+            models.Index(fields=['activo', 'apellido', 'nombre', 'id'], name='trab_activo_apellido_idx'),
+            models.Index(fields=['apellido', 'nombre', 'id'], name='trab_apellido_nombre_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(edad__gte=18) & models.Q(edad__lte=70),
@@ -53,8 +97,12 @@ class Trabajador(models.Model):
             'buses': self.asignaciones_bus.filter(activo=True)
         }
 
+    def cantidad_asignaciones_activas(self):
+        """Retorna cantidad de asignaciones activas (roles y buses)"""
+        return self.roles_activos + self.buses_activos
 
-class Rol(models.Model):
+
+class Rol(DesnormalizadoMixin, models.Model):
     nombre = models.CharField(
         max_length=100,
         unique=True,
@@ -67,21 +115,28 @@ class Rol(models.Model):
     )
     activo = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Desnormalizado: lo mantiene AsignacionRol
+    asignaciones_activas = models.IntegerField(default=0, editable=False)
+
+    CAMPOS_DESNORMALIZADOS = ('asignaciones_activas',)
 
     class Meta:
         verbose_name = "Rol"
         verbose_name_plural = "Roles"
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['activo', 'nombre'], name='rol_activo_nombre_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
     def cantidad_asignaciones_activas(self):
         """Retorna cantidad de trabajadores con este rol activo"""
-        return self.asignaciones.filter(activo=True).count()
+        return self.asignaciones_activas
 
 
-class Bus(models.Model):
+class Bus(DesnormalizadoMixin, models.Model):
     patente = models.CharField(
         max_length=20, 
         unique=True,
@@ -99,14 +154,30 @@ class Bus(models.Model):
     marca = models.CharField(max_length=100, default='Sin especificar')
     activo = models.BooleanField(default=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    # Desnormalizado: lo mantiene AsignacionBus
+    conductores_activos = models.IntegerField(default=0, editable=False)
+    # Proyección de EstadoBus (None si el bus no tiene estado registrado)
+    estado_actual = models.CharField(
+        'Estado operativo', max_length=50, choices=ESTADOS_BUS, blank=True, null=True, editable=False
+    )
+    kilometraje_actual = models.PositiveIntegerField(
+        'Kilometraje', blank=True, null=True, editable=False
+    )
+
+    CAMPOS_DESNORMALIZADOS = ('conductores_activos', 'estado_actual', 'kilometraje_actual')
 
     class Meta:
         verbose_name = "Bus"
         verbose_name_plural = "Buses"
         ordering = ['patente']
+        indexes = [
+            models.Index(fields=['activo', 'patente'], name='bus_activo_patente_idx'),
+            models.Index(fields=['activo', 'estado_actual', 'patente'], name='bus_activo_estado_idx'),
+        ]
 
     def clean(self):
-        if self.año > timezone.now().year:
+        # Con un año inválido el campo ya tiene su error y queda sin valor
+        if self.año and self.año > timezone.now().year:
             raise ValidationError('El año no puede ser futuro')
 
     def __str__(self):
@@ -119,15 +190,45 @@ class Bus(models.Model):
         except EstadoBus.DoesNotExist:
             return None
 
+    @classmethod
+    def disponibles(cls):
+        """Buses que se pueden asignar, sin consultar EstadoBus"""
+        return cls.objects.filter(
+            models.Q(estado_actual='OPERATIVO') | models.Q(estado_actual__isnull=True), activo=True
+        )
+
+    @classmethod
+    def proyectar_estado(cls, bus_id, estado_bus=None, using=None):
+        """Copia el estado dado (o ninguno) a las columnas estado_actual/kilometraje_actual"""
+        cls._default_manager.using(using or router.db_for_write(cls)).filter(pk=bus_id).update(
+            estado_actual=estado_bus.estado if estado_bus else None,
+            kilometraje_actual=estado_bus.kilometraje if estado_bus else None,
+        )
+
+    @classmethod
+    def sincronizar_estados(cls, using=None):
+        """Recalcula la proyección de todos los buses con un UPDATE; retorna las filas"""
+        estado = EstadoBus.objects.filter(bus=OuterRef('pk'))
+        return cls._default_manager.using(using or router.db_for_write(cls)).update(
+            estado_actual=Subquery(estado.values('estado')[:1]),
+            kilometraje_actual=Subquery(estado.values('kilometraje')[:1]),
+        )
+
+    @classmethod
+    def estados_desfasados(cls):
+        """Buses cuya proyección difiere de EstadoBus"""
+        estado = EstadoBus.objects.filter(bus=OuterRef('pk'))
+        return cls._default_manager.annotate(
+            estado_real=Subquery(estado.values('estado')[:1]),
+            kilometraje_real=Subquery(estado.values('kilometraje')[:1]),
+        ).exclude(
+            models.Q(estado_actual=F('estado_real'), kilometraje_actual=F('kilometraje_real'))
+            | models.Q(estado_actual__isnull=True, estado_real__isnull=True)
+        )
+
 
 class EstadoBus(models.Model):
-    ESTADOS_CHOICES = [
-        ('OPERATIVO', 'Operativo'),
-        ('MANTENIMIENTO', 'En Mantenimiento'),
-        ('REPARACION', 'En Reparación'),
-        ('FUERA_SERVICIO', 'Fuera de Servicio'),
-        ('RESERVADO', 'Reservado'),
-    ]
+    ESTADOS_CHOICES = ESTADOS_BUS
 
     # ForeignKey REAL al modelo Bus
     bus = models.OneToOneField(
@@ -152,6 +253,10 @@ class EstadoBus(models.Model):
         verbose_name = "Estado de Bus"
         verbose_name_plural = "Estados de Buses"
         ordering = ['-fecha_cambio']
+        indexes = [
+            models.Index(fields=['estado', '-fecha_cambio', 'id'], name='estbus_estado_fecha_idx'),
+            models.Index(fields=['-fecha_cambio', 'id'], name='estbus_fecha_idx'),
+        ]
 
     def clean(self):
         if self.kilometraje < 0:
@@ -167,8 +272,280 @@ class EstadoBus(models.Model):
     def __str__(self):
         return f"{self.bus.patente} - {self.get_estado_display()}"
 
+    def save(self, *args, **kwargs):
+        """Guarda el estado actual, lo proyecta en el bus y lo registra en su historial"""
+        bus_anterior_id = None
+        if self.pk:
+            bus_anterior_id = (
+                EstadoBus.objects.filter(pk=self.pk).values_list('bus_id', flat=True).first()
+            )
+            self._relacionados_anteriores = {'bus': bus_anterior_id}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if bus_anterior_id and bus_anterior_id != self.bus_id:
+                HistorialEstadoBus.cerrar_vigente(bus_anterior_id, self.fecha_cambio)
+                Bus.proyectar_estado(bus_anterior_id)
+            Bus.proyectar_estado(self.bus_id, self)
+            HistorialEstadoBus.registrar(self)
+
+    # Al eliminar, signals.limpiar_estado_actual cierra el intervalo en el
+    # historial y limpia la proyección (también en eliminaciones por queryset)
+
+
+class HistorialEstadoBus(models.Model):
+    """
+    Historial de estados de cada bus; EstadoBus es la proyección del último.
+
+    Las filas no se modifican salvo para cerrar su vigencia (vigente_hasta)
+    cuando llega el estado siguiente, de modo que "estado del bus X en el
+    instante T" es una búsqueda en un índice y "buses en estado E durante el
+    día D" cuesta según la cantidad de buses, no el largo del historial
+    (ver vigentes_entre).
+    """
+    bus = models.ForeignKey(
+        Bus,
+        on_delete=models.CASCADE,
+        related_name='historial_estados',
+        verbose_name='Bus'
+    )
+    estado = models.CharField(max_length=50, choices=EstadoBus.ESTADOS_CHOICES)
+    kilometraje = models.PositiveIntegerField(default=0)
+    observaciones = models.TextField(blank=True, null=True)
+    vigente_desde = models.DateTimeField()
+    vigente_hasta = models.DateTimeField(blank=True, null=True)
 
-class AsignacionRol(models.Model):
+    class Meta:
+        verbose_name = "Historial de Estado de Bus"
+        verbose_name_plural = "Historial de Estados de Buses"
+        ordering = ['-vigente_desde', '-id']
+        indexes = [
+            models.Index(fields=['bus', '-vigente_desde', '-id'], name='histbus_bus_desde_idx'),
+            models.Index(fields=['estado', 'vigente_desde', 'vigente_hasta'], name='histbus_estado_desde_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bus_id} - {self.get_estado_display()} desde {self.vigente_desde:%d/%m/%Y %H:%M}"
+
+    @classmethod
+    def cerrar_vigente(cls, bus_id, momento, using=None):
+        """Cierra el intervalo abierto del bus en el instante dado"""
+        return cls._default_manager.using(using or router.db_for_write(cls)).filter(
+            bus_id=bus_id, vigente_hasta__isnull=True
+        ).update(vigente_hasta=momento)
+
+    @classmethod
+    def registrar(cls, estado_bus):
+        """Agrega un evento para el estado dado si difiere del vigente"""
+        vigente = (
+            cls.objects.filter(bus_id=estado_bus.bus_id, vigente_hasta__isnull=True)
+            .order_by('-vigente_desde', '-id').first()
+        )
+        if vigente and (vigente.estado, vigente.kilometraje, vigente.observaciones) == (
+            estado_bus.estado, estado_bus.kilometraje, estado_bus.observaciones
+        ):
+            return vigente
+        cls.cerrar_vigente(estado_bus.bus_id, estado_bus.fecha_cambio)
+        return cls.objects.create(
+            bus_id=estado_bus.bus_id,
+            estado=estado_bus.estado,
+            kilometraje=estado_bus.kilometraje,
+            observaciones=estado_bus.observaciones,
+            vigente_desde=estado_bus.fecha_cambio,
+        )
+
+    @classmethod
+    def estado_en(cls, bus, momento):
+        """Retorna el evento vigente del bus en el instante dado (o None)"""
+        evento = (
+            cls.objects.filter(bus=bus, vigente_desde__lte=momento)
+            .order_by('-vigente_desde', '-id').first()
+        )
+        if evento and evento.vigente_hasta and evento.vigente_hasta <= momento:
+            return None
+        return evento
+
+    @classmethod
+    def vigentes_entre(cls, estado, desde, hasta):
+        """
+        Eventos en el estado dado cuyo intervalo se cruza con [desde, hasta).
+
+        Filtrar por ``vigente_desde < hasta`` recorrería todo el historial
+        anterior del estado. Como los intervalos de un bus son consecutivos,
+        basta con los que empiezan dentro del rango (rango en el índice
+        ``(estado, vigente_desde)``) y, de cada bus, el vigente al empezar el
+        rango: el último anterior a ``desde`` (una búsqueda por bus en
+        ``(bus, -vigente_desde)``). El costo depende de la cantidad de buses y
+        del resultado, no del largo del historial. Los ids de los vigentes se
+        leen al llamar (una consulta).
+        """
+        anterior = cls.objects.filter(bus=OuterRef('pk'), vigente_desde__lt=desde).order_by('-vigente_desde', '-id')
+        vigentes_al_inicio = list(
+            Bus.objects.order_by()
+            .annotate(
+                evento=Subquery(anterior.values('pk')[:1]),
+                evento_estado=Subquery(anterior.values('estado')[:1]),
+                evento_hasta=Subquery(anterior.values('vigente_hasta')[:1]),
+            )
+            .filter(
+                models.Q(evento_hasta__isnull=True) | models.Q(evento_hasta__gt=desde),
+                evento_estado=estado,
+            )
+            .values_list('evento', flat=True)
+        )
+        return cls.objects.filter(
+            models.Q(pk__in=vigentes_al_inicio) |
+            models.Q(estado=estado, vigente_desde__gte=desde, vigente_desde__lt=hasta) & (
+                models.Q(vigente_hasta__isnull=True) | models.Q(vigente_hasta__gt=desde)
+            )
+        )
+
+    @classmethod
+    def buses_en_estado(cls, estado, fecha):
+        """Buses que estuvieron en el estado dado en algún momento del día"""
+        desde = timezone.make_aware(datetime.combine(fecha, time.min))
+        hasta = desde + timedelta(days=1)
+        return Bus.objects.filter(
+            pk__in=cls.vigentes_entre(estado, desde, hasta).values('bus_id')
+        )
+
+
+# Se envía una vez por lote al finalizar asignaciones en bloque
+# (argumentos: ids, fecha, usuario), en lugar de un post_save por fila.
+asignaciones_finalizadas = Signal()
+
+
+class AsignacionQuerySet(models.QuerySet):
+    # Cantidad máxima de ids por sentencia UPDATE
+    LOTE_FINALIZACION = 2000
+
+    def finalizar(self, fecha=None, usuario=None):
+        """
+        Finaliza en bloque las asignaciones activas del queryset: mismo efecto
+        que finalizar_asignacion() en cada una, pero con un UPDATE por lote en
+        vez de un save() por fila. Retorna la lista de ids finalizados.
+
+        Los ids se leen con SELECT ... FOR UPDATE dentro de la misma
+        transacción (MySQL no soporta UPDATE ... RETURNING), de modo que el
+        resultado coincide exactamente con las filas actualizadas. Los
+        contadores de los objetos afectados se recalculan por lote.
+        """
+        fecha = fecha or timezone.now().date()
+        with transaction.atomic(using=self.db):
+            ids = list(
+                self.filter(activo=True).select_for_update().order_by('pk').values_list('pk', flat=True)
+            )
+            for inicio in range(0, len(ids), self.LOTE_FINALIZACION):
+                lote = ids[inicio:inicio + self.LOTE_FINALIZACION]
+                self.model._default_manager.using(self.db).filter(pk__in=lote).update(
+                    activo=False, fecha_finalizacion=fecha
+                )
+                self.model.recalcular_contadores(ids=lote, using=self.db)
+            if ids:
+                asignaciones_finalizadas.send(
+                    sender=self.model, ids=ids, fecha=fecha, usuario=usuario, using=self.db
+                )
+        return ids
+
+
+class AsignacionActivaMixin:
+    """
+    Asignación que mantiene contadores de asignaciones activas en los modelos
+    a los que apunta (ver DesnormalizadoMixin).
+
+    save() ajusta los contadores en la misma transacción comparando la fila
+    anterior (leída con SELECT ... FOR UPDATE) con la nueva; las eliminaciones
+    los descuentan con post_delete (señales), que también cubre las cascadas,
+    y la finalización en bloque los recalcula por lote.
+    """
+    # (clave foránea, contador en el modelo relacionado)
+    CONTADORES = ()
+
+    def _claves_activas(self):
+        """ids de los objetos que cuentan esta asignación, o None si no está activa"""
+        if not self.activo:
+            return None
+        return tuple(getattr(self, f'{campo}_id') for campo, _ in self.CONTADORES)
+
+    def ajustar_contadores(self, claves, delta, using=None):
+        if claves is None:
+            return
+        using = using or router.db_for_write(type(self), instance=self)
+        for (campo, contador), pk in zip(self.CONTADORES, claves):
+            modelo = self._meta.get_field(campo).related_model
+            modelo._default_manager.using(using).filter(pk=pk).update(
+                **{contador: F(contador) + delta}
+            )
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            anteriores = None
+            if not self._state.adding:
+                fila = (
+                    type(self)._default_manager.using(using).select_for_update().filter(pk=self.pk)
+                    .values_list('activo', *(f'{campo}_id' for campo, _ in self.CONTADORES)).first()
+                )
+                if fila:
+                    # Para invalidar también el detalle de los objetos que deja (cache_detalle)
+                    self._relacionados_anteriores = dict(
+                        zip((campo for campo, _ in self.CONTADORES), fila[1:])
+                    )
+                    if fila[0]:
+                        anteriores = tuple(fila[1:])
+            super().save(*args, **kwargs)
+            nuevas = self._claves_activas()
+            if anteriores != nuevas:
+                self.ajustar_contadores(anteriores, -1, using)
+                self.ajustar_contadores(nuevas, 1, using)
+
+    @classmethod
+    def conteo_real(cls, campo):
+        """Subconsulta con las asignaciones activas que apuntan a la fila externa"""
+        return Coalesce(
+            Subquery(
+                cls._default_manager.filter(**{campo: OuterRef('pk')}, activo=True)
+                .order_by().values(campo).annotate(total=Count('pk')).values('total'),
+                output_field=models.IntegerField(),
+            ),
+            Value(0),
+        )
+
+    @classmethod
+    def recalcular_contadores(cls, ids=None, using=None, claves=None):
+        """
+        Recalcula con un UPDATE por contador los contadores de los objetos
+        apuntados por las asignaciones ``ids`` o, con ``claves``
+        ({campo: ids de los objetos}), de esos objetos; de todos si no se
+        indica ninguno. Retorna la cantidad de filas actualizadas.
+        """
+        using = using or router.db_for_write(cls)
+        total = 0
+        for campo, contador in cls.CONTADORES:
+            modelo = cls._meta.get_field(campo).related_model
+            objetos = modelo._default_manager.using(using)
+            if claves is not None:
+                objetos = objetos.filter(pk__in=claves.get(campo, ()))
+            elif ids is not None:
+                objetos = objetos.filter(
+                    pk__in=cls._default_manager.using(using).filter(pk__in=ids).values(f'{campo}_id')
+                )
+            total += objetos.update(**{contador: cls.conteo_real(campo)})
+        return total
+
+    @classmethod
+    def contadores_desfasados(cls):
+        """Por contador, queryset de objetos cuyo valor guardado difiere del real"""
+        desfasados = {}
+        for campo, contador in cls.CONTADORES:
+            modelo = cls._meta.get_field(campo).related_model
+            desfasados[(modelo, contador)] = (
+                modelo._default_manager.annotate(real=cls.conteo_real(campo))
+                .exclude(**{contador: F('real')})
+            )
+        return desfasados
+
+
+class AsignacionRol(AsignacionActivaMixin, models.Model):
     # ForeignKeys REALES
     trabajador = models.ForeignKey(
         Trabajador,
@@ -187,10 +564,22 @@ class AsignacionRol(models.Model):
     activo = models.BooleanField(default=True)
     notas = models.TextField(blank=True, null=True)
 
+    objects = AsignacionQuerySet.as_manager()
+
+    CONTADORES = (('trabajador', 'roles_activos'), ('rol', 'asignaciones_activas'))
+
     class Meta:
         verbose_name = "Asignación de Rol"
         verbose_name_plural = "Asignaciones de Roles"
         ordering = ['-fecha_asignacion']
+        indexes = [
+            models.Index(fields=['activo', '-fecha_asignacion', 'id'], name='asigrol_activo_fecha_idx'),
+            models.Index(fields=['-fecha_asignacion', 'id'], name='asigrol_fecha_idx'),
+            models.Index(fields=['rol', 'activo'], name='asigrol_rol_activo_idx'),
+        ]
+        # MySQL no soporta restricciones únicas condicionales (W036): allí la
+        # unicidad de asignaciones activas solo se valida en full_clean()
+        # (validate_constraints), no en la base de datos.
         constraints = [
             models.UniqueConstraint(
                 fields=['trabajador', 'rol'],
@@ -205,11 +594,11 @@ class AsignacionRol(models.Model):
                 raise ValidationError('La fecha de finalización no puede ser anterior a la asignación')
         
         # Validar que el trabajador esté activo
-        if self.trabajador and not self.trabajador.activo:
+        if self.trabajador_id and not self.trabajador.activo:
             raise ValidationError('No se puede asignar un rol a un trabajador inactivo')
         
         # Validar que el rol esté activo
-        if self.rol and not self.rol.activo:
+        if self.rol_id and not self.rol.activo:
             raise ValidationError('No se puede asignar un rol inactivo')
 
     def __str__(self):
@@ -222,7 +611,7 @@ class AsignacionRol(models.Model):
         self.save()
 
 
-class AsignacionBus(models.Model):
+class AsignacionBus(AsignacionActivaMixin, models.Model):
     TURNO_CHOICES = [
         ('MAÑANA', 'Mañana'),
         ('TARDE', 'Tarde'),
@@ -252,10 +641,24 @@ class AsignacionBus(models.Model):
     activo = models.BooleanField(default=True)
     notas = models.TextField(blank=True, null=True)
 
+    objects = AsignacionQuerySet.as_manager()
+
+    CONTADORES = (('trabajador', 'buses_activos'), ('bus', 'conductores_activos'))
+
     class Meta:
         verbose_name = "Asignación de Bus"
         verbose_name_plural = "Asignaciones de Buses"
         ordering = ['-fecha_asignacion']
+        indexes = [
+            models.Index(fields=['activo', '-fecha_asignacion', 'id'], name='asigbus_activo_fecha_idx'),
+            models.Index(fields=['turno', 'activo', '-fecha_asignacion', 'id'], name='asigbus_turno_fecha_idx'),
+            models.Index(fields=['-fecha_asignacion', 'id'], name='asigbus_fecha_idx'),
+            models.Index(fields=['bus', 'activo'], name='asigbus_bus_activo_idx'),
+            # Ocupación de turnos (conflictos.py): ¿tiene el trabajador/bus este turno ocupado?
+            models.Index(fields=['trabajador', 'turno', 'fecha_asignacion'], name='asigbus_trab_turno_idx'),
+            models.Index(fields=['bus', 'turno', 'fecha_asignacion'], name='asigbus_bus_turno_idx'),
+        ]
+        # Ver AsignacionRol.Meta: en MySQL esta restricción no se crea.
         constraints = [
             models.UniqueConstraint(
                 fields=['trabajador', 'bus', 'turno'],
@@ -270,18 +673,17 @@ class AsignacionBus(models.Model):
                 raise ValidationError('La fecha de finalización no puede ser anterior a la asignación')
         
         # Validar que el trabajador esté activo
-        if self.trabajador and not self.trabajador.activo:
+        if self.trabajador_id and not self.trabajador.activo:
             raise ValidationError('No se puede asignar un bus a un trabajador inactivo')
         
         # Validar que el bus esté activo
-        if self.bus and not self.bus.activo:
+        if self.bus_id and not self.bus.activo:
             raise ValidationError('No se puede asignar un bus inactivo')
         
-        # Validar que el bus esté operativo
-        estado_bus = self.bus.get_estado_actual()
-        if estado_bus and estado_bus.estado != 'OPERATIVO':
+        # Validar que el bus esté operativo (proyección en Bus, sin consultar EstadoBus)
+        if self.bus_id and self.bus.estado_actual not in (None, 'OPERATIVO'):
             raise ValidationError(
-                f'No se puede asignar el bus {self.bus.patente} porque está en estado: {estado_bus.get_estado_display()}'
+                f'No se puede asignar el bus {self.bus.patente} porque está en estado: {self.bus.get_estado_actual_display()}'
             )
 
     def __str__(self):
@@ -291,4 +693,27 @@ class AsignacionBus(models.Model):
         """Finaliza la asignación estableciendo fecha fin y desactivando"""
         self.fecha_finalizacion = timezone.now().date()
         self.activo = False
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class TerminoBusqueda(models.Model):
+    """Índice invertido de n-gramas usado por la búsqueda en motores sin FULLTEXT"""
+    modelo = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    ngrama = models.CharField(max_length=3)
+
+    class Meta:
+        verbose_name = "Término de Búsqueda"
+        verbose_name_plural = "Términos de Búsqueda"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['modelo', 'ngrama', 'objeto_id'],
+                name='unique_termino_busqueda'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id'], name='termino_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo}:{self.objeto_id} '{self.ngrama}'"
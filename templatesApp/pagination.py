@@ -0,0 +1,219 @@
+import base64
+import datetime
+import json
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+POR_PAGINA = 10
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+def _campo_y_direccion(orden):
+    """Separa '-campo' en ('campo', descendente)"""
+    if orden.startswith('-'):
+        return orden[1:], True
+    return orden, False
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Conserva los microsegundos que DjangoJSONEncoder trunca"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(valores, direccion):
+    """Codifica los valores de la clave de orden en un cursor opaco"""
+    datos = json.dumps({'v': valores, 'd': direccion}, cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (valores, direccion) a partir de un cursor opaco"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores, direccion = datos['v'], datos['d']
+    except (ValueError, TypeError, KeyError):
+        raise CursorInvalido('Cursor de paginación inválido')
+    if direccion not in ('n', 'p') or not isinstance(valores, list):
+        raise CursorInvalido('Cursor de paginación inválido')
+    return valores, direccion
+
+
+class KeysetPaginator:
+    """
+    Paginación por clave (seek) sobre un orden total del queryset: el orden
+    debe terminar en una columna única (id, patente, ...).
+
+    El costo de cada página es el mismo sin importar su profundidad: en vez de
+    OFFSET se filtra por la clave de la última fila vista. El total es opcional,
+    ya que el COUNT(*) es justamente lo que degrada los listados grandes.
+    """
+
+    def __init__(self, queryset, per_page, orden, contar=False):
+        self.orden = list(orden)
+        self.campos = [_campo_y_direccion(o) for o in self.orden]
+        self.queryset = queryset.order_by(*self.orden)
+        self.per_page = per_page
+        self.contar = contar
+
+    @cached_property
+    def count(self):
+        """Total de registros, solo si se solicitó explícitamente"""
+        if not self.contar:
+            return None
+        return self.queryset.count()
+
+    num_pages = None
+
+    def _valores_fila(self, obj):
+        # Filas de values() (diccionarios) o instancias de modelo
+        if isinstance(obj, dict):
+            return [obj[campo] for campo, _ in self.campos]
+        return [getattr(obj, campo) for campo, _ in self.campos]
+
+    def _a_python(self, valores):
+        modelo = self.queryset.model
+        convertidos = []
+        for (campo, _), valor in zip(self.campos, valores):
+            nombre = modelo._meta.pk.name if campo == 'pk' else campo
+            convertidos.append(modelo._meta.get_field(nombre).to_python(valor))
+        return convertidos
+
+    def _filtro_despues_de(self, valores, invertir=False):
+        """Construye (a > x) OR (a = x AND b > y) ... respetando cada dirección"""
+        condicion = Q()
+        for i, (campo, descendente) in enumerate(self.campos):
+            if invertir:
+                descendente = not descendente
+            lookup = 'lt' if descendente else 'gt'
+            rama = Q(**{f'{campo}__{lookup}': valores[i]})
+            for j, (campo_previo, _) in enumerate(self.campos[:i]):
+                rama &= Q(**{campo_previo: valores[j]})
+            condicion |= rama
+        return condicion
+
+    def page(self, cursor=None):
+        """Retorna la página posterior (o anterior) al cursor dado"""
+        direccion = 'n'
+        queryset = self.queryset
+        if cursor:
+            valores, direccion = decodificar_cursor(cursor)
+            if len(valores) != len(self.campos):
+                raise CursorInvalido('Cursor de paginación inválido')
+            try:
+                valores = self._a_python(valores)
+            except Exception:
+                raise CursorInvalido('Cursor de paginación inválido')
+            if direccion == 'p':
+                orden_inverso = [o[1:] if o.startswith('-') else f'-{o}' for o in self.orden]
+                queryset = queryset.filter(self._filtro_despues_de(valores, invertir=True)).order_by(*orden_inverso)
+            else:
+                queryset = queryset.filter(self._filtro_despues_de(valores))
+
+        filas = list(queryset[:self.per_page + 1])
+        hay_mas = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+
+        if direccion == 'p':
+            filas.reverse()
+            return KeysetPage(filas, self, has_next=True, has_previous=hay_mas)
+        return KeysetPage(filas, self, has_next=hay_mas, has_previous=bool(cursor))
+
+
+class KeysetPage:
+    es_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.query_primera = ''
+        self.query_siguiente = ''
+        self.query_anterior = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return codificar_cursor(self.paginator._valores_fila(self.object_list[-1]), 'n')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return codificar_cursor(self.paginator._valores_fila(self.object_list[0]), 'p')
+
+
+def modo_cursor(request):
+    """Indica si el listado debe paginarse por cursor en vez de por número de página"""
+    return request.GET.get('paginacion') == 'cursor' or 'cursor' in request.GET
+
+
+def paginar(request, queryset, orden, por_pagina=POR_PAGINA):
+    """
+    Pagina un listado según la petición: por número de página (por defecto) o
+    por cursor con ?paginacion=cursor. En modo cursor el total solo se calcula
+    con ?total=1.
+    """
+    if modo_cursor(request):
+        paginator = KeysetPaginator(
+            queryset, por_pagina, orden, contar=request.GET.get('total') == '1'
+        )
+        try:
+            pagina = paginator.page(request.GET.get('cursor'))
+        except CursorInvalido:
+            pagina = paginator.page(None)
+
+        parametros = request.GET.copy()
+        parametros.pop('page', None)
+        parametros['paginacion'] = 'cursor'
+        parametros.pop('cursor', None)
+        pagina.query_primera = parametros.urlencode()
+        if pagina.next_cursor:
+            parametros['cursor'] = pagina.next_cursor
+            pagina.query_siguiente = parametros.urlencode()
+        if pagina.previous_cursor:
+            parametros['cursor'] = pagina.previous_cursor
+            pagina.query_anterior = parametros.urlencode()
+        return pagina
+
+    paginator = Paginator(queryset.order_by(*orden), por_pagina)
+    page = request.GET.get('page')
+
+    try:
+        return paginator.page(page)
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
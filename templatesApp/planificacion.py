@@ -0,0 +1,143 @@
+"""
+Planificación automática de turnos: propone un conductor para cada turno libre
+de los buses disponibles y lo carga en bloque con CargaAsignacionesBus.
+
+El costo de asignar un trabajador a un turno solo depende de su carga (turnos
+que ya maneja), no del bus: todos los buses de un mismo turno son
+intercambiables. Por eso no hace falta una matriz de costos trabajador × bus;
+basta con elegir, turno por turno, los trabajadores libres de menor carga:
+
+- Los datos se leen con tres consultas: trabajadores activos, buses
+  disponibles (``Bus.disponibles()``) y asignaciones que ocupan algún turno
+  desde hoy (conflictos.py).
+- Un turno es un *cupo* si ningún conductor ocupa ese turno del bus.
+- Los turnos se procesan del más escaso (menos trabajadores libres por cupo)
+  al más holgado, y en cada uno se toman los ``cupos`` trabajadores libres de
+  menor ``(carga, turnos libres que le quedan, id)`` con ``heapq.nsmallest``:
+  a igual carga van primero los que tienen menos alternativas.
+- Un trabajador no recibe más de ``max_turnos`` turnos en total, contando los
+  que ya tiene.
+
+Con 15.000 trabajadores y 5.000 buses el cálculo es O(T · n log k) y toma
+menos de un segundo; lo que más demora es la carga en la base de datos.
+"""
+import hashlib
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db.models import Q
+
+from .asignacion_masiva import CargaAsignacionesBus
+from .conflictos import ocupan
+from .models import Trabajador, Bus, AsignacionBus
+
+
+TURNOS = [turno for turno, _ in AsignacionBus.TURNO_CHOICES]
+
+# Turnos por trabajador, contando los que ya maneja
+MAX_TURNOS = 1
+
+
+@dataclass
+class Plan:
+    # (bus_id, turno, trabajador_id) en el orden de la carga
+    propuestas: list = field(default_factory=list)
+    # (bus_id, turno) que quedaron sin conductor
+    sin_conductor: list = field(default_factory=list)
+    # turno -> {'cupos', 'cubiertos', 'libres'}
+    por_turno: dict = field(default_factory=dict)
+    # carga -> cantidad de trabajadores, tras aplicar el plan
+    cargas: dict = field(default_factory=dict)
+    trabajadores: dict = field(default_factory=dict)
+    buses: dict = field(default_factory=dict)
+
+    @property
+    def cupos(self):
+        return len(self.propuestas) + len(self.sin_conductor)
+
+    def firma(self):
+        """Resumen del plan para confirmar que no cambió entre la vista previa y la carga"""
+        texto = ';'.join(f'{bus}:{turno}:{trabajador}' for bus, turno, trabajador in self.propuestas)
+        return hashlib.md5(texto.encode()).hexdigest()
+
+    def filas(self):
+        """Asignaciones en el formato de CargaAsignacionesBus"""
+        return [
+            {'trabajador': trabajador, 'bus': bus, 'turno': turno, 'notas': 'Plan automático de turnos'}
+            for bus, turno, trabajador in self.propuestas
+        ]
+
+    def detalle(self, limite=None):
+        """Propuestas con patente y nombre del trabajador (las primeras ``limite``)"""
+        return [
+            {
+                'bus_id': bus, 'patente': self.buses[bus], 'turno': turno,
+                'trabajador_id': trabajador, 'trabajador': self.trabajadores[trabajador],
+            }
+            for bus, turno, trabajador in self.propuestas[:limite]
+        ]
+
+
+def generar_plan(max_turnos=MAX_TURNOS, turnos=None, using=None):
+    """Calcula (sin guardar) el plan de turnos para los buses disponibles desde hoy"""
+    turnos = [turno for turno in TURNOS if turnos is None or turno in turnos]
+    hoy = date.today()
+
+    trabajadores = {
+        pk: f'{nombre} {apellido}' for pk, nombre, apellido in
+        Trabajador.objects.using(using).filter(activo=True).values_list('pk', 'nombre', 'apellido')
+    }
+    buses = dict(Bus.disponibles().using(using).order_by('patente').values_list('pk', 'patente'))
+
+    # También las activas con fecha de finalización pasada: no ocupan el turno, pero
+    # repetirlas chocaría con unique_active_bus_asignacion y la carga fallaría entera
+    ocupados_trabajador = {}
+    ocupados_bus = set()
+    for trabajador_id, bus_id, turno in (
+        AsignacionBus.objects.using(using).filter(Q(activo=True) | ocupan(hoy))
+        .values_list('trabajador_id', 'bus_id', 'turno')
+    ):
+        ocupados_trabajador.setdefault(trabajador_id, set()).add(turno)
+        ocupados_bus.add((bus_id, turno))
+
+    carga = {pk: len(ocupados_trabajador.get(pk, ())) for pk in trabajadores}
+    libres = {
+        pk: [turno for turno in turnos if turno not in ocupados_trabajador.get(pk, ())]
+        for pk in trabajadores if carga[pk] < max_turnos
+    }
+    cupos = {
+        turno: [bus for bus in buses if (bus, turno) not in ocupados_bus] for turno in turnos
+    }
+    candidatos = {
+        turno: sum(1 for disponibles in libres.values() if turno in disponibles) for turno in turnos
+    }
+
+    plan = Plan(trabajadores=trabajadores, buses=buses, por_turno=dict.fromkeys(turnos))
+    for turno in sorted(turnos, key=lambda turno: candidatos[turno] / (len(cupos[turno]) or 1)):
+        elegidos = heapq.nsmallest(
+            len(cupos[turno]),
+            (
+                (carga[pk], len(disponibles), pk) for pk, disponibles in libres.items()
+                if turno in disponibles and carga[pk] < max_turnos
+            ),
+        )
+        for bus, (_, _, trabajador) in zip(cupos[turno], elegidos):
+            plan.propuestas.append((bus, turno, trabajador))
+            carga[trabajador] += 1
+            libres[trabajador].remove(turno)
+        plan.sin_conductor += [(bus, turno) for bus in cupos[turno][len(elegidos):]]
+        plan.por_turno[turno] = {
+            'cupos': len(cupos[turno]), 'cubiertos': len(elegidos), 'libres': candidatos[turno],
+        }
+
+    plan.propuestas.sort(key=lambda propuesta: (buses[propuesta[0]], TURNOS.index(propuesta[1])))
+    plan.cargas = dict(sorted(Counter(carga.values()).items()))
+    return plan
+
+
+def aplicar_plan(plan):
+    """Carga el plan en una sola operación todo o nada; retorna el ResultadoImportacion"""
+    filas = plan.filas()
+    return CargaAsignacionesBus(maximo_filas=max(len(filas), 1)).cargar(filas)
@@ -0,0 +1,177 @@
+"""
+Pool de conexiones a la base de datos dentro del proceso.
+
+Django abre una conexión por hilo y, con ``CONN_MAX_AGE``, la conserva entre
+peticiones de ese mismo hilo. Con el pool las conexiones se comparten entre los
+hilos del proceso: al terminar cada petición (``CONN_MAX_AGE = 0``) la conexión
+vuelve al pool en vez de cerrarse, y la siguiente petición, de cualquier hilo,
+la reutiliza sin pagar la conexión, la autenticación y la configuración de la
+sesión.
+
+- ``tamano``: conexiones que se mantienen abiertas en el pool.
+- ``desborde``: conexiones adicionales que se abren en momentos de carga; se
+  cierran al devolverse si el pool ya está lleno.
+- ``espera``: segundos que una petición espera una conexión libre cuando están
+  todas en uso, antes de fallar con ``PoolAgotado``.
+
+Se activa con los backends ``templatesApp.backends.mysql`` y
+``templatesApp.backends.sqlite3`` y ``OPTIONS['pool']`` (ver basedatos.py).
+"""
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from django.db.utils import OperationalError
+
+
+TAMANO = 5
+DESBORDE = 10
+ESPERA = 30
+
+
+class PoolAgotado(OperationalError):
+    pass
+
+
+class PoolConexiones:
+    def __init__(self, tamano=TAMANO, desborde=DESBORDE, espera=ESPERA):
+        self.tamano = tamano
+        self.desborde = desborde
+        self.espera = espera
+        self.abiertas = 0
+        # LIFO: se reutiliza la conexión usada más recientemente
+        self._libres = deque()
+        self._condicion = threading.Condition()
+
+    @property
+    def libres(self):
+        return len(self._libres)
+
+    def obtener(self, crear):
+        """Retorna (conexión, nueva); ``crear()`` abre una conexión si hace falta"""
+        limite = time.monotonic() + self.espera
+        with self._condicion:
+            while True:
+                if self._libres:
+                    return self._libres.pop(), False
+                if self.abiertas < self.tamano + self.desborde:
+                    self.abiertas += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolAgotado(
+                        f'No hay conexiones libres tras {self.espera} s '
+                        f'({self.tamano} + {self.desborde} en uso)'
+                    )
+                self._condicion.wait(restante)
+        try:
+            return crear(), True
+        except BaseException:
+            self._liberar_cupo()
+            raise
+
+    def devolver(self, conexion, descartar=False):
+        """Guarda la conexión para reutilizarla, o la cierra si se descarta o sobra"""
+        with self._condicion:
+            if not descartar and len(self._libres) < self.tamano:
+                self._libres.append(conexion)
+                self._condicion.notify()
+                return
+        self._cerrar(conexion)
+        self._liberar_cupo()
+
+    def vaciar(self):
+        """Cierra las conexiones libres (las que están en uso se cierran al devolverse)"""
+        with self._condicion:
+            libres, self._libres = list(self._libres), deque()
+            self.abiertas -= len(libres)
+            self._condicion.notify_all()
+        for conexion in libres:
+            self._cerrar(conexion)
+
+    def _liberar_cupo(self):
+        with self._condicion:
+            self.abiertas -= 1
+            self._condicion.notify()
+
+    @staticmethod
+    def _cerrar(conexion):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_de(alias, opciones):
+    """Pool compartido por todos los hilos para el alias de base de datos"""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = PoolConexiones(
+                tamano=opciones.get('tamano', TAMANO),
+                desborde=opciones.get('desborde', DESBORDE),
+                espera=opciones.get('espera', ESPERA),
+            )
+        return _pools[alias]
+
+
+def vaciar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.vaciar()
+
+
+class PoolMixin:
+    """
+    Para un ``DatabaseWrapper``: ``connect()`` toma la conexión del pool y
+    ``close()`` la devuelve. Sin ``OPTIONS['pool']`` se comporta como el backend
+    de Django.
+    """
+
+    @property
+    def pool(self):
+        opciones = self.settings_dict['OPTIONS'].get('pool')
+        if opciones is None or opciones is False:
+            return None
+        return pool_de(self.alias, opciones if isinstance(opciones, dict) else {})
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        crear = partial(super().get_new_connection, conn_params)
+        while True:
+            conexion, nueva = pool.obtener(crear)
+            if nueva or not self.settings_dict['CONN_HEALTH_CHECKS'] or self._usable(conexion):
+                return conexion
+            pool.devolver(conexion, descartar=True)
+
+    def _usable(self, conexion):
+        anterior, self.connection = self.connection, conexion
+        try:
+            return self.is_usable()
+        finally:
+            self.connection = anterior
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Una conexión con errores o cerrada a mitad de una transacción no se reutiliza
+        descartar = self.errors_occurred or self.in_atomic_block
+        if not descartar:
+            try:
+                self.connection.rollback()
+            except Exception:
+                descartar = True
+        pool.devolver(self.connection, descartar=descartar)
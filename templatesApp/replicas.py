@@ -0,0 +1,220 @@
+"""
+Réplicas de lectura: las vistas de solo lectura (listados, detalles,
+exportaciones, dashboard, autocompletado y la API) leen de una réplica y todo
+lo demás usa la base primaria (``default``).
+
+- Las vistas se marcan con ``@lectura_replica``, igual que
+  ``@presupuesto_consultas``. ``ReplicasMiddleware`` elige una réplica para cada
+  petición GET/HEAD a una vista marcada y ``RouterReplicas`` envía a ella las
+  lecturas de los modelos de la aplicación durante esa petición (incluido el
+  cuerpo de las exportaciones en streaming). Los usuarios, sesiones y permisos
+  se leen siempre de la primaria.
+- Selección: rotación ponderada suave (``REPLICAS_LECTURA = {alias: peso}``);
+  con pesos iguales es una rotación simple.
+- Leer lo propio: una petición que escribe (POST u otra) hace que la sesión
+  lea de la primaria durante ``REPLICAS_RETRASO`` segundos, el retraso máximo
+  esperado de la replicación. Dentro de la misma petición, tras escribir, las
+  lecturas también van a la primaria.
+- Las escrituras van siempre a la primaria, aunque el objeto se haya leído de
+  una réplica, y solo la primaria recibe migraciones.
+
+Sin réplicas configuradas (``DB_REPLICAS`` vacío) no cambia nada. Para probar
+en local, con ``DB_MOTOR=sqlite`` las réplicas son archivos que
+``sincronizar_replicas`` copia desde la primaria.
+"""
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .pool import vaciar_pools
+
+
+# Apps cuyos modelos se leen de las réplicas
+APPS_REPLICADAS = {'templatesApp'}
+
+RETRASO = 10
+
+CLAVE_SESION = 'replicas_primaria_hasta'
+
+METODOS_LECTURA = ('GET', 'HEAD')
+
+_FIN = object()
+
+
+@dataclass
+class EstadoPeticion:
+    replica: str = None
+    escribio: bool = False
+
+
+_peticion = ContextVar('replicas_peticion', default=None)
+
+
+class ErrorReplicas(Exception):
+    pass
+
+
+def lectura_replica(vista):
+    """Declara que la vista solo lee y puede atenderse desde una réplica"""
+    vista.lectura_replica = True
+    return vista
+
+
+def replica_actual():
+    """Alias de la réplica de la que lee la petición en curso, o None"""
+    estado = _peticion.get()
+    return estado.replica if estado else None
+
+
+def retraso():
+    return getattr(settings, 'REPLICAS_RETRASO', RETRASO)
+
+
+def cacheable(modificado):
+    """
+    False si la petición lee de una réplica que quizá aún no recibe el cambio
+    hecho en ``modificado`` (``time.time()``): lo que se calcule no debe
+    guardarse en caché.
+    """
+    return replica_actual() is None or time.time() - modificado >= retraso()
+
+
+class SelectorReplicas:
+    """Rotación ponderada suave (como nginx): reparte según el peso sin rachas"""
+
+    def __init__(self, pesos):
+        self.pesos = {alias: peso for alias, peso in pesos.items() if peso > 0}
+        self.total = sum(self.pesos.values())
+        self._actuales = dict.fromkeys(self.pesos, 0)
+        self._lock = threading.Lock()
+
+    def elegir(self):
+        if not self.pesos:
+            return None
+        with self._lock:
+            for alias, peso in self.pesos.items():
+                self._actuales[alias] += peso
+            elegido = max(self._actuales, key=self._actuales.get)
+            self._actuales[elegido] -= self.total
+        return elegido
+
+
+class RouterReplicas:
+    def _replicada(self, model):
+        return model._meta.app_label in APPS_REPLICADAS
+
+    def db_for_read(self, model, **hints):
+        if not self._replicada(model):
+            return None
+        estado = _peticion.get()
+        if estado is None:
+            return None
+        return estado.replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if not self._replicada(model):
+            return None
+        estado = _peticion.get()
+        if estado:
+            estado.escribio = True
+            estado.replica = None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases tienen los mismos datos
+        bases = {DEFAULT_DB_ALIAS, *getattr(settings, 'REPLICAS_LECTURA', {})}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in getattr(settings, 'REPLICAS_LECTURA', {}):
+            return False
+        return None
+
+
+class ReplicasMiddleware:
+    """Elige la base de lectura de cada petición y registra las escrituras en la sesión"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.selector = SelectorReplicas(getattr(settings, 'REPLICAS_LECTURA', {}))
+        if not self.selector.pesos:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        estado = EstadoPeticion()
+        token = _peticion.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _peticion.reset(token)
+
+        if estado.replica:
+            response['X-DB-Replica'] = estado.replica
+            if response.streaming:
+                response.streaming_content = self._leer_en(estado, response.streaming_content)
+        if (estado.escribio or request.method not in METODOS_LECTURA) and hasattr(request, 'session'):
+            request.session[CLAVE_SESION] = time.time() + retraso()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        estado = _peticion.get()
+        if (
+            estado is None
+            or not getattr(view_func, 'lectura_replica', False)
+            or request.method not in METODOS_LECTURA
+            or (hasattr(request, 'session') and request.session.get(CLAVE_SESION, 0) > time.time())
+        ):
+            return None
+        estado.replica = self.selector.elegir()
+
+    @staticmethod
+    def _leer_en(estado, contenido):
+        """El cuerpo en streaming se genera después del middleware: cada fragmento lee de la réplica"""
+        iterador = iter(contenido)
+        while True:
+            token = _peticion.set(estado)
+            try:
+                fragmento = next(iterador, _FIN)
+            finally:
+                _peticion.reset(token)
+            if fragmento is _FIN:
+                return
+            yield fragmento
+
+
+def sincronizar_sqlite():
+    """
+    Copia la base SQLite primaria sobre el archivo de cada réplica (en MySQL lo
+    hace la replicación); retorna los pares (alias, archivo) copiados
+    """
+    replicas = list(getattr(settings, 'REPLICAS_LECTURA', {}))
+    for alias in [DEFAULT_DB_ALIAS] + replicas:
+        if connections[alias].vendor != 'sqlite':
+            raise ErrorReplicas(f'La base {alias} no es SQLite: sus réplicas las mantiene el servidor')
+    connections[DEFAULT_DB_ALIAS].close()
+    for alias in replicas:
+        connections[alias].close()
+    # Conexiones que quedaron en el pool apuntando a los archivos anteriores
+    vaciar_pools()
+    copiadas = []
+    origen = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+    try:
+        for alias in replicas:
+            archivo = settings.DATABASES[alias]['NAME']
+            destino = sqlite3.connect(archivo)
+            try:
+                origen.backup(destino)
+            finally:
+                destino.close()
+            copiadas.append((alias, archivo))
+    finally:
+        origen.close()
+    return copiadas
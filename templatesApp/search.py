@@ -0,0 +1,241 @@
+"""
+Búsqueda de texto de los listados.
+
+Cada backend retorna, para un modelo indexado y un texto, una subconsulta con
+los ids que coinciden, de modo que las vistas filtran con ``pk__in`` (o
+``<fk>_id__in`` para búsquedas sobre modelos relacionados) sin recorrer la
+tabla completa con ``LIKE '%q%'``:
+
+- ``FullTextBackend``: índices FULLTEXT de MySQL con el parser ngram.
+- ``NgramBackend``: índice invertido de trigramas en ``TerminoBusqueda``,
+  mantenido por señales al guardar/eliminar. Funciona en cualquier motor.
+
+El backend se elige con ``settings.SEARCH_BACKEND`` ('auto', 'fulltext' o
+'ngram'); 'auto' usa FULLTEXT en MySQL y n-gramas en el resto.
+"""
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, Q
+from django.db.models.constants import OnConflict
+from django.db.models.expressions import RawSQL
+
+from .models import Trabajador, Rol, Bus, TerminoBusqueda
+
+
+# Campos de texto indexados por modelo
+CAMPOS_BUSQUEDA = {
+    Trabajador: ('nombre', 'apellido', 'contacto'),
+    Rol: ('nombre',),
+    Bus: ('patente', 'modelo', 'marca'),
+}
+
+TAMANO_NGRAMA = 3
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes, para indexar y consultar de la misma forma"""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def ngramas(texto, relleno=True):
+    """Trigramas de un texto normalizado; con relleno también los de los extremos"""
+    texto = normalizar(texto)
+    if relleno:
+        texto = f'  {texto}  '
+    return {texto[i:i + TAMANO_NGRAMA] for i in range(len(texto) - TAMANO_NGRAMA + 1)}
+
+
+def _q_icontains(modelo, texto):
+    return reduce(or_, (Q(**{f'{campo}__icontains': texto}) for campo in CAMPOS_BUSQUEDA[modelo]))
+
+
+class NgramBackend:
+    """Índice invertido de trigramas mantenido en la tabla TerminoBusqueda"""
+
+    mantiene_indice = True
+
+    def ids_coincidentes(self, modelo, texto):
+        clave = modelo._meta.model_name
+        termino = normalizar(texto)
+        terminos = TerminoBusqueda.objects.filter(modelo=clave)
+
+        if len(termino) < TAMANO_NGRAMA:
+            # Textos cortos: prefijo de trigrama (los extremos van rellenados)
+            candidatos = terminos.filter(ngrama__startswith=termino).values('objeto_id')
+        else:
+            buscados = ngramas(termino, relleno=False)
+            candidatos = (
+                terminos.filter(ngrama__in=buscados)
+                .values('objeto_id')
+                .annotate(coincidencias=Count('ngrama'))
+                .filter(coincidencias=len(buscados))
+                .values('objeto_id')
+            )
+
+        # Los trigramas solo acotan candidatos: se confirma la subcadena sobre ellos
+        return (
+            modelo.objects.filter(pk__in=candidatos)
+            .filter(_q_icontains(modelo, texto))
+            .values('pk')
+        )
+
+    def indexar(self, instancia):
+        modelo = type(instancia)
+        clave = modelo._meta.model_name
+        nuevos = set()
+        for campo in CAMPOS_BUSQUEDA[modelo]:
+            valor = getattr(instancia, campo)
+            if valor:
+                nuevos |= ngramas(valor)
+
+        with transaction.atomic(using=router.db_for_write(TerminoBusqueda)):
+            TerminoBusqueda.objects.filter(modelo=clave, objeto_id=instancia.pk).delete()
+            TerminoBusqueda.objects.bulk_create([
+                TerminoBusqueda(modelo=clave, objeto_id=instancia.pk, ngrama=ngrama)
+                for ngrama in nuevos
+            ])
+
+    def indexar_lote(self, modelo, filas):
+        """Indexa filas (pk, campo1, campo2, ...) ya insertadas, sin borrar previas"""
+        clave = modelo._meta.model_name
+        terminos = []
+        for pk, *valores in filas:
+            vistos = set()
+            for valor in valores:
+                if valor:
+                    vistos |= ngramas(valor)
+            terminos.extend((clave, pk, ngrama) for ngrama in vistos)
+        if not terminos:
+            return
+
+        # Un lote produce decenas de trigramas por fila: se insertan con
+        # executemany en vez de instanciar un TerminoBusqueda por término.
+        connection = connections[router.db_for_write(TerminoBusqueda)]
+        opts = TerminoBusqueda._meta
+        campos = [opts.get_field(nombre) for nombre in ('modelo', 'objeto_id', 'ngrama')]
+        columnas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+        sql = '%s %s (%s) VALUES (%s) %s' % (
+            connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+            connection.ops.quote_name(opts.db_table),
+            columnas,
+            ', '.join(['%s'] * len(campos)),
+            connection.ops.on_conflict_suffix_sql(campos, OnConflict.IGNORE, None, None),
+        )
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(terminos), 5000):
+                cursor.executemany(sql, terminos[inicio:inicio + 5000])
+
+    def desindexar(self, instancia):
+        TerminoBusqueda.objects.filter(
+            modelo=instancia._meta.model_name, objeto_id=instancia.pk
+        ).delete()
+
+
+class FullTextBackend:
+    """MATCH ... AGAINST sobre los índices FULLTEXT (parser ngram) de MySQL"""
+
+    mantiene_indice = False
+
+    # ngram_token_size por defecto de MySQL
+    TAMANO_TOKEN = 2
+
+    def ids_coincidentes(self, modelo, texto):
+        texto = texto.replace('"', ' ').strip()
+        if len(texto) < self.TAMANO_TOKEN:
+            return modelo.objects.filter(_q_icontains(modelo, texto)).values('pk')
+
+        connection = connections[router.db_for_read(modelo)]
+        tabla = connection.ops.quote_name(modelo._meta.db_table)
+        pk = connection.ops.quote_name(modelo._meta.pk.column)
+        columnas = ', '.join(
+            connection.ops.quote_name(modelo._meta.get_field(campo).column)
+            for campo in CAMPOS_BUSQUEDA[modelo]
+        )
+        return RawSQL(
+            f'SELECT {pk} FROM {tabla} WHERE MATCH ({columnas}) AGAINST (%s IN BOOLEAN MODE)',
+            [f'"{texto}"'],
+        )
+
+    def indexar(self, instancia):
+        pass
+
+    def indexar_lote(self, modelo, filas):
+        pass
+
+    def desindexar(self, instancia):
+        pass
+
+
+def get_backend():
+    """Retorna el backend de búsqueda configurado"""
+    nombre = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if nombre == 'auto':
+        vendor = connections[router.db_for_read(Trabajador)].vendor
+        nombre = 'fulltext' if vendor == 'mysql' else 'ngram'
+    if nombre == 'fulltext':
+        return FullTextBackend()
+    if nombre == 'ngram':
+        return NgramBackend()
+    raise ValueError(f'SEARCH_BACKEND desconocido: {nombre}')
+
+
+def buscar(modelo, texto):
+    """Subconsulta con los ids de ``modelo`` que coinciden con ``texto``"""
+    return get_backend().ids_coincidentes(modelo, texto)
+
+
+def buscar_trabajadores(queryset, texto):
+    return queryset.filter(pk__in=buscar(Trabajador, texto))
+
+
+def buscar_roles(queryset, texto):
+    return queryset.filter(pk__in=buscar(Rol, texto))
+
+
+def buscar_buses(queryset, texto):
+    return queryset.filter(pk__in=buscar(Bus, texto))
+
+
+def buscar_estados_bus(queryset, texto):
+    return queryset.filter(bus_id__in=buscar(Bus, texto))
+
+
+def buscar_asignaciones_rol(queryset, texto):
+    return queryset.filter(
+        Q(trabajador_id__in=buscar(Trabajador, texto)) |
+        Q(rol_id__in=buscar(Rol, texto))
+    )
+
+
+def buscar_asignaciones_bus(queryset, texto):
+    return queryset.filter(
+        Q(trabajador_id__in=buscar(Trabajador, texto)) |
+        Q(bus_id__in=buscar(Bus, texto))
+    )
+
+
+def reconstruir_indice(modelo, tamano_lote=2000):
+    """Regenera el índice de n-gramas de un modelo completo, por lotes"""
+    backend = get_backend()
+    if not backend.mantiene_indice:
+        return 0
+    TerminoBusqueda.objects.filter(modelo=modelo._meta.model_name).delete()
+    campos = CAMPOS_BUSQUEDA[modelo]
+    total = 0
+    ultimo_pk = 0
+    while True:
+        filas = list(
+            modelo.objects.filter(pk__gt=ultimo_pk).order_by('pk')
+            .values_list('pk', *campos)[:tamano_lote]
+        )
+        if not filas:
+            return total
+        with transaction.atomic(using=router.db_for_write(TerminoBusqueda)):
+            backend.indexar_lote(modelo, filas)
+        total += len(filas)
+        ultimo_pk = filas[-1][0]
@@ -0,0 +1,138 @@
+import logging
+
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.utils import timezone
+
+from . import cache_detalle
+from .models import (
+    Trabajador, Rol, Bus, EstadoBus, HistorialEstadoBus, AsignacionRol, AsignacionBus,
+    asignaciones_finalizadas,
+)
+from .search import CAMPOS_BUSQUEDA, get_backend
+from .stats import MODELOS_DASHBOARD, invalidar_dashboard_stats
+
+
+def invalidar_estadisticas(sender, **kwargs):
+    """Invalida las estadísticas del dashboard cuando cambia un modelo contado"""
+    invalidar_dashboard_stats()
+
+
+def actualizar_indice_busqueda(sender, instance, raw=False, **kwargs):
+    """Reindexa los n-gramas del objeto guardado (solo backends que mantienen índice)"""
+    if raw:
+        return
+    backend = get_backend()
+    if backend.mantiene_indice:
+        backend.indexar(instance)
+
+
+def eliminar_indice_busqueda(sender, instance, **kwargs):
+    """Elimina los n-gramas del objeto eliminado"""
+    backend = get_backend()
+    if backend.mantiene_indice:
+        backend.desindexar(instance)
+
+
+def descontar_asignacion(sender, instance, using, **kwargs):
+    """Descuenta de los contadores desnormalizados la asignación activa eliminada"""
+    instance.ajustar_contadores(instance._claves_activas(), -1, using)
+
+
+def limpiar_estado_actual(sender, instance, using, **kwargs):
+    """
+    Quita del bus la proyección del estado eliminado y cierra su intervalo en
+    el historial (también en eliminaciones por queryset)
+    """
+    HistorialEstadoBus.cerrar_vigente(instance.bus_id, timezone.now(), using=using)
+    Bus.proyectar_estado(instance.bus_id, using=using)
+
+
+def invalidar_detalle(sender, instance, raw=False, **kwargs):
+    """Renueva la versión del objeto y de sus relacionados en la caché de detalles"""
+    if raw:
+        return
+    cache_detalle.invalidar(instance)
+
+
+def invalidar_detalle_finalizadas(sender, ids, using=None, **kwargs):
+    cache_detalle.invalidar_asignaciones(sender, ids, using)
+
+
+def invalidar_permisos(sender, action, **kwargs):
+    """Los detalles en caché dependen de los permisos del usuario"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        cache_detalle.invalidar_permisos()
+
+
+auditoria = logging.getLogger('templatesApp.auditoria')
+
+
+def registrar_finalizacion(sender, ids, fecha, usuario=None, **kwargs):
+    """Deja una línea de auditoría por lote de asignaciones finalizadas"""
+    auditoria.info(
+        '%s: %d finalizadas el %s por %s (ids %s)',
+        sender._meta.verbose_name_plural, len(ids), fecha, usuario or 'sistema',
+        ','.join(map(str, ids)),
+    )
+
+
+def conectar_senales():
+    """Registra los receptores de señales de la aplicación"""
+    for modelo in MODELOS_DASHBOARD:
+        post_save.connect(
+            invalidar_estadisticas, sender=modelo,
+            dispatch_uid=f'dashboard_stats_save_{modelo.__name__}'
+        )
+        post_delete.connect(
+            invalidar_estadisticas, sender=modelo,
+            dispatch_uid=f'dashboard_stats_delete_{modelo.__name__}'
+        )
+
+    for modelo in CAMPOS_BUSQUEDA:
+        post_save.connect(
+            actualizar_indice_busqueda, sender=modelo,
+            dispatch_uid=f'busqueda_save_{modelo.__name__}'
+        )
+        post_delete.connect(
+            eliminar_indice_busqueda, sender=modelo,
+            dispatch_uid=f'busqueda_delete_{modelo.__name__}'
+        )
+
+    for modelo in (Trabajador, Rol, Bus, EstadoBus, HistorialEstadoBus, AsignacionRol, AsignacionBus):
+        post_save.connect(
+            invalidar_detalle, sender=modelo,
+            dispatch_uid=f'cache_detalle_save_{modelo.__name__}'
+        )
+        post_delete.connect(
+            invalidar_detalle, sender=modelo,
+            dispatch_uid=f'cache_detalle_delete_{modelo.__name__}'
+        )
+
+    for relacion in (User.user_permissions, User.groups, Group.permissions):
+        m2m_changed.connect(
+            invalidar_permisos, sender=relacion.through,
+            dispatch_uid=f'cache_detalle_permisos_{relacion.through.__name__}'
+        )
+
+    post_delete.connect(
+        limpiar_estado_actual, sender=EstadoBus, dispatch_uid='estado_actual_delete'
+    )
+
+    for modelo in (AsignacionRol, AsignacionBus):
+        post_delete.connect(
+            descontar_asignacion, sender=modelo,
+            dispatch_uid=f'contadores_delete_{modelo.__name__}'
+        )
+        asignaciones_finalizadas.connect(
+            invalidar_estadisticas, sender=modelo,
+            dispatch_uid=f'dashboard_stats_finalizadas_{modelo.__name__}'
+        )
+        asignaciones_finalizadas.connect(
+            invalidar_detalle_finalizadas, sender=modelo,
+            dispatch_uid=f'cache_detalle_finalizadas_{modelo.__name__}'
+        )
+        asignaciones_finalizadas.connect(
+            registrar_finalizacion, sender=modelo,
+            dispatch_uid=f'auditoria_finalizadas_{modelo.__name__}'
+        )
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.utils import timezone
+
+from .basedatos import timeout_cache
+from .models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus
+from .replicas import cacheable
+
+
+DASHBOARD_STATS_KEY = 'templatesApp:dashboard_stats'
+
+# Instante del último cambio (time.time()), para no guardar en caché
+# estadísticas leídas de una réplica que aún no lo recibe
+DASHBOARD_CAMBIO_KEY = 'templatesApp:dashboard_stats:cambio'
+
+# Respaldo por si algún cambio escapa a las señales (p.ej. queryset.update())
+DASHBOARD_STATS_TIMEOUT = getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 300)
+
+# Modelos cuyos cambios invalidan las estadísticas del dashboard
+MODELOS_DASHBOARD = (Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus)
+
+
+def _consultas_dashboard():
+    """Querysets de cada contador del dashboard, en el orden del SELECT"""
+    return {
+        'total_trabajadores': Trabajador.objects.filter(activo=True),
+        'total_buses': Bus.objects.filter(activo=True),
+        'total_roles': Rol.objects.filter(activo=True),
+        'buses_operativos': EstadoBus.objects.filter(estado='OPERATIVO'),
+        'asignaciones_activas_bus': AsignacionBus.objects.filter(activo=True),
+        'asignaciones_activas_rol': AsignacionRol.objects.filter(activo=True),
+    }
+
+
+def calcular_estadisticas():
+    """Calcula todos los contadores del dashboard en una sola consulta"""
+    consultas = _consultas_dashboard()
+    alias = router.db_for_read(Trabajador)
+    connection = connections[alias]
+
+    columnas = []
+    parametros = []
+    for nombre, queryset in consultas.items():
+        sql, params = queryset.order_by().values('pk').query.get_compiler(alias).as_sql()
+        columnas.append(
+            f'(SELECT COUNT(*) FROM ({sql}) {connection.ops.quote_name("sub_" + nombre)})'
+        )
+        parametros.extend(params)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columnas)}", parametros)
+        fila = cursor.fetchone()
+
+    estadisticas = dict(zip(consultas.keys(), fila))
+    estadisticas['asignaciones_activas'] = (
+        estadisticas['asignaciones_activas_bus'] + estadisticas['asignaciones_activas_rol']
+    )
+    estadisticas['actualizado'] = timezone.now()
+    return estadisticas
+
+
+def get_dashboard_stats():
+    """Retorna las estadísticas del dashboard desde caché, calculándolas si faltan"""
+    estadisticas = cache.get(DASHBOARD_STATS_KEY)
+    if estadisticas is None:
+        estadisticas = calcular_estadisticas()
+        if cacheable(cache.get(DASHBOARD_CAMBIO_KEY, 0)):
+            cache.set(DASHBOARD_STATS_KEY, estadisticas, timeout_cache(DASHBOARD_STATS_TIMEOUT))
+    return estadisticas
+
+
+def invalidar_dashboard_stats():
+    """Descarta las estadísticas en caché para que se recalculen en el próximo acceso"""
+    cache.delete(DASHBOARD_STATS_KEY)
+    cache.set(DASHBOARD_CAMBIO_KEY, time.time(), timeout_cache(None))
@@ -0,0 +1,12 @@
+from django import template
+
+from templatesApp.estaticos import url_vendor
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(ruta):
+    """URL de Bootstrap/Font Awesome propios (static/vendor) o, si no se descargaron, del CDN"""
+    return url_vendor(ruta)
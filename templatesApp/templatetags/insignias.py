@@ -0,0 +1,24 @@
+from django import template
+
+from templatesApp.insignias import (
+    INSIGNIAS_ACTIVA, INSIGNIAS_ACTIVO, insignia_estado, insignia_turno, url_fila
+)
+
+
+register = template.Library()
+
+register.filter('insignia_estado', insignia_estado)
+register.filter('insignia_turno', insignia_turno)
+register.filter('url_fila', url_fila)
+
+
+@register.filter
+def insignia_activo(valor):
+    """Activo/Inactivo"""
+    return INSIGNIAS_ACTIVO[bool(valor)]
+
+
+@register.filter
+def insignia_activa(valor):
+    """Activa/Inactiva (asignaciones)"""
+    return INSIGNIAS_ACTIVA[bool(valor)]
@@ -1,3 +1,1348 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import Q
+from django.db.utils import load_backend
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse, set_script_prefix
+from django.utils import timezone
+from django.utils.html import format_html
+
+from . import views
+from .asignacion_masiva import CargaAsignacionesBus
+from .basedatos import con_pool, timeout_cache
+from .conflictos import detectar_conflictos
+from .consultas import PresupuestoConsultasExcedido, limitar_consultas
+from .datos_sinteticos import ConfiguracionFlota, GeneradorFlota
+from .estaticos import (
+    CACHE_INMUTABLE, CACHE_SIN_HASH, _nombres_con_hash, cargar_pillow, minificar_css, servir,
+)
+from .exportacion import COLUMNAS_TRABAJADORES, TAMANO_LOTE
+from .forms import AsignacionBusForm
+from .importacion import Importador, leer_archivo
+from .insignias import insignia_admin_estado, url_fila
+from .models import (
+    ESTADOS_BUS, AsignacionBus, AsignacionRol, Bus, EstadoBus, HistorialEstadoBus, Rol, TerminoBusqueda,
+    Trabajador,
+)
+from .pagination import CursorInvalido, KeysetPaginator, codificar_cursor, decodificar_cursor
+from .pool import PoolAgotado, PoolConexiones
+from .replicas import (
+    CLAVE_SESION, ReplicasMiddleware, RouterReplicas, SelectorReplicas, lectura_replica, replica_actual,
+)
+from .search import (
+    FullTextBackend, NgramBackend, buscar_asignaciones_bus, buscar_buses, buscar_trabajadores,
+    get_backend, reconstruir_indice,
+)
+from .stats import DASHBOARD_STATS_KEY
+
+
+# Las pruebas no ejecutan collectstatic: sin el manifiesto de nombres con hash
+ESTATICOS_SIN_MANIFIESTO = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(STORAGES=ESTATICOS_SIN_MANIFIESTO)
+class PruebaVistas(TestCase):
+    """Base de las pruebas que cargan páginas con un usuario autenticado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('admin', is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        # La caché local sobrevive entre pruebas (versiones, dashboard, facetas)
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+
+def _trabajador(nombre='Juan', apellido='Perez', **extra):
+    return Trabajador.objects.create(
+        nombre=nombre, apellido=apellido, direccion='Calle 1', contacto='+56 9 1234 5678', edad=30, **extra
+    )
+
+
+def _bus(patente, **extra):
+    return Bus.objects.create(patente=patente, modelo='O500', año=2015, capacidad=40, **extra)
+
+
+def _csv(texto):
+    return io.BytesIO(texto.encode('utf-8'))
+
+
+class ImportacionTests(PruebaVistas):
+    """Importación masiva: los errores de una fila no detienen el resto"""
+
+    CSV_BUSES = (
+        'patente,modelo,año,capacidad,marca\n'
+        'AAA-111,O500,2015,40,Mercedes\n'
+        'BBB-222,O500,1980,40,Mercedes\n'
+        'CCC-333,O500,abc,40,Mercedes\n'
+        'DDD-444,O500,2018,90,Mercedes\n'
+        'AAA-111,O500,2016,40,Mercedes\n'
+        'EEE-555,O500,2020,50,Volvo\n'
+    )
+
+    def test_filas_validas_e_invalidas(self):
+        filas = leer_archivo(_csv(self.CSV_BUSES), 'buses.csv')
+        resultado = Importador('buses').importar(filas)
+
+        self.assertEqual(resultado.procesados, 6)
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual(
+            sorted(Bus.objects.values_list('patente', flat=True)), ['AAA-111', 'EEE-555']
+        )
+        errores = {error['fila']: error['errores'] for error in resultado.errores}
+        self.assertEqual(sorted(errores), [3, 4, 5, 6])
+        self.assertIn('año', errores[3])
+        self.assertIn('año', errores[4])
+        self.assertIn('capacidad', errores[5])
+        self.assertIn('patente', errores[6])
+
+    def test_lotes_pequenos(self):
+        filas = leer_archivo(_csv(self.CSV_BUSES), 'buses.csv')
+        resultado = Importador('buses', tamano_lote=2).importar(filas)
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual(len(resultado.errores), 4)
+
+    def test_valor_unico_insertado_por_otro(self):
+        filas = leer_archivo(_csv(self.CSV_BUSES), 'buses.csv')
+        importador = Importador('buses')
+        # Simula una inserción concurrente entre la verificación de unicidad y el insert
+        validar_unicos = importador._validar_unicos
+
+        def con_insercion_concurrente(validos, resultado):
+            restantes = validar_unicos(validos, resultado)
+            Bus.objects.create(patente='EEE-555', modelo='X', año=2010, capacidad=30)
+            return restantes
+        importador._validar_unicos = con_insercion_concurrente
+
+        resultado = importador.importar(filas)
+        self.assertEqual(resultado.creados, 1)
+        self.assertTrue(Bus.objects.filter(patente='AAA-111').exists())
+        self.assertIn(7, [error['fila'] for error in resultado.errores])
+
+    def test_xlsx_danado(self):
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            self.skipTest('openpyxl no está instalado')
+        filas = leer_archivo(io.BytesIO(b'no es un zip'), 'buses.xlsx')
+        resultado = Importador('buses').importar(filas)
+        self.assertEqual(resultado.creados, 0)
+        self.assertEqual(resultado.errores[0]['fila'], 1)
+        self.assertIn('archivo', resultado.errores[0]['errores'])
+
+    def test_vista_reporta_errores(self):
+        archivo = _csv(self.CSV_BUSES)
+        archivo.name = 'buses.csv'
+        response = self.client.post(reverse('importar_datos'), {'entidad': 'buses', 'archivo': archivo})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['errores']), 4)
+        self.assertEqual(Bus.objects.count(), 2)
+
+
+class CacheTests(PruebaVistas):
+    """Versiones de los detalles y su vencimiento según la caché sea compartida o local"""
+
+    def test_etag_cambia_al_editar(self):
+        bus = Bus.objects.create(patente='AAA-111', modelo='O500', año=2015, capacidad=40)
+        url = reverse('bus_detalle', args=[bus.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bus.modelo = 'O400'
+        bus.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'O400')
+
+    @override_settings(CACHE_LOCAL_TIMEOUT=30)
+    def test_timeout_con_cache_local(self):
+        self.assertEqual(timeout_cache(None), 30)
+        self.assertEqual(timeout_cache(300), 30)
+        self.assertEqual(timeout_cache(10), 10)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'templatesapp_cache',
+    }})
+    def test_timeout_con_cache_compartida(self):
+        self.assertIsNone(timeout_cache(None))
+        self.assertEqual(timeout_cache(300), 300)
+
+
+class DashboardTests(PruebaVistas):
+    """Las estadísticas en caché del dashboard se invalidan con cada cambio"""
+
+    def _totales(self):
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(cache.get(DASHBOARD_STATS_KEY))
+        return response.context['total_trabajadores'], response.context['total_buses']
+
+    def test_crear_editar_eliminar(self):
+        self.assertEqual(self._totales(), (0, 0))
+        juan = _trabajador('Juan', 'Perez')
+        bus = _bus('AAA-111')
+        self.assertEqual(self._totales(), (1, 1))
+        juan.activo = False
+        juan.save()
+        self.assertEqual(self._totales(), (0, 1))
+        bus.delete()
+        self.assertEqual(self._totales(), (0, 0))
+
+    def test_accion_del_admin(self):
+        juan = _trabajador('Juan', 'Perez')
+        self.assertEqual(self._totales(), (1, 0))
+        # Un UPDATE sin señales: la acción invalida por su cuenta
+        self.client.post(reverse('admin:templatesApp_trabajador_changelist'), {
+            'action': 'desactivar_trabajadores', '_selected_action': [juan.pk],
+        })
+        self.assertEqual(self._totales(), (0, 0))
+
+    def test_importacion(self):
+        self.assertEqual(self._totales(), (0, 0))
+        Importador('buses').importar(leer_archivo(_csv(
+            'patente,modelo,año,capacidad,marca\n'
+            'AAA-111,O500,2015,40,Mercedes\n'
+            'BBB-222,O500,2016,40,Mercedes\n'
+        ), 'buses.csv'))
+        self.assertEqual(self._totales(), (0, 2))
+
+
+class AdminConsultasTests(PruebaVistas):
+    """Las consultas de cada changelist no dependen de las filas por página"""
+
+    FILAS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        GeneradorFlota(ConfiguracionFlota(
+            trabajadores=cls.FILAS, buses=cls.FILAS, roles=cls.FILAS,
+            asignaciones_rol=cls.FILAS, asignaciones_bus=cls.FILAS, lote=1000,
+        )).generar()
+
+    def _consultas(self, modelo, por_pagina):
+        url = reverse(f'admin:{modelo._meta.app_label}_{modelo._meta.model_name}_changelist')
+        with mock.patch.object(admin.site._registry[modelo], 'list_per_page', por_pagina):
+            with limitar_consultas() as registro:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return registro.cantidad, len(response.context['cl'].result_list)
+
+    def test_consultas_constantes(self):
+        for modelo in (Trabajador, Rol, Bus, EstadoBus, HistorialEstadoBus, AsignacionRol, AsignacionBus):
+            with self.subTest(modelo=modelo.__name__):
+                self._consultas(modelo, 20)  # sesión y usuario ya cargados
+                pocas, filas_pocas = self._consultas(modelo, 20)
+                muchas, filas_muchas = self._consultas(modelo, self.FILAS)
+                self.assertEqual(filas_pocas, 20)
+                self.assertGreater(filas_muchas, 20 * 10)
+                self.assertEqual(pocas, muchas)
+
+
+class EstadoActualBusTests(TestCase):
+    """Proyección de EstadoBus en Bus.estado_actual y en el historial"""
+
+    def setUp(self):
+        self.bus = _bus('AAA-111')
+        self.juan = _trabajador('Juan', 'Perez')
+
+    def _asignable(self):
+        try:
+            AsignacionBus(trabajador=self.juan, bus=Bus.objects.get(pk=self.bus.pk), turno='NOCHE').clean()
+        except ValidationError:
+            return False
+        return True
+
+    def _vigente(self):
+        return HistorialEstadoBus.objects.filter(bus=self.bus, vigente_hasta__isnull=True)
+
+    def _proyeccion(self):
+        self.bus.refresh_from_db()
+        self.assertFalse(Bus.estados_desfasados().exists())
+        return self.bus.estado_actual, self.bus.kilometraje_actual
+
+    def test_guardar_y_eliminar(self):
+        estado = EstadoBus.objects.create(bus=self.bus, estado='OPERATIVO', kilometraje=1000)
+        self.assertEqual(self._proyeccion(), ('OPERATIVO', 1000))
+        self.assertTrue(self._asignable())
+
+        estado.estado, estado.kilometraje = 'REPARACION', 1200
+        estado.save()
+        self.assertEqual(self._proyeccion(), ('REPARACION', 1200))
+        self.assertFalse(self._asignable())
+        self.assertEqual(list(self._vigente().values_list('estado', flat=True)), ['REPARACION'])
+        self.assertFalse(Bus.disponibles().exists())
+
+        # Sin EstadoBus el bus vuelve a "sin estado": filtrable y asignable
+        estado.delete()
+        self.assertEqual(self._proyeccion(), (None, None))
+        self.assertTrue(self._asignable())
+        self.assertEqual(list(Bus.disponibles()), [self.bus])
+        self.assertFalse(self._vigente().exists())
+        self.assertIsNone(HistorialEstadoBus.estado_en(self.bus, timezone.now()))
+        self.assertEqual(HistorialEstadoBus.objects.filter(bus=self.bus).count(), 2)
+
+    def test_eliminar_por_queryset(self):
+        EstadoBus.objects.create(bus=self.bus, estado='MANTENIMIENTO', kilometraje=500)
+        self.assertFalse(self._asignable())
+        EstadoBus.objects.filter(bus=self.bus).delete()
+        self.assertEqual(self._proyeccion(), (None, None))
+        self.assertTrue(self._asignable())
+        self.assertFalse(self._vigente().exists())
+
+    def test_cambiar_de_bus(self):
+        otro = _bus('BBB-222')
+        estado = EstadoBus.objects.create(bus=self.bus, estado='REPARACION', kilometraje=500)
+        estado.bus = otro
+        estado.save()
+        self.assertEqual(self._proyeccion(), (None, None))
+        self.assertFalse(self._vigente().exists())
+        otro.refresh_from_db()
+        self.assertEqual(otro.estado_actual, 'REPARACION')
+
+
+class HistorialEstadoBusAdminTests(PruebaVistas):
+    """El historial de estados es de solo lectura también en el admin"""
+
+    def test_sin_eliminar(self):
+        EstadoBus.objects.create(bus=_bus('AAA-111'), estado='MANTENIMIENTO', kilometraje=1000)
+        evento = HistorialEstadoBus.objects.get()
+        url = reverse('admin:templatesApp_historialestadobus_changelist')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'delete_selected')
+
+        response = self.client.post(url, {'action': 'delete_selected', '_selected_action': [evento.pk]})
+        self.assertTrue(HistorialEstadoBus.objects.filter(pk=evento.pk).exists())
+        response = self.client.post(reverse('admin:templatesApp_historialestadobus_delete', args=[evento.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(HistorialEstadoBus.objects.filter(pk=evento.pk).exists())
+
+
+class PresupuestoConsultasTests(PruebaVistas):
+    """limitar_consultas, @presupuesto_consultas y el modo estricto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        GeneradorFlota(ConfiguracionFlota(
+            trabajadores=60, buses=20, roles=10, asignaciones_rol=80, asignaciones_bus=120, lote=1000,
+        )).generar()
+
+    def test_limitar_consultas_excedido(self):
+        with self.assertRaisesMessage(PresupuestoConsultasExcedido, '2 consultas (presupuesto: 1)'):
+            with limitar_consultas(1):
+                list(Bus.objects.all())
+                list(Rol.objects.all())
+
+    def test_limitar_consultas_detecta_n_mas_1(self):
+        with self.assertRaisesMessage(PresupuestoConsultasExcedido, 'N+1'):
+            with limitar_consultas(umbral=3):
+                for asignacion in AsignacionBus.objects.all()[:5]:
+                    asignacion.bus.patente
+        with limitar_consultas(1, umbral=3):
+            for asignacion in AsignacionBus.objects.select_related('bus')[:5]:
+                asignacion.bus.patente
+
+    @override_settings(CONSULTAS_ESTRICTO=True)
+    def test_vistas_dentro_del_presupuesto(self):
+        trabajador = Trabajador.objects.filter(buses_activos__gt=0).first()
+        bus = Bus.objects.filter(conductores_activos__gt=0).first()
+        urls = [
+            reverse('index'),
+            reverse('trabajadores_list'), reverse('roles_list'), reverse('buses_list'),
+            reverse('estados_bus_list'), reverse('asignaciones_rol_list'), reverse('asignaciones_bus_list'),
+            reverse('trabajadores_list') + '?paginacion=cursor&search=a',
+            reverse('asignaciones_bus_list') + '?turno=NOCHE&paginacion=cursor',
+            reverse('trabajador_detalle', args=[trabajador.pk]),
+            reverse('bus_detalle', args=[bus.pk]),
+            reverse('rol_detalle', args=[Rol.objects.first().pk]),
+            reverse('estado_bus_detalle', args=[EstadoBus.objects.first().pk]),
+            reverse('asignacion_rol_detalle', args=[AsignacionRol.objects.first().pk]),
+            reverse('asignacion_bus_detalle', args=[AsignacionBus.objects.first().pk]),
+            reverse('autocompletar_trabajadores') + '?q=an',
+            reverse('api_trabajadores'), reverse('api_buses') + '?incluir=conductores',
+            reverse('api_asignaciones_bus') + '?incluir=trabajador,bus',
+            # Peor caso de la API: todas las colecciones y el total
+            reverse('api_trabajadores') + '?incluir=roles,buses&total=1',
+            reverse('api_roles') + '?incluir=trabajadores&total=1',
+            reverse('api_buses') + '?incluir=conductores&total=1',
+            reverse('api_estados_bus') + '?incluir=bus&total=1',
+            reverse('api_asignaciones_rol') + '?incluir=trabajador,rol&total=1',
+            reverse('api_asignaciones_bus') + '?incluir=trabajador,bus&total=1&search=a',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(int(response['X-DB-Queries']), int(response['X-DB-Budget']))
+
+    @override_settings(CONSULTAS_ESTRICTO=True)
+    def test_modo_estricto_falla_al_exceder(self):
+        with mock.patch('templatesApp.views.index.presupuesto_consultas', 0):
+            with self.assertLogs('templatesApp.consultas', 'WARNING'):
+                with self.assertRaises(PresupuestoConsultasExcedido):
+                    self.client.get(reverse('index'))
+
+
+class ContadoresTests(TestCase):
+    """Contadores desnormalizados de asignaciones activas"""
+
+    def setUp(self):
+        self.juan = _trabajador('Juan', 'Perez')
+        self.ana = _trabajador('Ana', 'Rojas')
+        self.bus = _bus('AAA-111')
+        self.rol = Rol.objects.create(nombre='Conductor')
+
+    def _contadores(self):
+        for obj in (self.juan, self.ana, self.bus, self.rol):
+            obj.refresh_from_db()
+        return (
+            self.juan.buses_activos, self.ana.buses_activos, self.bus.conductores_activos,
+            self.juan.roles_activos, self.rol.asignaciones_activas,
+        )
+
+    def _sin_desfase(self):
+        for modelo in (AsignacionBus, AsignacionRol):
+            for (relacionado, contador), desfasados in modelo.contadores_desfasados().items():
+                self.assertFalse(desfasados.exists(), f'{relacionado.__name__}.{contador}')
+
+    def test_crear_editar_finalizar_eliminar(self):
+        asignacion = AsignacionBus.objects.create(trabajador=self.juan, bus=self.bus)
+        AsignacionRol.objects.create(trabajador=self.juan, rol=self.rol)
+        self.assertEqual(self._contadores(), (1, 0, 1, 1, 1))
+
+        asignacion.trabajador = self.ana
+        asignacion.save()
+        self.assertEqual(self._contadores(), (0, 1, 1, 1, 1))
+
+        asignacion.finalizar_asignacion()
+        self.assertEqual(self._contadores(), (0, 0, 0, 1, 1))
+
+        asignacion.activo = True
+        asignacion.fecha_finalizacion = None
+        asignacion.save()
+        asignacion.delete()
+        self.assertEqual(self._contadores(), (0, 0, 0, 1, 1))
+        self._sin_desfase()
+
+    def test_finalizar_en_bloque(self):
+        otro = _bus('BBB-222')
+        AsignacionBus.objects.create(trabajador=self.juan, bus=self.bus, turno='MAÑANA')
+        AsignacionBus.objects.create(trabajador=self.juan, bus=otro, turno='TARDE')
+        AsignacionBus.objects.create(trabajador=self.ana, bus=self.bus, turno='NOCHE')
+
+        ids = AsignacionBus.objects.filter(trabajador=self.juan).finalizar()
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(self._contadores()[:3], (0, 1, 1))
+        self.assertEqual(AsignacionBus.objects.filter(trabajador=self.juan).finalizar(), [])
+        self._sin_desfase()
+
+    def test_eliminar_en_cascada(self):
+        AsignacionBus.objects.create(trabajador=self.juan, bus=self.bus)
+        AsignacionRol.objects.create(trabajador=self.juan, rol=self.rol)
+        self.juan.delete()
+        self.bus.refresh_from_db()
+        self.rol.refresh_from_db()
+        self.assertEqual((self.bus.conductores_activos, self.rol.asignaciones_activas), (0, 0))
+
+    def test_recalcular_corrige_desfase(self):
+        AsignacionBus.objects.create(trabajador=self.juan, bus=self.bus)
+        Trabajador.objects.filter(pk=self.juan.pk).update(buses_activos=7)
+        self.assertTrue(AsignacionBus.contadores_desfasados()[(Trabajador, 'buses_activos')].exists())
+        AsignacionBus.recalcular_contadores()
+        self._sin_desfase()
+
+
+class CursorTests(TestCase):
+    """Paginación por clave: codificación del cursor y límites de página"""
+
+    def test_codificar_y_decodificar(self):
+        momento = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        cursor = codificar_cursor(['Pérez', momento, 42], 'p')
+        self.assertNotIn('=', cursor)
+        valores, direccion = decodificar_cursor(cursor)
+        self.assertEqual(direccion, 'p')
+        self.assertEqual(valores[0], 'Pérez')
+        self.assertEqual(valores[1], momento.isoformat())
+        self.assertEqual(valores[2], 42)
+
+    def test_cursores_invalidos(self):
+        for cursor in ('', 'xyz', codificar_cursor(['a'], 'x'), 'eyJ2IjoxLCJkIjoibiJ9'):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(CursorInvalido):
+                    decodificar_cursor(cursor)
+
+    def _paginas(self, paginator, direccion='n', cursor=None):
+        paginas = []
+        while True:
+            pagina = paginator.page(cursor)
+            paginas.append([t.pk for t in pagina])
+            cursor = pagina.next_cursor if direccion == 'n' else pagina.previous_cursor
+            if cursor is None:
+                return paginas
+
+    def test_recorre_todas_las_filas_con_empates(self):
+        # Apellidos repetidos: el id desempata
+        for i in range(23):
+            _trabajador('Juan', ['Perez', 'Rojas', 'Soto'][i % 3])
+        orden = ['apellido', 'nombre', 'id']
+        esperado = list(Trabajador.objects.order_by(*orden).values_list('pk', flat=True))
+        paginator = KeysetPaginator(Trabajador.objects.all(), 5, orden)
+
+        adelante = self._paginas(paginator)
+        self.assertEqual([len(p) for p in adelante], [5, 5, 5, 5, 3])
+        self.assertEqual(sum(adelante, []), esperado)
+
+        ultima = paginator.page(codificar_cursor(
+            paginator._valores_fila(Trabajador.objects.get(pk=adelante[-2][-1])), 'n'
+        ))
+        self.assertFalse(ultima.has_next())
+        self.assertIsNone(ultima.next_cursor)
+        atras = self._paginas(paginator, 'p', ultima.previous_cursor)
+        self.assertEqual(sum(reversed(atras), []) + adelante[-1], esperado)
+
+    def test_orden_descendente_y_conteo(self):
+        for i in range(7):
+            _trabajador('Juan', 'Perez')
+        paginator = KeysetPaginator(Trabajador.objects.all(), 3, ['-id'], contar=True)
+        self.assertEqual(paginator.count, 7)
+        ids = sum(self._paginas(paginator), [])
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIsNone(KeysetPaginator(Trabajador.objects.all(), 3, ['-id']).count)
+
+    def test_cursor_de_otro_orden(self):
+        paginator = KeysetPaginator(Trabajador.objects.all(), 3, ['apellido', 'id'])
+        with self.assertRaises(CursorInvalido):
+            paginator.page(codificar_cursor([1], 'n'))
+        with self.assertRaises(CursorInvalido):
+            paginator.page(codificar_cursor(['Perez', 'no es un id'], 'n'))
+
+
+class ConflictosTests(TestCase):
+    """El barrido de conflictos de la flota coincide con la comparación por pares"""
+
+    HOY = date(2025, 6, 30)
+
+    def _asignacion(self, trabajador, bus, turno, inicio, fin=None, activo=True):
+        asignacion = AsignacionBus.objects.create(trabajador=trabajador, bus=bus, turno=turno, activo=activo)
+        # fecha_asignacion es auto_now_add
+        AsignacionBus.objects.filter(pk=asignacion.pk).update(fecha_asignacion=inicio, fecha_finalizacion=fin)
+        return asignacion.pk
+
+    @staticmethod
+    def _claves(conflictos):
+        return {(c.tipo, c.clave, c.turno, c.asignaciones) for c in conflictos}
+
+    def test_casos(self):
+        juan, ana, luis = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas'), _trabajador('Luis', 'Soto')
+        bus1, bus2 = _bus('AAA-111'), _bus('BBB-222')
+        dia = timedelta(days=1)
+        # Juan maneja dos buses en la mañana: conflicto del trabajador
+        a = self._asignacion(juan, bus1, 'MAÑANA', self.HOY - 10 * dia)
+        b = self._asignacion(juan, bus2, 'MAÑANA', self.HOY - 5 * dia)
+        # Termina el día en que empieza la otra: sin conflicto (fin exclusivo)
+        self._asignacion(luis, bus1, 'TARDE', self.HOY - 10 * dia, self.HOY - 3 * dia, activo=False)
+        self._asignacion(juan, bus1, 'TARDE', self.HOY - 3 * dia)
+        # Desactivada sin finalizar: no ocupa el turno
+        self._asignacion(luis, bus2, 'NOCHE', self.HOY - 10 * dia, activo=False)
+        self._asignacion(juan, bus2, 'NOCHE', self.HOY - 10 * dia)
+        # Duplicada (mismo trabajador y bus): un solo conflicto, del trabajador
+        c = self._asignacion(ana, bus2, 'TARDE', self.HOY - 10 * dia)
+        d = self._asignacion(ana, bus2, 'TARDE', self.HOY - 2 * dia, self.HOY + 5 * dia, activo=False)
+
+        conflictos = detectar_conflictos(self.HOY - 30 * dia)
+        self.assertEqual(self._claves(conflictos), {
+            ('trabajador', juan.pk, 'MAÑANA', (a, b)),
+            ('trabajador', ana.pk, 'TARDE', (c, d)),
+        })
+        duplicado = next(x for x in conflictos if x.asignaciones == (c, d))
+        self.assertEqual((duplicado.desde, duplicado.hasta), (self.HOY - 2 * dia, self.HOY + 5 * dia))
+        # Solo lo que ocupa algún día del rango
+        self.assertEqual(
+            self._claves(detectar_conflictos(self.HOY - 30 * dia, self.HOY - 6 * dia)), set()
+        )
+
+    def test_igual_a_comparar_pares(self):
+        rnd = random.Random(7)
+        trabajadores = [_trabajador('Juan', f'Perez {chr(65 + i)}') for i in range(6)]
+        buses = [_bus(f'BUS-{i}') for i in range(4)]
+        filas = []
+        for _ in range(80):
+            trabajador, bus, turno = rnd.choice(trabajadores), rnd.choice(buses), rnd.choice(['MAÑANA', 'TARDE'])
+            inicio = self.HOY - timedelta(days=rnd.randrange(60))
+            fin = rnd.choice([None, inicio + timedelta(days=rnd.randrange(0, 30))])
+            activo = fin is None and rnd.random() < 0.8
+            if activo and AsignacionBus.objects.filter(trabajador=trabajador, bus=bus, turno=turno, activo=True).exists():
+                activo = False
+            pk = self._asignacion(trabajador, bus, turno, inicio, fin, activo)
+            filas.append((pk, trabajador.pk, bus.pk, turno, inicio, fin, activo))
+
+        for desde, hasta in ((self.HOY - timedelta(days=20), None), (self.HOY - timedelta(days=40), self.HOY)):
+            esperados = set()
+            for i, x in enumerate(filas):
+                for y in filas[i + 1:]:
+                    if x[3] != y[3]:
+                        continue
+                    inicio = max(x[4], y[4], desde)
+                    fin = min(self._fin(x), self._fin(y), hasta or date.max)
+                    if inicio >= fin:
+                        continue
+                    par = tuple(sorted((x[0], y[0])))
+                    if x[1] == y[1]:
+                        esperados.add(('trabajador', x[1], x[3], par))
+                    elif x[2] == y[2]:
+                        esperados.add(('bus', x[2], x[3], par))
+            with self.subTest(desde=desde, hasta=hasta):
+                self.assertTrue(esperados)
+                self.assertEqual(self._claves(detectar_conflictos(desde, hasta)), esperados)
+
+    def test_editar_asignacion_antigua(self):
+        juan, ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        bus1, bus2 = _bus('AAA-111'), _bus('BBB-222')
+        hoy = date.today()
+        pk = self._asignacion(juan, bus1, 'MAÑANA', hoy - timedelta(days=90))
+        # Juan manejó otro bus en la mañana hace dos meses: ya terminó
+        self._asignacion(juan, bus2, 'MAÑANA', hoy - timedelta(days=70), hoy - timedelta(days=60), activo=False)
+        asignacion = AsignacionBus.objects.get(pk=pk)
+        datos = {'trabajador': juan.pk, 'bus': bus1.pk, 'turno': 'MAÑANA', 'activo': True, 'notas': 'editada'}
+        self.assertTrue(AsignacionBusForm(datos, instance=asignacion).is_valid())
+
+        # Un conflicto vigente sí impide guardar
+        self._asignacion(ana, bus1, 'MAÑANA', hoy - timedelta(days=5))
+        form = AsignacionBusForm(datos, instance=asignacion)
+        self.assertFalse(form.is_valid())
+        self.assertIn('ya está asignado', str(form.errors))
+
+    @staticmethod
+    def _fin(fila):
+        """Fin exclusivo del rango que ocupa la fila (inicio si no ocupa nada)"""
+        if fila[5] is None:
+            return date.max if fila[6] else fila[4]
+        return fila[5]
+
+
+class CargaMasivaTests(PruebaVistas):
+    """Carga masiva de asignaciones: todo o nada por defecto"""
+
+    def setUp(self):
+        super().setUp()
+        self.juan, self.ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        self.inactivo = _trabajador('Luis', 'Soto', activo=False)
+        self.bus1, self.bus2 = _bus('AAA-111'), _bus('BBB-222')
+        self.filas = [
+            {'trabajador': self.juan.pk, 'bus': self.bus1.pk, 'turno': 'MAÑANA'},
+            {'trabajador': self.ana.pk, 'bus': self.bus2.pk, 'turno': 'MAÑANA'},
+            {'trabajador': self.inactivo.pk, 'bus': self.bus2.pk, 'turno': 'TARDE'},
+            {'trabajador': self.juan.pk, 'bus': self.bus2.pk, 'turno': 'MAÑANA'},
+            {'trabajador': 'x', 'bus': self.bus1.pk, 'turno': 'NOCHE'},
+        ]
+
+    def test_todo_o_nada(self):
+        resultado = CargaAsignacionesBus().cargar(self.filas)
+        self.assertEqual(resultado.creados, 0)
+        self.assertEqual([error['fila'] for error in resultado.errores], [2, 3, 4])
+        self.assertFalse(AsignacionBus.objects.exists())
+        self.juan.refresh_from_db()
+        self.assertEqual(self.juan.buses_activos, 0)
+
+    def test_parcial(self):
+        resultado = CargaAsignacionesBus(parcial=True).cargar(self.filas)
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual(AsignacionBus.objects.count(), 2)
+        self.bus2.refresh_from_db()
+        self.assertEqual(self.bus2.conductores_activos, 1)
+
+    def test_vista(self):
+        url = reverse('api_asignaciones_bus_masiva')
+        response = self.client.post(url, json.dumps({'asignaciones': self.filas}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['creados'], 0)
+        self.assertFalse(AsignacionBus.objects.exists())
+
+        validas = self.filas[:2]
+        response = self.client.post(url, json.dumps({'asignaciones': validas}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AsignacionBus.objects.count(), 2)
+        # Repetir la misma carga: duplicadas, nada nuevo
+        response = self.client.post(url, json.dumps({'asignaciones': validas}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AsignacionBus.objects.count(), 2)
+
+    def test_pk_no_numerico(self):
+        url = reverse('api_asignaciones_bus_masiva')
+        for valor in ('²', '١', ' 7x'):
+            with self.subTest(valor=valor):
+                filas = [{'trabajador': valor, 'bus': self.bus1.pk, 'turno': 'NOCHE'}]
+                response = self.client.post(
+                    url, json.dumps({'asignaciones': filas}), content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual([error['fila'] for error in response.json()['errores']], [0])
+
+
+@override_settings(REPLICAS_LECTURA={'replica1': 2, 'replica2': 1}, REPLICAS_RETRASO=10)
+class ReplicasTests(SimpleTestCase):
+    """Elección de réplica por petición y lectura de la primaria tras escribir"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = RouterReplicas()
+
+    def _peticion(self, metodo='get', sesion=None, vista=None, escribir=False, streaming=False):
+        """Pasa una petición por el middleware; retorna (response, base de lectura en la vista)"""
+        leidas = []
+
+        @lectura_replica
+        def de_lectura(request):
+            leidas.append(self.router.db_for_read(Bus))
+            if escribir:
+                self.router.db_for_write(Bus)
+                leidas.append(self.router.db_for_read(Bus))
+            if streaming:
+                return StreamingHttpResponse(
+                    (self.router.db_for_read(Bus) or '-') for _ in range(2)
+                )
+            return HttpResponse()
+
+        vista = vista or de_lectura
+
+        def get_response(request):
+            middleware.process_view(request, vista, (), {})
+            return vista(request)
+
+        middleware = ReplicasMiddleware(get_response)
+        request = getattr(self.factory, metodo)('/')
+        request.session = {} if sesion is None else sesion
+        return middleware(request), leidas
+
+    def test_rotacion_ponderada(self):
+        selector = SelectorReplicas({'replica1': 2, 'replica2': 1, 'apagada': 0})
+        elegidas = [selector.elegir() for _ in range(6)]
+        self.assertEqual(elegidas.count('replica1'), 4)
+        self.assertEqual(elegidas.count('replica2'), 2)
+        self.assertNotIn('apagada', elegidas)
+        # Sin rachas: nunca la menos pesada dos veces seguidas
+        self.assertNotIn(['replica2', 'replica2'], [elegidas[i:i + 2] for i in range(5)])
+
+    def test_get_lee_de_replica(self):
+        response, leidas = self._peticion()
+        self.assertIn(leidas[0], ('replica1', 'replica2'))
+        self.assertEqual(response['X-DB-Replica'], leidas[0])
+        self.assertIsNone(replica_actual())
+        # Fuera de una petición el router no decide
+        self.assertIsNone(self.router.db_for_read(Bus))
+        # Los modelos de otras apps (usuarios, sesiones) no se replican
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_vista_no_marcada_y_post_leen_de_la_primaria(self):
+        def vista(request):
+            return HttpResponse(self.router.db_for_read(Bus))
+        response, _ = self._peticion(vista=vista)
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn('X-DB-Replica', response)
+
+        sesion = {}
+        response, leidas = self._peticion('post', sesion=sesion)
+        self.assertEqual(leidas, ['default'])
+        self.assertNotIn('X-DB-Replica', response)
+        self.assertIn(CLAVE_SESION, sesion)
+
+    def test_leer_lo_propio_tras_escribir(self):
+        sesion = {}
+        response, leidas = self._peticion(sesion=sesion, escribir=True)
+        # Dentro de la petición, después de escribir se lee de la primaria
+        self.assertIn(leidas[0], ('replica1', 'replica2'))
+        self.assertEqual(leidas[1], 'default')
+        self.assertNotIn('X-DB-Replica', response)
+
+        # Durante REPLICAS_RETRASO la sesión lee de la primaria
+        _, leidas = self._peticion(sesion=sesion)
+        self.assertEqual(leidas, ['default'])
+        # Vencido el plazo vuelve a las réplicas
+        sesion[CLAVE_SESION] -= 11
+        _, leidas = self._peticion(sesion=sesion)
+        self.assertIn(leidas[0], ('replica1', 'replica2'))
+
+    def test_cuerpo_en_streaming_lee_de_la_replica(self):
+        response, leidas = self._peticion(streaming=True)
+        self.assertEqual(b''.join(response.streaming_content).decode(), leidas[0] * 2)
+        self.assertIsNone(replica_actual())
+
+    def test_solo_la_primaria_recibe_migraciones(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'templatesApp'))
+        self.assertIsNone(self.router.allow_migrate('default', 'templatesApp'))
+
+
+class ListadosTests(PruebaVistas):
+    """Página completa, fragmento (X-Fragmento) y exportación de los listados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        juan, ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        conductor, mecanico = Rol.objects.create(nombre='Conductor'), Rol.objects.create(nombre='Mecanico')
+        AsignacionRol.objects.create(trabajador=juan, rol=conductor)
+        AsignacionRol.objects.create(trabajador=ana, rol=mecanico, activo=False)
+
+    def test_asignaciones_rol(self):
+        url = reverse('asignaciones_rol_list')
+        response = self.client.get(url)
+        self.assertTemplateUsed(response, 'templatesApp/asignaciones_rol_resultados.html')
+        self.assertContains(response, 'Juan Perez')
+        self.assertContains(response, 'Conductor')
+        self.assertContains(response, 'id="facetas"')
+        self.assertContains(response, 'exportar=csv')
+
+        fragmento = self.client.get(url + '?estado=activo', HTTP_X_FRAGMENTO='1')
+        self.assertNotContains(fragmento, '<html')
+        self.assertContains(fragmento, 'Conductor')
+        self.assertNotContains(fragmento, 'Mecanico')
+        self.assertIn('X-Fragmento', fragmento['Vary'])
+
+        cursor = self.client.get(url + '?paginacion=cursor')
+        self.assertTrue(cursor.context['asignaciones'].es_cursor)
+
+        exportacion = self.client.get(url + '?exportar=csv')
+        self.assertEqual(len(b''.join(exportacion.streaming_content).splitlines()), 3)
+
+    def test_fragmento_conserva_texto(self):
+        html = (
+            '<div>\n    <pre>linea 1\n    linea 2</pre>\n    <textarea>\n  a\n</textarea>\n'
+            '    <span title="uno\n    dos">x</span> <b>y</b>\n</div>'
+        )
+        request = RequestFactory().get('/', HTTP_X_FRAGMENTO='1')
+        with mock.patch('templatesApp.views.render', return_value=HttpResponse(html)):
+            response = views._render_listado(request, 'templatesApp/trabajadores.html', {})
+        self.assertEqual(response.content.decode(), (
+            '<div>\n<pre>linea 1\n    linea 2</pre>\n<textarea>\n  a\n</textarea>\n'
+            '<span title="uno\n    dos">x</span>\n<b>y</b>\n</div>'
+        ))
+
+    def test_exportar_sin_facetas(self):
+        for nombre in ('trabajadores_list', 'buses_list', 'estados_bus_list',
+                       'asignaciones_rol_list', 'asignaciones_bus_list'):
+            with self.subTest(nombre), mock.patch('templatesApp.views.contar_facetas') as contar:
+                response = self.client.get(reverse(nombre) + '?exportar=csv')
+                b''.join(response.streaming_content)
+                contar.assert_not_called()
+
+
+class HistorialEstadoBusTests(TestCase):
+    """Consultas por intervalo sobre el historial de estados"""
+
+    def test_vigentes_entre_igual_a_filtro_directo(self):
+        rnd = random.Random(3)
+        inicio = timezone.make_aware(datetime(2025, 1, 1))
+        estados = ['OPERATIVO', 'MANTENIMIENTO', 'REPARACION']
+        for i in range(8):
+            bus = _bus(f'BUS-{i}')
+            momento = inicio + timedelta(hours=rnd.randrange(48))
+            eventos = []
+            for _ in range(rnd.randrange(1, 15)):
+                eventos.append(HistorialEstadoBus(
+                    bus=bus, estado=rnd.choice(estados), vigente_desde=momento
+                ))
+                momento += timedelta(hours=rnd.choice([0, 1, 5, 20, 72]))
+            for evento, siguiente in zip(eventos, eventos[1:]):
+                evento.vigente_hasta = siguiente.vigente_desde
+            HistorialEstadoBus.objects.bulk_create(eventos)
+
+        for dia in range(12):
+            desde = inicio + timedelta(days=dia)
+            hasta = desde + timedelta(days=1)
+            for estado in estados:
+                esperados = HistorialEstadoBus.objects.filter(
+                    Q(vigente_hasta__isnull=True) | Q(vigente_hasta__gt=desde),
+                    estado=estado, vigente_desde__lt=hasta,
+                )
+                with self.subTest(dia=dia, estado=estado):
+                    self.assertEqual(
+                        set(HistorialEstadoBus.vigentes_entre(estado, desde, hasta)), set(esperados)
+                    )
+                    self.assertEqual(
+                        set(HistorialEstadoBus.buses_en_estado(estado, desde.date())),
+                        set(Bus.objects.filter(pk__in=esperados.values('bus_id'))),
+                    )
+
+
+class AutocompletarTests(PruebaVistas):
+    """Selects de autocompletado de los formularios de asignación"""
+
+    def test_pk_invalido_vuelve_al_formulario(self):
+        _bus('AAA-111')
+        Rol.objects.create(nombre='Conductor')
+        for url in (reverse('asignacion_bus_crear'), reverse('asignacion_rol_crear')):
+            for valor in ('x', '²', '999'):
+                with self.subTest(url=url, valor=valor):
+                    response = self.client.post(url, {'trabajador': valor, 'turno': 'MAÑANA'})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn('trabajador', response.context['form'].errors)
+
+    def test_solo_renderiza_la_opcion_elegida(self):
+        juan, _ = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        response = self.client.post(reverse('asignacion_bus_crear'), {'trabajador': juan.pk})
+        self.assertContains(response, f'<option value="{juan.pk}" selected>')
+        self.assertNotContains(response, 'Rojas')
+
+
+class FinalizarEnBloqueTests(PruebaVistas):
+    """Finalización en bloque desde los listados de asignaciones"""
+
+    def setUp(self):
+        super().setUp()
+        juan, ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        bus = _bus('AAA-111')
+        self.primera = AsignacionBus.objects.create(trabajador=juan, bus=bus, turno='MAÑANA')
+        self.segunda = AsignacionBus.objects.create(trabajador=ana, bus=bus, turno='TARDE')
+        self.url = reverse('asignaciones_bus_finalizar')
+
+    def test_seleccion(self):
+        response = self.client.post(self.url, {'ids': [self.primera.pk]})
+        self.assertRedirects(response, reverse('asignaciones_bus_list'))
+        self.assertEqual(list(AsignacionBus.objects.filter(activo=True)), [self.segunda])
+
+    def test_seleccion_invalida(self):
+        for ids in (['x'], ['²'], [str(self.primera.pk), '١']):
+            with self.subTest(ids=ids):
+                response = self.client.post(self.url, {'ids': ids}, follow=True)
+                self.assertContains(response, 'Selección de asignaciones inválida.')
+                self.assertEqual(AsignacionBus.objects.filter(activo=True).count(), 2)
+
+
+class ApiTests(PruebaVistas):
+    """Contenido de la API JSON: campos, objetos incluidos, ids y paginación"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.juan, cls.ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        cls.conductor, mecanico = Rol.objects.create(nombre='Conductor'), Rol.objects.create(nombre='Mecanico')
+        cls.bus = _bus('AAA-111')
+        cls.asignacion_rol = AsignacionRol.objects.create(trabajador=cls.juan, rol=cls.conductor)
+        AsignacionRol.objects.create(trabajador=cls.juan, rol=mecanico, activo=False)
+        cls.asignacion_bus = AsignacionBus.objects.create(trabajador=cls.juan, bus=cls.bus, turno='NOCHE')
+
+    def _get(self, nombre, parametros='', estado=200):
+        response = self.client.get(reverse(nombre) + parametros)
+        self.assertEqual(response.status_code, estado, response.content)
+        return response.json()
+
+    def test_campos(self):
+        resultados = self._get('api_trabajadores', '?campos=nombre,edad')['resultados']
+        self.assertEqual(resultados, [
+            {'id': self.juan.pk, 'nombre': 'Juan', 'edad': 30},
+            {'id': self.ana.pk, 'nombre': 'Ana', 'edad': 30},
+        ])
+
+    def test_incluir_colecciones(self):
+        resultados = self._get('api_trabajadores', '?campos=id&incluir=roles,buses')['resultados']
+        juan, ana = resultados
+        self.assertEqual((ana['roles'], ana['buses']), ([], []))
+        # Solo las asignaciones activas
+        self.assertEqual(juan['roles'], [{
+            'id': self.asignacion_rol.pk, 'rol_id': self.conductor.pk, 'rol': 'Conductor',
+            'fecha_asignacion': self.asignacion_rol.fecha_asignacion.isoformat(),
+        }])
+        self.assertEqual([(b['id'], b['patente'], b['turno']) for b in juan['buses']], [
+            (self.asignacion_bus.pk, 'AAA-111', 'NOCHE'),
+        ])
+        # Sin incluir, no hay colecciones
+        self.assertNotIn('roles', self._get('api_trabajadores')['resultados'][0])
+
+    def test_incluir_claves_foraneas(self):
+        resultado, = self._get('api_asignaciones_bus', '?campos=turno&incluir=trabajador,bus')['resultados']
+        self.assertEqual(resultado, {
+            'id': self.asignacion_bus.pk, 'turno': 'NOCHE',
+            'trabajador': {'id': self.juan.pk, 'nombre': 'Juan', 'apellido': 'Perez'},
+            'bus': {'id': self.bus.pk, 'patente': 'AAA-111', 'modelo': 'O500'},
+        })
+
+    def test_ids(self):
+        respuesta = self._get('api_trabajadores', f'?campos=nombre&ids={self.juan.pk},{self.ana.pk},999')
+        self.assertEqual([r['nombre'] for r in respuesta['resultados']], ['Juan', 'Ana'])
+        self.assertNotIn('siguiente', respuesta)
+
+    def test_parametros_invalidos(self):
+        for parametros in ('?ids=%C2%B2', '?ids=1,x', '?campos=sueldo', '?incluir=buses_inactivos',
+                           '?limite=x', '?cursor=abc'):
+            with self.subTest(parametros=parametros):
+                self.assertIn('error', self._get('api_trabajadores', parametros, estado=400))
+
+    def test_paginacion_y_total(self):
+        primera = self._get('api_trabajadores', '?campos=nombre&limite=1&total=1')
+        self.assertEqual(primera['total'], 2)
+        self.assertEqual([r['nombre'] for r in primera['resultados']], ['Juan'])
+        self.assertIsNone(primera['anterior'])
+        segunda = self.client.get(primera['siguiente']).json()
+        self.assertEqual([r['nombre'] for r in segunda['resultados']], ['Ana'])
+        self.assertIsNone(segunda['siguiente'])
+
+
+class BusquedaTests(PruebaVistas):
+    """Índice de trigramas: resultados y mantenimiento al guardar, eliminar e importar"""
+
+    def _trabajadores(self, texto):
+        return set(buscar_trabajadores(Trabajador.objects.all(), texto))
+
+    def test_backend_por_motor(self):
+        self.assertIsInstance(get_backend(), NgramBackend)
+        with override_settings(SEARCH_BACKEND='fulltext'):
+            self.assertIsInstance(get_backend(), FullTextBackend)
+
+    def test_coincidencias(self):
+        juan, ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        self.assertEqual(self._trabajadores('rez'), {juan})
+        # Sin distinguir mayúsculas, y subcadenas de cualquier largo
+        self.assertEqual(self._trabajadores('PEREZ'), {juan})
+        self.assertEqual(self._trabajadores('an'), {juan, ana})
+        self.assertEqual(self._trabajadores('z'), {juan})
+        # Los trigramas coinciden pero no la subcadena
+        self.assertEqual(self._trabajadores('juan rojas'), set())
+
+    def test_editar_y_eliminar(self):
+        juan = _trabajador('Juan', 'Perez')
+        juan.apellido = 'Soto'
+        juan.save()
+        self.assertEqual(self._trabajadores('perez'), set())
+        self.assertEqual(self._trabajadores('soto'), {juan})
+        # La confirmación con icontains ocultaría trigramas viejos: se revisa el índice
+        terminos = TerminoBusqueda.objects.filter(modelo='trabajador', objeto_id=juan.pk)
+        self.assertFalse(terminos.filter(ngrama='rez').exists())
+        self.assertTrue(terminos.filter(ngrama='sot').exists())
+        pk = juan.pk
+        juan.delete()
+        self.assertFalse(TerminoBusqueda.objects.filter(modelo='trabajador', objeto_id=pk).exists())
+
+    def test_importacion_indexa_en_lote(self):
+        Importador('buses').importar(leer_archivo(_csv(
+            'patente,modelo,año,capacidad,marca\n'
+            'AAA-111,O500,2015,40,Mercedes\n'
+            'BBB-222,Citaro,2016,40,Volvo\n'
+        ), 'buses.csv'))
+        buses = Bus.objects.all()
+        self.assertEqual([b.patente for b in buscar_buses(buses, 'citar')], ['BBB-222'])
+        self.assertEqual([b.patente for b in buscar_buses(buses, 'aaa-1')], ['AAA-111'])
+
+    def test_asignaciones_por_trabajador_o_bus(self):
+        juan, ana = _trabajador('Juan', 'Perez'), _trabajador('Ana', 'Rojas')
+        bus1, bus2 = _bus('AAA-111'), _bus('BBB-222')
+        primera = AsignacionBus.objects.create(trabajador=juan, bus=bus1)
+        segunda = AsignacionBus.objects.create(trabajador=ana, bus=bus2)
+        asignaciones = AsignacionBus.objects.all()
+        self.assertEqual(set(buscar_asignaciones_bus(asignaciones, 'perez')), {primera})
+        self.assertEqual(set(buscar_asignaciones_bus(asignaciones, 'bbb')), {segunda})
+
+    def test_reconstruir_indice(self):
+        juan = _trabajador('Juan', 'Perez')
+        TerminoBusqueda.objects.all().delete()
+        self.assertEqual(self._trabajadores('perez'), set())
+        self.assertEqual(reconstruir_indice(Trabajador, tamano_lote=1), 1)
+        self.assertEqual(self._trabajadores('perez'), {juan})
+
+    def test_fulltext(self):
+        backend = FullTextBackend()
+        # Textos más cortos que el token de ngram: LIKE
+        self.assertEqual(
+            list(Trabajador.objects.filter(pk__in=backend.ids_coincidentes(Trabajador, 'p'))), []
+        )
+        consulta = backend.ids_coincidentes(Trabajador, 'Pe"rez')
+        self.assertIn('MATCH', consulta.sql)
+        self.assertIn('AGAINST (%s IN BOOLEAN MODE)', consulta.sql)
+        self.assertEqual(consulta.params, ['"Pe rez"'])
+
+
+class ExportacionTests(PruebaVistas):
+    """Exportación en streaming: encabezado, filas de varios lotes y filtros"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Más de dos lotes de TAMANO_LOTE; uno de cada tres inactivo
+        Trabajador.objects.bulk_create([
+            Trabajador(
+                nombre=f'Nombre{i}', apellido='Perez', direccion='Calle 1', contacto='+56 9 1234 5678',
+                edad=30, activo=i % 3 != 0,
+            )
+            for i in range(TAMANO_LOTE * 2 + 500)
+        ])
+        cls.activos = Trabajador.objects.filter(activo=True).count()
+
+    def _exportar(self, formato):
+        response = self.client.get(reverse('trabajadores_list') + f'?estado=activo&exportar={formato}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn(f'.{formato}"', response['Content-Disposition'])
+        partes = list(response.streaming_content)
+        # Se envía por partes, no todo de una vez
+        self.assertGreater(len(partes), 1)
+        return b''.join(partes).decode('utf-8')
+
+    def test_csv(self):
+        filas = list(csv.reader(io.StringIO(self._exportar('csv'))))
+        self.assertEqual(filas[0], [encabezado for _, encabezado in COLUMNAS_TRABAJADORES])
+        self.assertEqual(len(filas) - 1, self.activos)
+        ids = [int(fila[0]) for fila in filas[1:]]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual({fila[6] for fila in filas[1:]}, {'True'})
+
+    def test_json(self):
+        filas = json.loads(self._exportar('json'))
+        self.assertEqual(len(filas), self.activos)
+        self.assertEqual(list(filas[0]), [encabezado for _, encabezado in COLUMNAS_TRABAJADORES])
+        self.assertTrue(all(fila['activo'] for fila in filas))
+        self.assertEqual(len({fila['id'] for fila in filas}), self.activos)
+
+
+class PoolConexionesTests(SimpleTestCase):
+    """Pool de conexiones: reutilización, desborde, espera y descarte"""
+
+    def test_reutiliza_la_ultima_devuelta(self):
+        pool = PoolConexiones(tamano=2, desborde=0)
+        crear = mock.Mock(side_effect=lambda: mock.Mock())
+        (a, nueva_a), (b, nueva_b) = pool.obtener(crear), pool.obtener(crear)
+        self.assertTrue(nueva_a and nueva_b)
+        pool.devolver(a)
+        pool.devolver(b)
+        self.assertEqual(pool.libres, 2)
+        self.assertEqual(pool.obtener(crear), (b, False))
+        self.assertEqual(crear.call_count, 2)
+        self.assertEqual(pool.abiertas, 2)
+
+    def test_desborde_y_espera(self):
+        pool = PoolConexiones(tamano=1, desborde=1, espera=0.05)
+        fija, _ = pool.obtener(mock.Mock)
+        extra, _ = pool.obtener(mock.Mock)
+        with self.assertRaises(PoolAgotado):
+            pool.obtener(mock.Mock)
+        # La del desborde se cierra al devolverla si el pool ya está lleno
+        pool.devolver(fija)
+        pool.devolver(extra)
+        extra.close.assert_called_once()
+        fija.close.assert_not_called()
+        self.assertEqual((pool.abiertas, pool.libres), (1, 1))
+
+    def test_espera_a_que_se_devuelva(self):
+        pool = PoolConexiones(tamano=1, desborde=0, espera=5)
+        conexion, _ = pool.obtener(mock.Mock)
+        obtenidas = []
+        hilo = threading.Thread(target=lambda: obtenidas.append(pool.obtener(mock.Mock)))
+        hilo.start()
+        pool.devolver(conexion)
+        hilo.join(5)
+        self.assertEqual(obtenidas, [(conexion, False)])
+
+    def test_descartar_y_error_al_crear(self):
+        pool = PoolConexiones(tamano=1, desborde=0, espera=0)
+        conexion, _ = pool.obtener(mock.Mock)
+        pool.devolver(conexion, descartar=True)
+        conexion.close.assert_called_once()
+        self.assertEqual((pool.abiertas, pool.libres), (0, 0))
+        # Si no se pudo abrir, el cupo queda libre
+        with self.assertRaises(OSError):
+            pool.obtener(mock.Mock(side_effect=OSError))
+        self.assertEqual(pool.abiertas, 0)
+        self.assertTrue(pool.obtener(mock.Mock)[1])
+
+    def test_backend_devuelve_o_descarta(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            config = con_pool(
+                {**connections['default'].settings_dict, 'ENGINE': 'django.db.backends.sqlite3',
+                 'NAME': os.path.join(directorio, 'pool.sqlite3')},
+                tamano=1, desborde=0,
+            )
+            wrapper = load_backend(config['ENGINE']).DatabaseWrapper(config, alias='prueba_pool')
+            try:
+                wrapper.connect()
+                primera = wrapper.connection
+                wrapper.close()
+                self.assertEqual(wrapper.pool.libres, 1)
+                wrapper.connect()
+                self.assertIs(wrapper.connection, primera)
+
+                # Con errores o a mitad de una transacción no vuelve al pool
+                for estado in ('errors_occurred', 'in_atomic_block'):
+                    with self.subTest(estado=estado):
+                        conexion = wrapper.connection
+                        setattr(wrapper, estado, True)
+                        wrapper.close()
+                        setattr(wrapper, estado, False)
+                        wrapper.connection = None
+                        self.assertEqual((wrapper.pool.libres, wrapper.pool.abiertas), (0, 0))
+                        wrapper.connect()
+                        self.assertIsNot(wrapper.connection, conexion)
+                wrapper.close()
+            finally:
+                wrapper.pool.vaciar()
+
+
+class InsigniasTests(SimpleTestCase):
+    """Las insignias precalculadas producen el mismo HTML que las plantillas anteriores"""
+
+    # Cadenas {% if %} que reemplazan (listados y admin)
+    ESTADO = (
+        "{% if codigo == 'OPERATIVO' %}"
+        '<span class="badge bg-success"><i class="fas fa-check-circle"></i> Operativo</span>'
+        "{% elif codigo == 'MANTENIMIENTO' %}"
+        '<span class="badge bg-warning"><i class="fas fa-wrench"></i> Mantenimiento</span>'
+        "{% elif codigo == 'REPARACION' %}"
+        '<span class="badge bg-danger"><i class="fas fa-tools"></i> Reparación</span>'
+        "{% elif codigo == 'FUERA_SERVICIO' %}"
+        '<span class="badge bg-danger"><i class="fas fa-times-circle"></i> Fuera de Servicio</span>'
+        "{% elif codigo == 'RESERVADO' %}"
+        '<span class="badge bg-info"><i class="fas fa-lock"></i> Reservado</span>'
+        '{% endif %}'
+    )
+    TURNO = (
+        "{% if codigo == 'MAÑANA' %}"
+        '<span class="badge bg-warning"><i class="fas fa-sun"></i> Mañana</span>'
+        "{% elif codigo == 'TARDE' %}"
+        '<span class="badge bg-info"><i class="fas fa-cloud"></i> Tarde</span>'
+        "{% elif codigo == 'NOCHE' %}"
+        '<span class="badge bg-dark"><i class="fas fa-moon"></i> Noche</span>'
+        '{% endif %}'
+    )
+    ACTIVO = (
+        '{% if codigo %}<span class="badge badge-activo">Activo</span>'
+        '{% else %}<span class="badge badge-inactivo">Inactivo</span>{% endif %}'
+    )
+    ACTIVA = (
+        '{% if codigo %}<span class="badge badge-activo">Activa</span>'
+        '{% else %}<span class="badge badge-inactivo">Inactiva</span>{% endif %}'
+    )
+
+    def _comparar(self, anterior, filtro, codigos):
+        for codigo in codigos:
+            with self.subTest(filtro=filtro, codigo=codigo):
+                contexto = Context({'codigo': codigo})
+                self.assertEqual(
+                    Template('{% load insignias %}{{ codigo|' + filtro + ' }}').render(contexto),
+                    Template(anterior).render(contexto),
+                )
+
+    def test_plantillas(self):
+        estados = [codigo for codigo, _ in ESTADOS_BUS] + [None, 'OTRO']
+        self._comparar(self.ESTADO, 'insignia_estado', estados)
+        self._comparar(self.TURNO, 'insignia_turno', [c for c, _ in AsignacionBus.TURNO_CHOICES] + [''])
+        self._comparar(self.ACTIVO, 'insignia_activo', [True, False])
+        self._comparar(self.ACTIVA, 'insignia_activa', [True, False])
+
+    def test_admin(self):
+        colores = {
+            'OPERATIVO': '#28a745', 'MANTENIMIENTO': '#ffc107', 'REPARACION': '#fd7e14',
+            'FUERA_SERVICIO': '#dc3545', 'RESERVADO': '#17a2b8',
+        }
+        for codigo in [codigo for codigo, _ in ESTADOS_BUS] + ['OTRO']:
+            with self.subTest(codigo=codigo):
+                estado = EstadoBus(estado=codigo)
+                self.assertEqual(insignia_admin_estado(estado), format_html(
+                    '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
+                    colores.get(codigo, '#6c757d'), estado.get_estado_display(),
+                ))
+
+    def test_url_fila(self):
+        for nombre in ('bus_detalle', 'estado_bus_editar', 'asignacion_rol_eliminar'):
+            with self.subTest(nombre=nombre):
+                self.assertEqual(url_fila(42, nombre), reverse(nombre, args=[42]))
+        # Con SCRIPT_NAME, como bajo un prefijo en producción
+        set_script_prefix('/flota/')
+        try:
+            self.assertEqual(url_fila('7', 'bus_detalle'), reverse('bus_detalle', args=[7]))
+            self.assertTrue(url_fila(7, 'bus_detalle').startswith('/flota/'))
+        finally:
+            set_script_prefix('/')
+
+
+class EstaticosTests(SimpleTestCase):
+    """collectstatic con AlmacenEstaticos y la vista que sirve STATIC_ROOT"""
+
+    CSS = '/* comentario */\n.bus {\n    background: url("../img/bus.png");\n    color: red;\n}\n/*! licencia */\n'
+    JS = 'console.log("flota");\n' * 50
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.fuentes = os.path.join(directorio.name, 'static')
+        self.destino = os.path.join(directorio.name, 'staticfiles')
+        archivos = {'css/base.css': self.CSS.encode(), 'js/app.js': self.JS.encode(), 'img/bus.png': b'png'}
+        for ruta, contenido in archivos.items():
+            os.makedirs(os.path.dirname(os.path.join(self.fuentes, ruta)), exist_ok=True)
+            with open(os.path.join(self.fuentes, ruta), 'wb') as archivo:
+                archivo.write(contenido)
+        configuracion = override_settings(
+            STATICFILES_DIRS=[self.fuentes], STATIC_ROOT=self.destino,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'templatesApp.estaticos.AlmacenEstaticos'}},
+        )
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.addCleanup(_nombres_con_hash.cache_clear)
+        _nombres_con_hash.cache_clear()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.manifiesto = staticfiles_storage.hashed_files
+
+    def _leer(self, nombre):
+        with open(os.path.join(self.destino, nombre), 'rb') as archivo:
+            return archivo.read()
+
+    def test_minificar_css(self):
+        self.assertEqual(
+            minificar_css(self.CSS), '.bus{background:url("../img/bus.png");color:red}/*! licencia */'
+        )
+
+    def test_nombres_con_hash_y_compresion(self):
+        css, js, png = (self.manifiesto[ruta] for ruta in ('css/base.css', 'js/app.js', 'img/bus.png'))
+        self.assertRegex(css, r'^css/base\.[0-9a-f]{12}\.css$')
+        contenido = self._leer(css)
+        # Minificado y con la referencia a la imagen reescrita al nombre con hash
+        self.assertNotIn(b'comentario', contenido)
+        self.assertIn(f'url("../{png}")'.encode(), contenido)
+        self.assertEqual(gzip.decompress(self._leer(js + '.gz')), self.JS.encode())
+        # Las imágenes no se comprimen
+        self.assertFalse(os.path.exists(os.path.join(self.destino, png + '.gz')))
+
+    @skipUnless(cargar_pillow(), 'Pillow no está instalado')
+    def test_variantes_webp(self):
+        self.assertIn('img/bus.webp', self.manifiesto)
+
+    def test_servir(self):
+        js = self.manifiesto['js/app.js']
+        peticion = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = servir(peticion, js)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], CACHE_INMUTABLE)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.JS.encode())
+
+        # Sin hash en el nombre ni compresión aceptada
+        response = servir(RequestFactory().get('/'), 'js/app.js')
+        self.assertEqual(response['Cache-Control'], CACHE_SIN_HASH)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.JS.encode())
+
+        for ruta in ('../static/js/app.js', 'js/no-existe.js'):
+            with self.subTest(ruta=ruta), self.assertRaises(Http404):
+                servir(RequestFactory().get('/'), ruta)
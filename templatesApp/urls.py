@@ -44,6 +44,7 @@ urlpatterns = [
     path('asignaciones-rol/crear/', views.asignacion_rol_crear, name='asignacion_rol_crear'),
     path('asignaciones-rol/<int:pk>/editar/', views.asignacion_rol_editar, name='asignacion_rol_editar'),
     path('asignaciones-rol/<int:pk>/eliminar/', views.asignacion_rol_eliminar, name='asignacion_rol_eliminar'),
+    path('asignaciones-rol/finalizar/', views.asignaciones_rol_finalizar, name='asignaciones_rol_finalizar'),
     
     # CRUD Asignación Bus
     path('asignaciones-bus/', views.asignaciones_bus_list, name='asignaciones_bus_list'),
@@ -51,4 +52,25 @@ urlpatterns = [
     path('asignaciones-bus/crear/', views.asignacion_bus_crear, name='asignacion_bus_crear'),
     path('asignaciones-bus/<int:pk>/editar/', views.asignacion_bus_editar, name='asignacion_bus_editar'),
     path('asignaciones-bus/<int:pk>/eliminar/', views.asignacion_bus_eliminar, name='asignacion_bus_eliminar'),
+    path('asignaciones-bus/finalizar/', views.asignaciones_bus_finalizar, name='asignaciones_bus_finalizar'),
+    
+    # Planificación automática de turnos
+    path('asignaciones-bus/planificar/', views.planificar_turnos, name='planificar_turnos'),
+    
+    # Importación masiva
+    path('importar/', views.importar_datos, name='importar_datos'),
+    
+    # Autocompletado (JSON) para los formularios de asignación
+    path('autocompletar/trabajadores/', views.autocompletar_trabajadores, name='autocompletar_trabajadores'),
+    path('autocompletar/buses/', views.autocompletar_buses, name='autocompletar_buses'),
+    path('autocompletar/roles/', views.autocompletar_roles, name='autocompletar_roles'),
+    
+    # API JSON de solo lectura
+    path('api/trabajadores/', views.api_trabajadores, name='api_trabajadores'),
+    path('api/roles/', views.api_roles, name='api_roles'),
+    path('api/buses/', views.api_buses, name='api_buses'),
+    path('api/estados-bus/', views.api_estados_bus, name='api_estados_bus'),
+    path('api/asignaciones-rol/', views.api_asignaciones_rol, name='api_asignaciones_rol'),
+    path('api/asignaciones-bus/', views.api_asignaciones_bus, name='api_asignaciones_bus'),
+    path('api/asignaciones-bus/masiva/', views.api_asignaciones_bus_masiva, name='api_asignaciones_bus_masiva'),
 ]
\ No newline at end of file
@@ -1,17 +1,42 @@
 # templatesApp/views.py - ARCHIVO COMPLETO
 
+import json
+import re
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q, Count
-from .models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
+from django.db.models import Q
+from .models import Trabajador, Rol, Bus, EstadoBus, AsignacionRol, AsignacionBus, ESTADOS_BUS
 from .forms import (
     TrabajadorForm, RolForm, BusForm, EstadoBusForm, 
-    AsignacionRolForm, AsignacionBusForm
+    AsignacionRolForm, AsignacionBusForm, ImportacionForm
+)
+from . import api
+from .asignacion_masiva import CargaAsignacionesBus, ConflictoCarga, ErrorCarga
+from .cache_detalle import cache_detalle
+from .consultas import presupuesto_consultas
+from .exportacion import (
+    exportar, formato_exportacion, COLUMNAS_TRABAJADORES, COLUMNAS_ROLES, COLUMNAS_BUSES,
+    COLUMNAS_ESTADOS_BUS, COLUMNAS_ASIGNACIONES_ROL, COLUMNAS_ASIGNACIONES_BUS
+)
+from .facetas import contar_facetas, dimension_activo, dimension_opciones, filtrar, seleccion
+from .importacion import ErrorImportacion, Importador, leer_archivo
+from .pagination import paginar, KeysetPaginator, CursorInvalido
+from .planificacion import MAX_TURNOS, TURNOS, aplicar_plan, generar_plan
+from .replicas import lectura_replica
+from .search import (
+    buscar_trabajadores, buscar_roles, buscar_buses, buscar_estados_bus,
+    buscar_asignaciones_rol, buscar_asignaciones_bus
 )
+from .stats import get_dashboard_stats
 
 # ==================== AUTENTICACIÓN ====================
 
@@ -51,62 +76,88 @@ def logout_view(request):
 
 # ==================== DASHBOARD ====================
 
+@lectura_replica
+@presupuesto_consultas(3)
 @login_required(login_url='login')
 def index(request):
-    """Dashboard con estadísticas"""
+    """Dashboard con estadísticas (calculadas en una consulta y cacheadas)"""
     context = {
-        'total_trabajadores': Trabajador.objects.filter(activo=True).count(),
-        'total_buses': Bus.objects.filter(activo=True).count(),
-        'total_roles': Rol.objects.filter(activo=True).count(),
-        'buses_operativos': EstadoBus.objects.filter(estado='OPERATIVO').count(),
-        'asignaciones_activas_bus': AsignacionBus.objects.filter(activo=True).count(),
-        'asignaciones_activas_rol': AsignacionRol.objects.filter(activo=True).count(),
+        **get_dashboard_stats(),
         'user': request.user,
     }
     return render(request, 'templatesApp/index.html', context)
 
 
+# ==================== LISTADOS ====================
+
+# Espacio entre etiquetas: el texto (escapado, sin '<' ni '>') no se toca, así
+# que <pre>, <textarea> y los atributos se envían tal cual
+SANGRIA = re.compile(rb'>\s+<')
+
+
+def _render_listado(request, plantilla, context):
+    """
+    Página completa del listado o, si la petición trae la cabecera
+    ``X-Fragmento`` (static/js/listados.js al filtrar o paginar), solo las
+    facetas y ``<plantilla>_resultados.html``, sin el layout de base.html.
+    """
+    if request.headers.get('X-Fragmento'):
+        response = render(request, 'templatesApp/listado_fragmento.html', {
+            **context, 'plantilla_resultados': plantilla.replace('.html', '_resultados.html'),
+        })
+        # Sin la sangría de las plantillas; queda un salto de línea, así que el
+        # espacio entre elementos en línea se conserva
+        response.content = SANGRIA.sub(b'>\n<', response.content)
+    else:
+        response = render(request, plantilla, context)
+    # La misma URL responde distinto según la cabecera: las cachés no deben mezclarlas
+    patch_vary_headers(response, ('X-Fragmento',))
+    return response
+
+
 # ==================== CRUD TRABAJADORES ====================
 
+DIMENSIONES_TRABAJADORES = (dimension_activo(),)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
 @login_required(login_url='login')
 def trabajadores_list(request):
     search_query = request.GET.get('search', '')
     trabajadores_data = Trabajador.objects.all()
     
     if search_query:
-        trabajadores_data = trabajadores_data.filter(
-            Q(nombre__icontains=search_query) |
-            Q(apellido__icontains=search_query) |
-            Q(contacto__icontains=search_query)
-        )
+        trabajadores_data = buscar_trabajadores(trabajadores_data, search_query)
     
+    formato = formato_exportacion(request)
+    # Las exportaciones no muestran facetas: se omite el GROUP BY del cubo
+    facetas = None if formato else contar_facetas(
+        request, trabajadores_data, DIMENSIONES_TRABAJADORES, 'trabajadores', search_query
+    )
     estado_filter = request.GET.get('estado', '')
-    if estado_filter == 'activo':
-        trabajadores_data = trabajadores_data.filter(activo=True)
-    elif estado_filter == 'inactivo':
-        trabajadores_data = trabajadores_data.filter(activo=False)
-    
-    trabajadores_data = trabajadores_data.order_by('apellido', 'nombre')
+    trabajadores_data = filtrar(
+        trabajadores_data, DIMENSIONES_TRABAJADORES, seleccion(request, DIMENSIONES_TRABAJADORES)
+    )
     
-    paginator = Paginator(trabajadores_data, 10)
-    page = request.GET.get('page')
+    if formato:
+        return exportar(trabajadores_data, COLUMNAS_TRABAJADORES, 'trabajadores', formato)
     
-    try:
-        trabajadores = paginator.page(page)
-    except PageNotAnInteger:
-        trabajadores = paginator.page(1)
-    except EmptyPage:
-        trabajadores = paginator.page(paginator.num_pages)
+    trabajadores = paginar(request, trabajadores_data, ('apellido', 'nombre', 'id'))
     
     context = {
         'trabajadores': trabajadores,
         'search_query': search_query,
         'estado_filter': estado_filter,
+        'facetas': facetas,
     }
-    return render(request, 'templatesApp/trabajadores.html', context)
+    return _render_listado(request, 'templatesApp/trabajadores.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(5)
 @login_required(login_url='login')
+@cache_detalle(Trabajador, tipos=(Rol, Bus))
 def trabajador_detalle(request, pk):
     trabajador = get_object_or_404(Trabajador, pk=pk)
     asignaciones_rol = trabajador.asignaciones_rol.all().order_by('-fecha_asignacion')
@@ -165,10 +216,7 @@ def trabajador_eliminar(request, pk):
     if request.method == 'POST':
         nombre_completo = f"{trabajador.nombre} {trabajador.apellido}"
         
-        asignaciones_activas = (
-            trabajador.asignaciones_rol.filter(activo=True).count() +
-            trabajador.asignaciones_bus.filter(activo=True).count()
-        )
+        asignaciones_activas = trabajador.cantidad_asignaciones_activas()
         
         if asignaciones_activas > 0:
             messages.warning(
@@ -194,15 +242,15 @@ def trabajador_eliminar(request, pk):
 
 # ==================== CRUD ROLES ====================
 
+@lectura_replica
+@presupuesto_consultas(4)
 @login_required(login_url='login')
 def roles_list(request):
     search_query = request.GET.get('search', '')
-    roles_data = Rol.objects.annotate(
-        num_asignaciones=Count('asignaciones', filter=Q(asignaciones__activo=True))
-    )
+    roles_data = Rol.objects.all()
     
     if search_query:
-        roles_data = roles_data.filter(nombre__icontains=search_query)
+        roles_data = buscar_roles(roles_data, search_query)
     
     estado_filter = request.GET.get('estado', '')
     if estado_filter == 'activo':
@@ -210,27 +258,24 @@ def roles_list(request):
     elif estado_filter == 'inactivo':
         roles_data = roles_data.filter(activo=False)
     
-    roles_data = roles_data.order_by('nombre')
-    
-    paginator = Paginator(roles_data, 10)
-    page = request.GET.get('page')
+    formato = formato_exportacion(request)
+    if formato:
+        return exportar(roles_data, COLUMNAS_ROLES, 'roles', formato)
     
-    try:
-        roles = paginator.page(page)
-    except PageNotAnInteger:
-        roles = paginator.page(1)
-    except EmptyPage:
-        roles = paginator.page(paginator.num_pages)
+    roles = paginar(request, roles_data, ('nombre', 'id'))
     
     context = {
         'roles': roles,
         'search_query': search_query,
         'estado_filter': estado_filter,
     }
-    return render(request, 'templatesApp/roles.html', context)
+    return _render_listado(request, 'templatesApp/roles.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(4)
 @login_required(login_url='login')
+@cache_detalle(Rol, tipos=(Trabajador,))
 def rol_detalle(request, pk):
     rol = get_object_or_404(Rol, pk=pk)
     asignaciones = rol.asignaciones.all().order_by('-fecha_asignacion')
@@ -287,7 +332,7 @@ def rol_eliminar(request, pk):
     if request.method == 'POST':
         nombre = rol.nombre
         
-        asignaciones_activas = rol.asignaciones.filter(activo=True).count()
+        asignaciones_activas = rol.asignaciones_activas
         
         if asignaciones_activas > 0:
             messages.warning(
@@ -311,54 +356,62 @@ def rol_eliminar(request, pk):
 
 # ==================== CRUD BUSES ====================
 
+DIMENSIONES_BUSES = (
+    dimension_activo(),
+    dimension_opciones(
+        'operativo', 'estado_actual', ESTADOS_BUS, 'Estado operativo', sin_valor=('ninguno', 'Sin estado')
+    ),
+)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
 @login_required(login_url='login')
 def buses_list(request):
     search_query = request.GET.get('search', '')
     buses_data = Bus.objects.all()
     
     if search_query:
-        buses_data = buses_data.filter(
-            Q(patente__icontains=search_query) |
-            Q(modelo__icontains=search_query) |
-            Q(marca__icontains=search_query)
-        )
+        buses_data = buscar_buses(buses_data, search_query)
     
+    formato = formato_exportacion(request)
+    facetas = None if formato else contar_facetas(
+        request, buses_data, DIMENSIONES_BUSES, 'buses', search_query
+    )
     estado_filter = request.GET.get('estado', '')
-    if estado_filter == 'activo':
-        buses_data = buses_data.filter(activo=True)
-    elif estado_filter == 'inactivo':
-        buses_data = buses_data.filter(activo=False)
-    
-    buses_data = buses_data.order_by('patente')
+    operativo_filter = request.GET.get('operativo', '')
+    buses_data = filtrar(buses_data, DIMENSIONES_BUSES, seleccion(request, DIMENSIONES_BUSES))
     
-    paginator = Paginator(buses_data, 10)
-    page = request.GET.get('page')
+    if formato:
+        return exportar(buses_data, COLUMNAS_BUSES, 'buses', formato)
     
-    try:
-        buses = paginator.page(page)
-    except PageNotAnInteger:
-        buses = paginator.page(1)
-    except EmptyPage:
-        buses = paginator.page(paginator.num_pages)
+    buses = paginar(request, buses_data, ('patente',))
     
     context = {
         'buses': buses,
         'search_query': search_query,
         'estado_filter': estado_filter,
+        'operativo_filter': operativo_filter,
+        'facetas': facetas,
     }
-    return render(request, 'templatesApp/buses.html', context)
+    return _render_listado(request, 'templatesApp/buses.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(6)
 @login_required(login_url='login')
+@cache_detalle(Bus, tipos=(Trabajador,))
 def bus_detalle(request, pk):
     bus = get_object_or_404(Bus, pk=pk)
     estado = bus.get_estado_actual()
-    asignaciones = bus.asignaciones.all().order_by('-fecha_asignacion')
+    asignaciones = bus.asignaciones.select_related('trabajador').order_by('-fecha_asignacion')
+    historial_estados = bus.historial_estados.order_by('-vigente_desde', '-id')[:10]
     
     context = {
         'bus': bus,
         'estado': estado,
         'asignaciones': asignaciones,
+        'historial_estados': historial_estados,
     }
     return render(request, 'templatesApp/bus_detalle.html', context)
 
@@ -408,7 +461,7 @@ def bus_eliminar(request, pk):
     if request.method == 'POST':
         patente = bus.patente
         
-        asignaciones_activas = bus.asignaciones.filter(activo=True).count()
+        asignaciones_activas = bus.conductores_activos
         
         if asignaciones_activas > 0:
             messages.warning(
@@ -432,43 +485,45 @@ def bus_eliminar(request, pk):
 
 # ==================== CRUD ESTADO BUS ====================
 
+DIMENSIONES_ESTADOS_BUS = (dimension_opciones('estado', 'estado', EstadoBus.ESTADOS_CHOICES, 'Estado'),)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
 @login_required(login_url='login')
 def estados_bus_list(request):
     search_query = request.GET.get('search', '')
     estados_data = EstadoBus.objects.select_related('bus')
     
     if search_query:
-        estados_data = estados_data.filter(
-            Q(bus__patente__icontains=search_query) |
-            Q(bus__modelo__icontains=search_query)
-        )
+        estados_data = buscar_estados_bus(estados_data, search_query)
     
+    formato = formato_exportacion(request)
+    facetas = None if formato else contar_facetas(
+        request, estados_data, DIMENSIONES_ESTADOS_BUS, 'estados_bus', search_query
+    )
     estado_filter = request.GET.get('estado', '')
-    if estado_filter:
-        estados_data = estados_data.filter(estado=estado_filter)
+    estados_data = filtrar(estados_data, DIMENSIONES_ESTADOS_BUS, seleccion(request, DIMENSIONES_ESTADOS_BUS))
     
-    estados_data = estados_data.order_by('-fecha_cambio')
+    if formato:
+        return exportar(estados_data, COLUMNAS_ESTADOS_BUS, 'estados_bus', formato)
     
-    paginator = Paginator(estados_data, 10)
-    page = request.GET.get('page')
-    
-    try:
-        estados = paginator.page(page)
-    except PageNotAnInteger:
-        estados = paginator.page(1)
-    except EmptyPage:
-        estados = paginator.page(paginator.num_pages)
+    estados = paginar(request, estados_data, ('-fecha_cambio', 'id'))
     
     context = {
         'estados': estados,
         'search_query': search_query,
         'estado_filter': estado_filter,
         'estados_choices': EstadoBus.ESTADOS_CHOICES,
+        'facetas': facetas,
     }
-    return render(request, 'templatesApp/estados_bus.html', context)
+    return _render_listado(request, 'templatesApp/estados_bus.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(3)
 @login_required(login_url='login')
+@cache_detalle(EstadoBus, tipos=(Bus,))
 def estado_bus_detalle(request, pk):
     estado = get_object_or_404(EstadoBus.objects.select_related('bus'), pk=pk)
     return render(request, 'templatesApp/estado_bus_detalle.html', {'estado': estado})
@@ -527,45 +582,89 @@ def estado_bus_eliminar(request, pk):
 
 # ==================== CRUD ASIGNACIÓN ROL ====================
 
-@login_required(login_url='login')
-def asignaciones_rol_list(request):
-    search_query = request.GET.get('search', '')
-    asignaciones_data = AsignacionRol.objects.select_related('trabajador', 'rol')
-    
+def _filtrar_asignaciones_rol(asignaciones_data, search_query='', estado_filter=''):
     if search_query:
-        asignaciones_data = asignaciones_data.filter(
-            Q(trabajador__nombre__icontains=search_query) |
-            Q(trabajador__apellido__icontains=search_query) |
-            Q(rol__nombre__icontains=search_query)
-        )
-    
-    estado_filter = request.GET.get('estado', '')
+        asignaciones_data = buscar_asignaciones_rol(asignaciones_data, search_query)
     if estado_filter == 'activo':
         asignaciones_data = asignaciones_data.filter(activo=True)
     elif estado_filter == 'inactivo':
         asignaciones_data = asignaciones_data.filter(activo=False)
+    return asignaciones_data
+
+
+def _filtrar_asignaciones_bus(asignaciones_data, search_query='', estado_filter='', turno_filter=''):
+    if search_query:
+        asignaciones_data = buscar_asignaciones_bus(asignaciones_data, search_query)
+    if estado_filter == 'activo':
+        asignaciones_data = asignaciones_data.filter(activo=True)
+    elif estado_filter == 'inactivo':
+        asignaciones_data = asignaciones_data.filter(activo=False)
+    if turno_filter:
+        asignaciones_data = asignaciones_data.filter(turno=turno_filter)
+    return asignaciones_data
+
+
+def _finalizar_en_bloque(request, asignaciones_data, url_lista):
+    """
+    Finaliza en bloque las asignaciones seleccionadas (``ids``) o, sin ids, todas
+    las que cumplen los filtros enviados; redirige al listado con esos filtros.
+    """
+    ids = request.POST.getlist('ids')
+    if ids:
+        # isdigit() acepta '²' y otros dígitos que int() rechaza
+        if not all(pk.isascii() and pk.isdigit() for pk in ids):
+            messages.error(request, 'Selección de asignaciones inválida.')
+            return redirect(url_lista)
+        asignaciones_data = asignaciones_data.filter(pk__in=[int(pk) for pk in ids])
+    
+    finalizadas = asignaciones_data.finalizar(usuario=request.user)
+    if finalizadas:
+        messages.success(request, f'{len(finalizadas)} asignaciones finalizadas exitosamente.')
+    else:
+        messages.info(request, 'No había asignaciones activas que finalizar.')
     
-    asignaciones_data = asignaciones_data.order_by('-fecha_asignacion')
+    parametros = {
+        campo: request.POST[campo] for campo in ('search', 'turno') if request.POST.get(campo)
+    }
+    return redirect(f'{reverse(url_lista)}?{urlencode(parametros)}' if parametros else reverse(url_lista))
+
+
+DIMENSIONES_ASIGNACIONES_ROL = (dimension_activo(),)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
+@login_required(login_url='login')
+def asignaciones_rol_list(request):
+    search_query = request.GET.get('search', '')
+    estado_filter = request.GET.get('estado', '')
+    asignaciones_data = _filtrar_asignaciones_rol(
+        AsignacionRol.objects.select_related('trabajador', 'rol'), search_query
+    )
+    formato = formato_exportacion(request)
+    facetas = None if formato else contar_facetas(
+        request, asignaciones_data, DIMENSIONES_ASIGNACIONES_ROL, 'asignaciones_rol', search_query
+    )
+    asignaciones_data = _filtrar_asignaciones_rol(asignaciones_data, estado_filter=estado_filter)
     
-    paginator = Paginator(asignaciones_data, 10)
-    page = request.GET.get('page')
+    if formato:
+        return exportar(asignaciones_data, COLUMNAS_ASIGNACIONES_ROL, 'asignaciones_rol', formato)
     
-    try:
-        asignaciones = paginator.page(page)
-    except PageNotAnInteger:
-        asignaciones = paginator.page(1)
-    except EmptyPage:
-        asignaciones = paginator.page(paginator.num_pages)
+    asignaciones = paginar(request, asignaciones_data, ('-fecha_asignacion', 'id'))
     
     context = {
         'asignaciones': asignaciones,
         'search_query': search_query,
         'estado_filter': estado_filter,
+        'facetas': facetas,
     }
-    return render(request, 'templatesApp/asignaciones_rol.html', context)
+    return _render_listado(request, 'templatesApp/asignaciones_rol.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(3)
 @login_required(login_url='login')
+@cache_detalle(AsignacionRol, tipos=(Trabajador, Rol))
 def asignacion_rol_detalle(request, pk):
     asignacion = get_object_or_404(
         AsignacionRol.objects.select_related('trabajador', 'rol'), 
@@ -627,41 +726,45 @@ def asignacion_rol_eliminar(request, pk):
     return render(request, 'templatesApp/asignacion_rol_confirm_delete.html', {'asignacion': asignacion})
 
 
+@login_required(login_url='login')
+@require_POST
+def asignaciones_rol_finalizar(request):
+    asignaciones_data = _filtrar_asignaciones_rol(
+        AsignacionRol.objects.all(), request.POST.get('search', '')
+    )
+    return _finalizar_en_bloque(request, asignaciones_data, 'asignaciones_rol_list')
+
+
 # ==================== CRUD ASIGNACIÓN BUS ====================
 
+DIMENSIONES_ASIGNACIONES_BUS = (
+    dimension_activo(),
+    dimension_opciones('turno', 'turno', AsignacionBus.TURNO_CHOICES, 'Turno'),
+)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
 @login_required(login_url='login')
 def asignaciones_bus_list(request):
     search_query = request.GET.get('search', '')
-    asignaciones_data = AsignacionBus.objects.select_related('trabajador', 'bus')
-    
-    if search_query:
-        asignaciones_data = asignaciones_data.filter(
-            Q(trabajador__nombre__icontains=search_query) |
-            Q(trabajador__apellido__icontains=search_query) |
-            Q(bus__patente__icontains=search_query)
-        )
-    
     estado_filter = request.GET.get('estado', '')
-    if estado_filter == 'activo':
-        asignaciones_data = asignaciones_data.filter(activo=True)
-    elif estado_filter == 'inactivo':
-        asignaciones_data = asignaciones_data.filter(activo=False)
-    
     turno_filter = request.GET.get('turno', '')
-    if turno_filter:
-        asignaciones_data = asignaciones_data.filter(turno=turno_filter)
-    
-    asignaciones_data = asignaciones_data.order_by('-fecha_asignacion')
+    asignaciones_data = _filtrar_asignaciones_bus(
+        AsignacionBus.objects.select_related('trabajador', 'bus'), search_query
+    )
+    formato = formato_exportacion(request)
+    facetas = None if formato else contar_facetas(
+        request, asignaciones_data, DIMENSIONES_ASIGNACIONES_BUS, 'asignaciones_bus', search_query
+    )
+    asignaciones_data = _filtrar_asignaciones_bus(
+        asignaciones_data, estado_filter=estado_filter, turno_filter=turno_filter
+    )
     
-    paginator = Paginator(asignaciones_data, 10)
-    page = request.GET.get('page')
+    if formato:
+        return exportar(asignaciones_data, COLUMNAS_ASIGNACIONES_BUS, 'asignaciones_bus', formato)
     
-    try:
-        asignaciones = paginator.page(page)
-    except PageNotAnInteger:
-        asignaciones = paginator.page(1)
-    except EmptyPage:
-        asignaciones = paginator.page(paginator.num_pages)
+    asignaciones = paginar(request, asignaciones_data, ('-fecha_asignacion', 'id'))
     
     context = {
         'asignaciones': asignaciones,
@@ -669,11 +772,15 @@ def asignaciones_bus_list(request):
         'estado_filter': estado_filter,
         'turno_filter': turno_filter,
         'turnos_choices': AsignacionBus.TURNO_CHOICES,
+        'facetas': facetas,
     }
-    return render(request, 'templatesApp/asignaciones_bus.html', context)
+    return _render_listado(request, 'templatesApp/asignaciones_bus.html', context)
 
 
+@lectura_replica
+@presupuesto_consultas(3)
 @login_required(login_url='login')
+@cache_detalle(AsignacionBus, tipos=(Trabajador, Bus))
 def asignacion_bus_detalle(request, pk):
     asignacion = get_object_or_404(
         AsignacionBus.objects.select_related('trabajador', 'bus'), 
@@ -732,4 +839,257 @@ def asignacion_bus_eliminar(request, pk):
         messages.success(request, 'Asignación de bus eliminada exitosamente.')
         return redirect('asignaciones_bus_list')
     
-    return render(request, 'templatesApp/asignacion_bus_confirm_delete.html', {'asignacion': asignacion})
\ No newline at end of file
+    return render(request, 'templatesApp/asignacion_bus_confirm_delete.html', {'asignacion': asignacion})
+
+
+@login_required(login_url='login')
+@require_POST
+def asignaciones_bus_finalizar(request):
+    asignaciones_data = _filtrar_asignaciones_bus(
+        AsignacionBus.objects.all(), request.POST.get('search', ''), turno_filter=request.POST.get('turno', '')
+    )
+    return _finalizar_en_bloque(request, asignaciones_data, 'asignaciones_bus_list')
+
+
+# ==================== PLANIFICACIÓN DE TURNOS ====================
+
+# Propuestas que se listan en la vista previa (el resumen cuenta todas)
+PLAN_VISTA_PREVIA = 200
+
+
+@login_required(login_url='login')
+def planificar_turnos(request):
+    """Vista previa del plan automático de turnos; con POST lo confirma y lo carga"""
+    datos = request.POST if request.method == 'POST' else request.GET
+    try:
+        max_turnos = max(1, min(int(datos.get('max_turnos', MAX_TURNOS)), len(TURNOS)))
+    except ValueError:
+        max_turnos = MAX_TURNOS
+    plan = generar_plan(max_turnos)
+
+    if request.method == 'POST':
+        # Se recalcula y se compara con la vista previa: si las asignaciones
+        # cambiaron entre tanto, se muestra el nuevo plan en vez de cargarlo
+        if request.POST.get('firma') != plan.firma():
+            messages.warning(
+                request, 'Las asignaciones cambiaron desde la vista previa; revise el nuevo plan.'
+            )
+        elif not plan.propuestas:
+            messages.warning(request, 'No hay turnos libres que asignar.')
+        else:
+            try:
+                resultado = aplicar_plan(plan)
+            except ErrorCarga as e:
+                messages.error(request, f'No se pudo cargar el plan: {e}')
+            else:
+                if resultado.creados:
+                    messages.success(request, f'{resultado.creados} asignaciones creadas desde el plan.')
+                    return redirect('asignaciones_bus_list')
+                messages.error(
+                    request,
+                    f'El plan no se cargó: {len(resultado.errores)} asignaciones con errores. '
+                    f'Vuelva a generarlo.'
+                )
+            plan = generar_plan(max_turnos)
+
+    return render(request, 'templatesApp/planificar_turnos.html', {
+        'plan': plan,
+        'propuestas': plan.detalle(PLAN_VISTA_PREVIA),
+        'max_turnos': max_turnos,
+        'opciones_max_turnos': range(1, len(TURNOS) + 1),
+    })
+
+
+# ==================== IMPORTACIÓN MASIVA ====================
+
+@login_required(login_url='login')
+def importar_datos(request):
+    resultado = None
+    
+    if request.method == 'POST':
+        form = ImportacionForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            try:
+                filas = leer_archivo(archivo.file, archivo.name)
+                resultado = Importador(form.cleaned_data['entidad']).importar(filas)
+            except (ErrorImportacion, UnicodeDecodeError) as e:
+                messages.error(request, f'No se pudo leer el archivo: {e}')
+            else:
+                if resultado.errores:
+                    messages.warning(
+                        request,
+                        f'{resultado.creados} de {resultado.procesados} filas importadas; '
+                        f'{len(resultado.errores)} filas con errores.'
+                    )
+                else:
+                    messages.success(request, f'{resultado.creados} filas importadas exitosamente.')
+        else:
+            messages.error(request, 'Por favor corrija los errores del formulario.')
+    else:
+        form = ImportacionForm()
+    
+    return render(request, 'templatesApp/importar.html', {
+        'form': form,
+        'resultado': resultado,
+        'errores': resultado.errores[:200] if resultado else [],
+    })
+
+
+# ==================== AUTOCOMPLETADO (JSON) ====================
+
+AUTOCOMPLETAR_POR_PAGINA = 20
+
+
+def _autocompletar(request, queryset, orden, filtro_prefijo):
+    """Respuesta paginada por cursor con los objetos cuyo prefijo coincide con ?q="""
+    texto = request.GET.get('q', '').strip()
+    for termino in texto.split():
+        queryset = queryset.filter(filtro_prefijo(termino))
+
+    paginator = KeysetPaginator(queryset, AUTOCOMPLETAR_POR_PAGINA, orden)
+    try:
+        pagina = paginator.page(request.GET.get('cursor'))
+    except CursorInvalido:
+        return JsonResponse({'error': 'Cursor inválido'}, status=400)
+
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': str(obj)} for obj in pagina],
+        'next': pagina.next_cursor,
+    })
+
+
+@lectura_replica
+@presupuesto_consultas(3)
+@login_required(login_url='login')
+def autocompletar_trabajadores(request):
+    return _autocompletar(
+        request,
+        Trabajador.objects.filter(activo=True).only('id', 'nombre', 'apellido'),
+        ('apellido', 'nombre', 'id'),
+        lambda termino: Q(apellido__istartswith=termino) | Q(nombre__istartswith=termino),
+    )
+
+
+@lectura_replica
+@presupuesto_consultas(3)
+@login_required(login_url='login')
+def autocompletar_buses(request):
+    # ?disponibles=1: solo buses asignables (formulario de asignaciones)
+    buses = Bus.disponibles() if request.GET.get('disponibles') else Bus.objects.filter(activo=True)
+    return _autocompletar(
+        request,
+        buses.only('id', 'patente', 'modelo'),
+        ('patente',),
+        lambda termino: Q(patente__istartswith=termino),
+    )
+
+
+@lectura_replica
+@presupuesto_consultas(3)
+@login_required(login_url='login')
+def autocompletar_roles(request):
+    return _autocompletar(
+        request,
+        Rol.objects.filter(activo=True).only('id', 'nombre'),
+        ('nombre', 'id'),
+        lambda termino: Q(nombre__istartswith=termino),
+    )
+
+
+# ==================== API JSON (solo lectura) ====================
+#
+# Presupuestos para el peor caso: sesión y usuario, la página, ?total=1 y una
+# consulta por cada colección de ?incluir=.
+
+def _filtrar_listado(request, queryset, buscar, dimensiones):
+    """Búsqueda y filtros de un listado, como en su vista HTML"""
+    search_query = request.GET.get('search', '')
+    if search_query:
+        queryset = buscar(queryset, search_query)
+    return filtrar(queryset, dimensiones, seleccion(request, dimensiones))
+
+
+@lectura_replica
+@presupuesto_consultas(6)
+@login_required(login_url='login')
+def api_trabajadores(request):
+    trabajadores = _filtrar_listado(
+        request, Trabajador.objects.all(), buscar_trabajadores, DIMENSIONES_TRABAJADORES
+    )
+    return api.responder(request, trabajadores, api.TRABAJADORES)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
+@login_required(login_url='login')
+def api_roles(request):
+    roles = _filtrar_listado(request, Rol.objects.all(), buscar_roles, (dimension_activo(),))
+    return api.responder(request, roles, api.ROLES)
+
+
+@lectura_replica
+@presupuesto_consultas(5)
+@login_required(login_url='login')
+def api_buses(request):
+    buses = _filtrar_listado(request, Bus.objects.all(), buscar_buses, DIMENSIONES_BUSES)
+    return api.responder(request, buses, api.BUSES)
+
+
+@lectura_replica
+@presupuesto_consultas(4)
+@login_required(login_url='login')
+def api_estados_bus(request):
+    estados = _filtrar_listado(
+        request, EstadoBus.objects.all(), buscar_estados_bus, DIMENSIONES_ESTADOS_BUS
+    )
+    return api.responder(request, estados, api.ESTADOS_BUS)
+
+
+@lectura_replica
+@presupuesto_consultas(4)
+@login_required(login_url='login')
+def api_asignaciones_rol(request):
+    asignaciones = _filtrar_asignaciones_rol(
+        AsignacionRol.objects.all(), request.GET.get('search', ''), request.GET.get('estado', '')
+    )
+    return api.responder(request, asignaciones, api.ASIGNACIONES_ROL)
+
+
+@lectura_replica
+@presupuesto_consultas(4)
+@login_required(login_url='login')
+def api_asignaciones_bus(request):
+    asignaciones = _filtrar_asignaciones_bus(
+        AsignacionBus.objects.all(), request.GET.get('search', ''),
+        request.GET.get('estado', ''), request.GET.get('turno', ''),
+    )
+    return api.responder(request, asignaciones, api.ASIGNACIONES_BUS)
+
+
+@login_required(login_url='login')
+@require_POST
+def api_asignaciones_bus_masiva(request):
+    """
+    Crea en bloque asignaciones de buses desde un JSON
+    ``{"asignaciones": [{"trabajador": id, "bus": id, "turno": ...}], "parcial": false}``
+    """
+    try:
+        datos = json.loads(request.body)
+        filas = datos['asignaciones']
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Se esperaba un JSON con la lista "asignaciones"'}, status=400)
+
+    parcial = datos.get('parcial') is True or request.GET.get('parcial') == '1'
+    try:
+        resultado = CargaAsignacionesBus(parcial=parcial).cargar(filas)
+    except ConflictoCarga as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except ErrorCarga as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'creados': resultado.creados,
+        'procesados': resultado.procesados,
+        'errores': resultado.errores,
+    }, status=201 if resultado.creados else 400)